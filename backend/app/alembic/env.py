@@ -25,6 +25,8 @@ import app.models.order_item  # noqa: F401,E402
 import app.models.driver  # noqa: F401,E402
 import app.models.payment  # noqa: F401,E402
 import app.models.review  # noqa: F401,E402
+import app.models.catalog_change  # noqa: F401,E402
+import app.models.driver_daily_stat  # noqa: F401,E402
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
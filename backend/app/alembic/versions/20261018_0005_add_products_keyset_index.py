@@ -0,0 +1,23 @@
+"""add (created_at, id) index for keyset pagination of products
+
+Revision ID: 20261018_0005
+Revises: 20251108_0004
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+
+revision: str = "20261018_0005"
+down_revision: Union[str, None] = "20251108_0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Matches ORDER BY created_at DESC, id DESC and the cursor seek predicate on GET /products/
+    op.create_index("idx_products_created_id", "products", ["created_at", "id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("idx_products_created_id", table_name="products")
@@ -0,0 +1,50 @@
+"""add catalog change versions and tombstones for delta sync
+
+Revision ID: 20261018_0007
+Revises: 20261018_0006
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "20261018_0007"
+down_revision: Union[str, None] = "20261018_0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "catalog_version",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("value", sa.BigInteger(), nullable=False),
+    )
+    op.create_table(
+        "catalog_tombstones",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("entity", sa.String(length=20), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("change_version", sa.BigInteger(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("idx_catalog_tombstones_change_version", "catalog_tombstones", ["change_version"])
+
+    for table in ("products", "categories"):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column("change_version", sa.BigInteger(), nullable=False, server_default="0"))
+        # existing rows become version 1 so a full sync (since=0) returns them
+        op.execute(f"UPDATE {table} SET change_version = 1")
+        op.create_index(f"idx_{table}_change_version", table, ["change_version"])
+    op.execute("INSERT INTO catalog_version (id, value) VALUES (1, 1)")
+
+
+def downgrade() -> None:
+    for table in ("categories", "products"):
+        op.drop_index(f"idx_{table}_change_version", table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("change_version")
+    op.drop_index("idx_catalog_tombstones_change_version", table_name="catalog_tombstones")
+    op.drop_table("catalog_tombstones")
+    op.drop_table("catalog_version")
@@ -0,0 +1,35 @@
+"""add materialized available-product counts to categories
+
+Revision ID: 20261018_0008
+Revises: 20261018_0007
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "20261018_0008"
+down_revision: Union[str, None] = "20261018_0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("categories") as batch_op:
+        batch_op.add_column(sa.Column("available_product_count", sa.Integer(), nullable=False, server_default="0"))
+
+    # one-off backfill; from here on product writes keep the column current
+    categories = sa.table("categories", sa.column("id"), sa.column("available_product_count"))
+    products = sa.table("products", sa.column("category_id"), sa.column("is_available", sa.Boolean()))
+    count = (
+        sa.select(sa.func.count())
+        .where(products.c.category_id == categories.c.id, products.c.is_available == sa.true())
+        .scalar_subquery()
+    )
+    op.execute(categories.update().values(available_product_count=count))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("categories") as batch_op:
+        batch_op.drop_column("available_product_count")
@@ -0,0 +1,45 @@
+"""add orders.driver_id/delivered_at and the driver_daily_stats rollup
+
+Revision ID: 20261018_0009
+Revises: 20261018_0008
+Create Date: 2026-10-18
+
+After upgrading, populate the rollup from existing orders with
+`python -m app.db.backfill_driver_stats`.
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "20261018_0009"
+down_revision: Union[str, None] = "20261018_0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("orders") as batch_op:
+        batch_op.add_column(sa.Column("driver_id", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("delivered_at", sa.DateTime(timezone=True), nullable=True))
+        batch_op.create_foreign_key("fk_orders_driver_id", "drivers", ["driver_id"], ["id"], ondelete="SET NULL")
+
+    op.create_table(
+        "driver_daily_stats",
+        sa.Column("driver_id", sa.Integer(), sa.ForeignKey("drivers.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("orders", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("accepted", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("completed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("earnings", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("delivery_seconds_sum", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("delivery_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("driver_daily_stats")
+    with op.batch_alter_table("orders") as batch_op:
+        batch_op.drop_constraint("fk_orders_driver_id", type_="foreignkey")
+        batch_op.drop_column("delivered_at")
+        batch_op.drop_column("driver_id")
@@ -0,0 +1,38 @@
+"""add driver status/rating columns and per-driver order indexes
+
+Revision ID: 20261018_0010
+Revises: 20261018_0009
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "20261018_0010"
+down_revision: Union[str, None] = "20261018_0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("drivers") as batch_op:
+        batch_op.add_column(sa.Column("is_active", sa.Boolean(), nullable=False, server_default=sa.true()))
+        batch_op.add_column(sa.Column("rating", sa.Numeric(3, 2), nullable=True))
+        batch_op.add_column(sa.Column("total_trips", sa.Integer(), nullable=False, server_default="0"))
+        batch_op.add_column(sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()))
+
+    op.create_index("idx_orders_driver_created", "orders", ["driver_id", "created_at"])
+    op.create_index("idx_orders_driver_status_created", "orders", ["driver_id", "status", "created_at"])
+    op.create_index("idx_orders_driver_delivered", "orders", ["driver_id", "delivered_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_orders_driver_delivered", table_name="orders")
+    op.drop_index("idx_orders_driver_status_created", table_name="orders")
+    op.drop_index("idx_orders_driver_created", table_name="orders")
+    with op.batch_alter_table("drivers") as batch_op:
+        batch_op.drop_column("created_at")
+        batch_op.drop_column("total_trips")
+        batch_op.drop_column("rating")
+        batch_op.drop_column("is_active")
@@ -0,0 +1,38 @@
+"""add driver location columns and the nearby-driver search index
+
+Revision ID: 20261018_0011
+Revises: 20261018_0010
+Create Date: 2026-10-18
+
+The model has carried last_latitude/last_longitude/last_seen_at since the
+driver location endpoints were added, but no revision created them.
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "20261018_0011"
+down_revision: Union[str, None] = "20261018_0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("drivers") as batch_op:
+        batch_op.add_column(sa.Column("last_latitude", sa.Numeric(10, 8), nullable=True))
+        batch_op.add_column(sa.Column("last_longitude", sa.Numeric(11, 8), nullable=True))
+        batch_op.add_column(sa.Column("last_seen_at", sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()))
+    op.create_index(
+        "idx_drivers_available_lat_lng",
+        "drivers",
+        ["is_available", "is_active", "last_latitude", "last_longitude"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_drivers_available_lat_lng", table_name="drivers")
+    with op.batch_alter_table("drivers") as batch_op:
+        batch_op.drop_column("last_seen_at")
+        batch_op.drop_column("last_longitude")
+        batch_op.drop_column("last_latitude")
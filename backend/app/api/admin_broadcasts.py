@@ -3,7 +3,7 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, status
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.core.security import require_active
 from app.models.user import User
 from app.schemas.broadcast import (
@@ -38,7 +38,7 @@ def list_items(db: Session = Depends(get_db), _admin: User = Depends(require_act
 
 
 @router.get("/{broadcast_id}/preview")
-def preview(broadcast_id: int, db: Session = Depends(get_db), _admin: User = Depends(require_active)):
+def preview(broadcast_id: int, db: Session = Depends(get_read_db), _admin: User = Depends(require_active)):
     obj = get_broadcast(db, broadcast_id)
     size = preview_segment(db, obj.segment)
     return {"id": obj.id, "segment": obj.segment, "estimated_targets": size}
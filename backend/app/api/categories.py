@@ -1,27 +1,38 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Response, status
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db_session
+from app.api.deps import cache_fill_session_factory, get_db_session
 from app.core.security import require_active
-from app.schemas.category import CategoryCreate, CategoryRead
+from app.schemas.category import CategoryCreate, CategoryListItem, CategoryRead
 from app.models.user import User
 from app.services.category_service import list_categories as svc_list_categories, create_category as svc_create_category
-from app.core.cache import cache_get_json, cache_set_json, cache_delete
+from app.core.cache import swr_cached, cache_invalidate
+from app.core.http_cache import conditional_get
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
+_category_list_adapter = TypeAdapter(list[CategoryListItem])
 
-@router.get("/", response_model=list[CategoryRead])
-def list_categories(db: Session = Depends(get_db_session)):
-    # Cache the entire categories list since it is typically small and read-heavy
-    key = "categories:list"
-    cached = cache_get_json(key)
-    if cached is not None:
-        return cached
-    items = svc_list_categories(db)
-    payload = [CategoryRead.model_validate(c).model_dump() for c in items]
-    cache_set_json(key, payload, ttl_seconds=120)
-    return items
+
+# Cache the entire categories list since it is typically small and read-heavy.
+# Counts are materialized columns, so a rebuild is still a single query; product
+# writes that move a count invalidate "category_counts" (see api/products).
+@swr_cached("categories:list", soft_ttl=120, hard_ttl=900, tags=("categories", "category_counts"), raw=True)
+def _load_category_list(session_factory) -> str:
+    with session_factory() as db:
+        items = svc_list_categories(db)
+        return _category_list_adapter.dump_json(_category_list_adapter.validate_python(items)).decode()
+
+
+@router.get(
+    "/",
+    response_model=list[CategoryListItem],
+    dependencies=[Depends(conditional_get("categories", "category_counts"))],
+)
+def list_categories(session_factory=Depends(cache_fill_session_factory("categories", "category_counts"))):
+    # Cached body is served as-is; see api/products.list_products
+    return Response(content=_load_category_list(session_factory), media_type="application/json")
 
 
 @router.post("/", response_model=CategoryRead, status_code=status.HTTP_201_CREATED)
@@ -32,5 +43,5 @@ def create_category(
 ):
     obj = svc_create_category(db, payload)
     # Invalidate categories list cache
-    cache_delete("categories:list")
+    cache_invalidate("categories")
     return obj
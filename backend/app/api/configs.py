@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from app.core.config import settings
+from app.core.http_cache import conditional_get
 
 
-router = APIRouter(prefix="/config", tags=["config"])
+# Config payloads are cheap constants polled by every client: ETag from body, cacheable for 5 minutes
+router = APIRouter(prefix="/config", tags=["config"], dependencies=[Depends(conditional_get(max_age=300, content=True))])
 
 
 @router.get("/splash")
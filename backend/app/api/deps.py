@@ -1,8 +1,11 @@
+from collections.abc import Callable
+
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
+from app.core.cache import cache_recently_invalidated
 from app.core.security import get_current_user
-from app.db.session import get_db
+from app.db.session import get_db, get_read_session_factory, get_session_factory
 from app.models.user import User
 
 
@@ -11,6 +14,26 @@ def get_db_session(db: Session = Depends(get_db)) -> Session:
 	return db
 
 
+def cache_fill_session_factory(*tags: str):
+	"""Dependency factory: session factory for loaders that fill caches tagged with tags.
+
+	Sessions read from replicas, except while a write to any of tags may still
+	be replicating (cache_recently_invalidated), when they read the primary.
+	The choice is made per session, so background SWR refreshes follow it too.
+	"""
+
+	def _dep(
+		read_factory: Callable[[], Session] = Depends(get_read_session_factory),
+		primary_factory: Callable[[], Session] = Depends(get_session_factory),
+	) -> Callable[[], Session]:
+		def factory() -> Session:
+			return (primary_factory if cache_recently_invalidated(tags) else read_factory)()
+
+		return factory
+
+	return _dep
+
+
 def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
 	"""Ensure the authenticated user is active."""
 	if not current_user.is_active:
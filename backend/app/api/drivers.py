@@ -1,11 +1,10 @@
 from datetime import datetime
 from typing import Dict, Any
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..db.session import get_db
+from ..db.session import get_async_db, get_async_read_db
 from ..models.user import User
-from ..models.driver import Driver
 from ..schemas.driver import (
     DriverAvailabilityUpdate,
     DriverLocationUpdate,
@@ -20,10 +19,11 @@ router = APIRouter(prefix="/drivers", tags=["drivers"])
 @router.get("/me", response_model=DriverProfile)
 async def get_driver_profile(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current driver profile information"""
-    driver = db.query(Driver).filter(Driver.user_id == current_user.id).first()
+    driver_service = DriverService(db)
+    driver = await driver_service.get_by_user_id(current_user.id)
     if not driver:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -47,10 +47,11 @@ async def get_driver_profile(
 async def update_driver_availability(
     availability_update: DriverAvailabilityUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update driver availability status"""
-    driver = db.query(Driver).filter(Driver.user_id == current_user.id).first()
+    driver_service = DriverService(db)
+    driver = await driver_service.get_by_user_id(current_user.id)
     if not driver:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -64,7 +65,6 @@ async def update_driver_availability(
         )
     
     # Update availability using service
-    driver_service = DriverService(db)
     updated_driver = await driver_service.update_availability(
         driver_id=driver.id,
         is_available=availability_update.is_available
@@ -80,10 +80,11 @@ async def update_driver_availability(
 async def update_driver_location(
     location_update: DriverLocationUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update driver's current location"""
-    driver = db.query(Driver).filter(Driver.user_id == current_user.id).first()
+    driver_service = DriverService(db)
+    driver = await driver_service.get_by_user_id(current_user.id)
     if not driver:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -97,7 +98,6 @@ async def update_driver_location(
         )
     
     # Update location using service
-    driver_service = DriverService(db)
     updated_driver = await driver_service.update_location(
         driver_id=driver.id,
         latitude=location_update.latitude,
@@ -106,18 +106,20 @@ async def update_driver_location(
     
     return {
         "message": "Location updated successfully",
-        "latitude": updated_driver.last_latitude,
-        "longitude": updated_driver.last_longitude,
+        # Numeric columns load as Decimal, which Dict[str, Any] would emit as strings
+        "latitude": float(updated_driver.last_latitude),
+        "longitude": float(updated_driver.last_longitude),
         "updated_at": updated_driver.last_seen_at.isoformat() if updated_driver.last_seen_at else None
     }
 
 @router.get("/me/metrics", response_model=DriverMetrics)
 async def get_driver_metrics(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get driver performance metrics"""
-    driver = db.query(Driver).filter(Driver.user_id == current_user.id).first()
+    driver_service = DriverService(db)
+    driver = await driver_service.get_by_user_id(current_user.id)
     if not driver:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -125,7 +127,6 @@ async def get_driver_metrics(
         )
     
     # Calculate metrics using service
-    driver_service = DriverService(db)
     metrics = await driver_service.calculate_metrics(driver_id=driver.id)
     
     return metrics
\ No newline at end of file
@@ -1,29 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from collections.abc import AsyncIterator
+from typing import Any
+import csv
 import json
 import hashlib
-from pydantic import BaseModel, Field
 
-from app.api.deps import get_db_session, get_current_active_user
-from app.schemas.product import ProductCreate, ProductRead, ProductUpdate
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, Response, status, Query
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.api.deps import cache_fill_session_factory, get_db_session, get_current_active_user
+from app.db.session import get_async_db, get_read_db
+from app.schemas.category import CategoryRead
+from app.schemas.product import CatalogChanges, ProductBulkResult, ProductCreate, ProductDetail, ProductRead, ProductUpdate
 from app.models.user import User
 from app.services.product_service import (
-    list_products as svc_list_products,
+    decode_product_cursor,
+    decode_search_cursor,
+    product_cursor,
+    search_cursor,
+    search_products as svc_search_products,
+    list_product_rows as svc_list_product_rows,
+    changes_since as svc_changes_since,
     get_product as svc_get_product,
     create_product as svc_create_product,
+    bulk_create_products as svc_bulk_create_products,
+    bulk_create_products_stream as svc_bulk_create_products_stream,
+    BulkRow,
     update_product as svc_update_product,
     delete_product as svc_delete_product,
 )
-from app.core.cache import cache_get_json, cache_set_json, cache_delete_prefix
+from app.services.category_service import get_category as svc_get_category
+from app.core.cache import swr_cached, cache_invalidate, cache_get_or_set_json, cache_key, cache_set_json, cache_set_missing
+from app.core.http_cache import conditional_get
+from app.core.pagination import NEXT_CURSOR_HEADER
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+_product_list_adapter = TypeAdapter(list[ProductRead])
+
+PRODUCT_TTL_SECONDS = 300
+PRODUCT_NEGATIVE_TTL_SECONDS = 30  # 404s are remembered briefly so id enumeration skips the DB
+CATEGORY_TTL_SECONDS = 900
+
 
 class ProductListParams(BaseModel):
     skip: int = Field(0, ge=0)
     limit: int = Field(20, ge=1, le=100)
     available: bool | None = None
     category_id: int | None = None
+    # opaque keyset cursor from the previous page's X-Next-Cursor header; preferred over skip
+    cursor: str | None = None
 
 
 def build_products_query(db: Session, params: ProductListParams):
@@ -31,30 +58,155 @@ def build_products_query(db: Session, params: ProductListParams):
     return db
 
 
-@router.get("/", response_model=list[ProductRead])
+def _list_cache_key(session_factory, params: ProductListParams) -> str:
+    return "products:list:" + hashlib.sha256(json.dumps(params.model_dump(), sort_keys=True).encode()).hexdigest()
+
+
+@swr_cached(_list_cache_key, soft_ttl=60, hard_ttl=600, tags=("products",), raw=True)
+def _load_product_list(session_factory, params: ProductListParams) -> str:
+    """Return "<next cursor>\n<JSON body>"; the cursor is empty on the last page."""
+    after = decode_product_cursor(params.cursor) if params.cursor else None
+    # Opens its own session: stale entries are refreshed in the background after the request ends
+    with session_factory() as db:
+        rows = svc_list_product_rows(
+            db, skip=params.skip, limit=params.limit, available=params.available, category_id=params.category_id, after=after
+        )
+        next_cursor = product_cursor(rows[-1]) if len(rows) == params.limit else ""
+        # encode once with pydantic-core; identical to what response_model would emit
+        return next_cursor + "\n" + _product_list_adapter.dump_json(_product_list_adapter.validate_python(rows)).decode()
+
+
+@router.get("/", response_model=list[ProductRead], dependencies=[Depends(conditional_get("products"))])
 def list_products(
     params: ProductListParams = Depends(),
-    db: Session = Depends(get_db_session),
+    session_factory=Depends(cache_fill_session_factory("products")),
+):
+    if params.cursor:
+        if params.skip:
+            raise HTTPException(status_code=400, detail="Use either skip or cursor, not both")
+        decode_product_cursor(params.cursor)  # reject malformed cursors before touching the cache
+    next_cursor, body = _load_product_list(session_factory, params).split("\n", 1)
+    # Return the cached body verbatim, skipping response_model validation and re-encoding
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+class ProductSearchParams(BaseModel):
+    q: str = Field(..., min_length=2, max_length=100)
+    limit: int = Field(20, ge=1, le=50)
+    available: bool | None = None
+    category_id: int | None = None
+    cursor: str | None = None
+
+
+def _search_page(session_factory, params: ProductSearchParams) -> str:
+    """Same "<next cursor>\n<JSON body>" framing as _load_product_list."""
+    after = decode_search_cursor(params.cursor) if params.cursor else None
+    with session_factory() as db:
+        hits = svc_search_products(
+            db, params.q, limit=params.limit, available=params.available, category_id=params.category_id, after=after
+        )
+        next_cursor = search_cursor(hits[-1][1], hits[-1][0]) if len(hits) == params.limit else ""
+        items = [product for product, _ in hits]
+        return next_cursor + "\n" + _product_list_adapter.dump_json(_product_list_adapter.validate_python(items)).decode()
+
+
+def _search_cache_key(session_factory, params: ProductSearchParams) -> str:
+    return "products:search:" + hashlib.sha256(json.dumps(params.model_dump(), sort_keys=True).encode()).hexdigest()
+
+
+# Only first pages are cached: popular queries are hit repeatedly on page one,
+# while deep pages of rare queries would just churn the cache
+_cached_search_first_page = swr_cached(_search_cache_key, soft_ttl=60, hard_ttl=300, tags=("products",), raw=True)(_search_page)
+
+
+@router.get("/search", response_model=list[ProductRead], dependencies=[Depends(conditional_get("products"))])
+def search_products(
+    params: ProductSearchParams = Depends(),
+    session_factory=Depends(cache_fill_session_factory("products")),
+):
+    """Ranked full-text search on name/description; paginate with X-Next-Cursor."""
+    # normalized so "Kopi  Susu" and "kopi susu" share a cache entry
+    params.q = " ".join(params.q.lower().split())
+    if params.cursor:
+        decode_search_cursor(params.cursor)
+        page = _search_page(session_factory, params)
+    else:
+        page = _cached_search_first_page(session_factory, params)
+    next_cursor, body = page.split("\n", 1)
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+_catalog_changes_adapter = TypeAdapter(CatalogChanges)
+
+
+@router.get(
+    "/changes",
+    response_model=CatalogChanges,
+    dependencies=[Depends(conditional_get("products", "categories"))],
+)
+def product_changes(
+    since: int = Query(0, ge=0, description="version from the previous sync; 0 for a full sync"),
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_read_db),
 ):
-    # Try cache first
-    cache_key = "products:list:" + hashlib.sha256(json.dumps(params.model_dump(), sort_keys=True).encode()).hexdigest()
-    cached = cache_get_json(cache_key)
-    if cached is not None:
-        return cached
-    items = svc_list_products(db, skip=params.skip, limit=params.limit, available=params.available, category_id=params.category_id)
-    # serialize via pydantic to ensure JSON-able types
-    from app.schemas.product import ProductRead
-    payload = [ProductRead.model_validate(i).model_dump() for i in items]
-    cache_set_json(cache_key, payload, ttl_seconds=60)
-    return items
-
-
-@router.get("/{product_id}", response_model=ProductRead)
-def get_product(product_id: int, db: Session = Depends(get_db_session)):
-    product = svc_get_product(db, product_id)
-    if not product:
+    """Products/categories upserted and deleted after `since`, oldest first.
+
+    Keep calling with the returned version while has_more is true. Unchanged
+    catalogs answer If-None-Match with 304, so idle polling stays cheap.
+    """
+    return Response(
+        content=_catalog_changes_adapter.dump_json(_catalog_changes_adapter.validate_python(svc_changes_since(db, since, limit))),
+        media_type="application/json",
+    )
+
+
+def _product_write_tags(counts_may_change: bool) -> tuple[str, ...]:
+    # the category list embeds available-product counts (see api/categories)
+    return ("products", "category_counts") if counts_may_change else ("products",)
+
+
+# Bulk imports don't learn their new ids, so instead of deleting the negative
+# entries those ids may have they bump this tag, which every detail key carries
+PRODUCT_INSERTS_TAG = "product_inserts"
+
+
+def _product_key(product_id: int) -> str:
+    return cache_key(f"product:{product_id}", PRODUCT_INSERTS_TAG)
+
+
+def _write_through(obj) -> None:
+    cache_set_json(_product_key(obj.id), ProductRead.model_validate(obj).model_dump(mode="json"), ttl_seconds=PRODUCT_TTL_SECONDS)
+
+
+def _cached_category(session_factory, category_id: int) -> dict | None:
+    # Shared by every product in the category, so one entry serves them all
+    def load():
+        with session_factory() as db:
+            cat = svc_get_category(db, category_id)
+            return CategoryRead.model_validate(cat).model_dump(mode="json") if cat else None
+
+    return cache_get_or_set_json(
+        f"category:{category_id}", load, ttl_seconds=CATEGORY_TTL_SECONDS, negative_ttl_seconds=PRODUCT_NEGATIVE_TTL_SECONDS
+    )
+
+
+@router.get("/{product_id}", response_model=ProductDetail)
+def get_product(product_id: int, session_factory=Depends(cache_fill_session_factory("products", "categories"))):
+    # sessions are opened only on a cache miss
+    def load():
+        with session_factory() as db:
+            product = svc_get_product(db, product_id)
+            return ProductRead.model_validate(product).model_dump(mode="json") if product else None
+
+    data = cache_get_or_set_json(
+        _product_key(product_id), load, ttl_seconds=PRODUCT_TTL_SECONDS, negative_ttl_seconds=PRODUCT_NEGATIVE_TTL_SECONDS
+    )
+    if data is None:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    category = _cached_category(session_factory, data["category_id"]) if data.get("category_id") is not None else None
+    return {**data, "category": category}
 
 
 @router.post("/", response_model=ProductRead, status_code=status.HTTP_201_CREATED)
@@ -64,11 +216,138 @@ def create_product(
     _: User = Depends(get_current_active_user),
 ):
     obj = svc_create_product(db, payload)
-    # Invalidate cached product lists (any filter combinations) after mutation
-    cache_delete_prefix("products:list:")
+    # Invalidate cached product lists (any filter combinations) after mutation;
+    # writing the entity also replaces any negative entry for the new id
+    cache_invalidate(*_product_write_tags(obj.category_id is not None and obj.is_available))
+    _write_through(obj)
     return obj
 
 
+BULK_MAX_ITEMS = 10_000  # JSON variant; larger imports should use /bulk/stream
+
+
+def _parse_bulk_row(row: int, data: Any) -> BulkRow:
+    try:
+        return row, ProductCreate.model_validate(data)
+    except ValidationError as exc:
+        return row, "; ".join(f"{'.'.join(map(str, e['loc'])) or 'row'}: {e['msg']}" for e in exc.errors())
+
+
+@router.post("/bulk", response_model=ProductBulkResult)
+def bulk_create_products(
+    items: list[Any] = Body(..., max_length=BULK_MAX_ITEMS),
+    db: Session = Depends(get_db_session),
+    _: User = Depends(get_current_active_user),
+):
+    """Import many products in one transaction; invalid rows are reported in errors."""
+    result = svc_bulk_create_products(db, [_parse_bulk_row(i, item) for i, item in enumerate(items)])
+    if result["inserted"]:
+        # one generation bump instead of one per product
+        cache_invalidate(*_product_write_tags(True), PRODUCT_INSERTS_TAG)
+    return result
+
+
+async def _body_lines(request: Request) -> AsyncIterator[bytes]:
+    buf = b""
+    async for chunk in request.stream():
+        buf += chunk
+        *lines, buf = buf.split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r")
+    if buf:
+        yield buf.rstrip(b"\r")
+
+
+INVALID_UTF8 = "Invalid UTF-8"
+
+
+async def _ndjson_rows(request: Request) -> AsyncIterator[BulkRow]:
+    row = 0
+    async for line in _body_lines(request):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line.decode("utf-8"))
+        except UnicodeDecodeError:
+            yield row, INVALID_UTF8
+        except ValueError as exc:
+            yield row, f"Invalid JSON: {exc.msg}"
+        else:
+            yield _parse_bulk_row(row, data)
+        row += 1
+
+
+async def _csv_records(request: Request) -> AsyncIterator[list[str] | None]:
+    """CSV records as field lists; None for a record that is not valid UTF-8."""
+    pending = b""
+
+    def parse(record: bytes) -> list[str] | None:
+        try:
+            return next(csv.reader([record.decode("utf-8")]))
+        except UnicodeDecodeError:
+            return None
+
+    async for line in _body_lines(request):
+        pending = pending + b"\n" + line if pending else line
+        # a quoted field may span lines; the record is complete once quotes balance
+        # (a UTF-8 multi-byte sequence never contains the quote byte)
+        if pending.count(b'"') % 2:
+            continue
+        if pending.strip():
+            yield parse(pending)
+        pending = b""
+    if pending.strip():
+        yield parse(pending)
+
+
+async def _csv_rows(request: Request) -> AsyncIterator[BulkRow]:
+    header: list[str] | None = None
+    row = 0
+    async for record in _csv_records(request):
+        if header is None:
+            if record is None:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"CSV header: {INVALID_UTF8}")
+            header = [h.strip() for h in record]
+            continue
+        if record is None:
+            yield row, INVALID_UTF8
+            row += 1
+            continue
+        # empty cells fall back to schema defaults
+        yield _parse_bulk_row(row, {k: v for k, v in zip(header, record) if v != ""})
+        row += 1
+
+
+_STREAM_PARSERS = {
+    "application/x-ndjson": _ndjson_rows,
+    "application/jsonl": _ndjson_rows,
+    "text/csv": _csv_rows,
+}
+
+
+@router.post("/bulk/stream", response_model=ProductBulkResult)
+async def bulk_create_products_stream(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    _: User = Depends(get_current_active_user),
+):
+    """Streaming import: NDJSON (one product object per line) or CSV with a header row.
+
+    Rows are inserted while the body is still uploading and committed together.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    parser = _STREAM_PARSERS.get(content_type)
+    if parser is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Use Content-Type application/x-ndjson or text/csv",
+        )
+    result = await svc_bulk_create_products_stream(db, parser(request))
+    if result["inserted"]:
+        cache_invalidate(*_product_write_tags(True), PRODUCT_INSERTS_TAG)
+    return result
+
+
 @router.patch("/{product_id}", response_model=ProductRead)
 def update_product(
     product_id: int,
@@ -77,7 +356,8 @@ def update_product(
     _: User = Depends(get_current_active_user),
 ):
     obj = svc_update_product(db, product_id, payload)
-    cache_delete_prefix("products:list:")
+    cache_invalidate(*_product_write_tags(bool({"is_available", "category_id"} & payload.model_fields_set)))
+    _write_through(obj)
     return obj
 
 
@@ -88,5 +368,7 @@ def delete_product(
     _: User = Depends(get_current_active_user),
 ):
     svc_delete_product(db, product_id)
-    cache_delete_prefix("products:list:")
+    cache_invalidate(*_product_write_tags(True))
+    # a negative entry (not just a delete) so no refill can re-cache the row
+    cache_set_missing(_product_key(product_id), PRODUCT_NEGATIVE_TTL_SECONDS)
     return None
@@ -3,7 +3,7 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, status
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.schemas.wallet import (
     WalletBalance,
     WalletTopUpRequest,
@@ -12,7 +12,7 @@ from app.schemas.wallet import (
 )
 from app.core.security import require_active
 from app.models.user import User
-from app.services.wallet_service import get_or_create_wallet, topup as svc_topup, withdraw as svc_withdraw, list_transactions
+from app.services.wallet_service import get_or_create_wallet, get_wallet, topup as svc_topup, withdraw as svc_withdraw, list_transactions
 
 
 router = APIRouter(prefix="/wallet", tags=["wallet"])
@@ -25,8 +25,12 @@ def balance(db: Session = Depends(get_db), user: User = Depends(require_active))
 
 
 @router.get("/transactions", response_model=list[WalletTransactionRead])
-def transactions(db: Session = Depends(get_db), user: User = Depends(require_active)):
-    wallet = get_or_create_wallet(db, user.id)
+def transactions(db: Session = Depends(get_read_db), user: User = Depends(require_active)):
+    # Never create the wallet here: on a lagging replica the lookup can miss an
+    # existing wallet, and the INSERT would then violate wallets.user_id
+    wallet = get_wallet(db, user.id)
+    if wallet is None:
+        return []
     items = list_transactions(db, wallet)
     # Pydantic will convert from ORM via from_attributes, but also ensure float for amount
     out = []
@@ -1,10 +1,17 @@
 from __future__ import annotations
 
+import functools
 import json
 import logging
+import secrets
+import threading
 import time
-from typing import Any, Optional
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Optional, TypeVar
 
+from app.core import cache_codecs as codecs
 from app.core.config import settings
 
 try:
@@ -14,72 +21,409 @@ except Exception:  # pragma: no cover
 
 logger = logging.getLogger(__name__)
 
-_redis_client = None  # lazy Redis client instance
-_local_cache: dict[str, tuple[str, float]] = {}  # key -> (value, expiry_ts)
+T = TypeVar("T")
+
+class LocalLRUCache:
+	"""Thread-safe in-process LRU bounded by entry count and total value bytes.
+
+	Entries carry their own expiry; expired entries are dropped on read and by
+	a daemon sweeper thread so memory is reclaimed even for keys nobody reads.
+	"""
+
+	def __init__(self, max_entries: int, max_bytes: int, sweep_interval: float):
+		self.max_entries = max_entries
+		self.max_bytes = max_bytes
+		self.sweep_interval = sweep_interval
+		self._data: OrderedDict[str, tuple[bytes, float]] = OrderedDict()  # key -> (frame, expiry_ts)
+		self._bytes = 0
+		self._lock = threading.Lock()
+		self._sweeper: threading.Thread | None = None
+		self._stop = threading.Event()
+
+	@staticmethod
+	def _size(key: str, value: bytes) -> int:
+		return len(key) + len(value)
+
+	def _pop(self, key: str) -> None:
+		entry = self._data.pop(key, None)
+		if entry is not None:
+			self._bytes -= self._size(key, entry[0])
+
+	def get(self, key: str) -> Optional[bytes]:
+		with self._lock:
+			entry = self._data.get(key)
+			if entry is None:
+				return None
+			val, exp = entry
+			if time.time() > exp:
+				self._pop(key)
+				return None
+			self._data.move_to_end(key)
+			return val
+
+	def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+		size = self._size(key, value)
+		if ttl_seconds <= 0 or size > self.max_bytes:
+			self.delete(key)
+			return
+		with self._lock:
+			self._pop(key)
+			self._data[key] = (value, time.time() + ttl_seconds)
+			self._bytes += size
+			while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+				old_key, (old_val, _) = self._data.popitem(last=False)
+				self._bytes -= self._size(old_key, old_val)
+		self._ensure_sweeper()
+
+	def delete(self, key: str) -> bool:
+		with self._lock:
+			present = key in self._data
+			self._pop(key)
+			return present
+
+	def delete_prefix(self, prefix: str) -> int:
+		with self._lock:
+			keys = [k for k in self._data if k.startswith(prefix)]
+			for k in keys:
+				self._pop(k)
+			return len(keys)
+
+	def clear(self) -> None:
+		with self._lock:
+			self._data.clear()
+			self._bytes = 0
+
+	def sweep(self) -> int:
+		"""Drop every expired entry. Returns count removed."""
+		now = time.time()
+		with self._lock:
+			expired = [k for k, (_, exp) in self._data.items() if exp < now]
+			for k in expired:
+				self._pop(k)
+			return len(expired)
+
+	def __len__(self) -> int:
+		return len(self._data)
+
+	@property
+	def nbytes(self) -> int:
+		return self._bytes
+
+	def _ensure_sweeper(self) -> None:
+		if self._sweeper is not None or self.sweep_interval <= 0:
+			return
+		with self._lock:
+			if self._sweeper is not None:
+				return
+			self._sweeper = threading.Thread(target=self._sweep_loop, name="cache-l1-sweeper", daemon=True)
+			self._sweeper.start()
+
+	def _sweep_loop(self) -> None:
+		while not self._stop.wait(self.sweep_interval):
+			try:
+				self.sweep()
+			except Exception:  # pragma: no cover
+				logger.exception("L1 cache sweep failed")
+
+
+_l1 = LocalLRUCache(
+	max_entries=settings.CACHE_L1_MAX_ENTRIES,
+	max_bytes=settings.CACHE_L1_MAX_BYTES,
+	sweep_interval=settings.CACHE_L1_SWEEP_INTERVAL_SECONDS,
+)
+
+# per-tier hit/miss counters; see cache_stats()
+_stats_lock = threading.Lock()
+_stats: dict[str, int] = {"l1_hits": 0, "l1_misses": 0, "l2_hits": 0, "l2_misses": 0, "l2_errors": 0}
+
+
+def _incr_stat(name: str) -> None:
+	with _stats_lock:
+		_stats[name] += 1
+
+
+def _incr_stat_by(name: str, n: int) -> None:
+	if n:
+		with _stats_lock:
+			_stats[name] += n
+
+
+def cache_stats() -> dict[str, int]:
+	"""Snapshot of per-tier counters plus current L1 occupancy."""
+	with _stats_lock:
+		out = dict(_stats)
+	out["l1_entries"] = len(_l1)
+	out["l1_bytes"] = _l1.nbytes
+	return out
+
+
+def reset_cache_stats() -> None:
+	with _stats_lock:
+		for k in _stats:
+			_stats[k] = 0
+
+
+def _l1_ttl(ttl_seconds: float, l2_available: bool) -> float:
+	# With Redis present L1 is a short-lived read-through copy so that peers'
+	# writes become visible within CACHE_L1_TTL_SECONDS; without Redis, L1 is
+	# the only tier and keeps the caller's TTL.
+	if l2_available:
+		return min(ttl_seconds, settings.CACHE_L1_TTL_SECONDS)
+	return ttl_seconds
+
+
+class RedisCircuitBreaker:
+	"""Owns the Redis connection pool and short-circuits calls while Redis is down.
+
+	closed:    client is handed out normally.
+	open:      get_redis() returns None without touching the network until the
+	           backoff elapses; the backoff doubles on each failed probe up to
+	           REDIS_BREAKER_MAX_BACKOFF_SECONDS.
+	half_open: exactly one caller probes with PING; success closes the breaker,
+	           failure re-opens it.
+	"""
+
+	def __init__(self, url: str):
+		self.url = url
+		self.state = "closed"
+		self.failures = 0
+		self.last_error: str | None = None
+		self._backoff = settings.REDIS_BREAKER_BASE_BACKOFF_SECONDS
+		self._open_until = 0.0
+		self._probing = False
+		self._lock = threading.Lock()
+		self._client = None
+
+	def _connect(self):
+		# Blocking pool: callers wait (up to the socket timeout) for a free
+		# connection instead of opening unbounded sockets under load.
+		pool = redis.BlockingConnectionPool.from_url(  # type: ignore[union-attr]
+			self.url,
+			max_connections=settings.REDIS_MAX_CONNECTIONS,
+			socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+			socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+			timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+			health_check_interval=30,
+		)
+		client = redis.Redis(connection_pool=pool)  # type: ignore[union-attr]
+		client.ping()
+		return client
+
+	def client(self):
+		if self.state == "closed" and self._client is not None:
+			return self._client
+		if self.state == "open" and time.monotonic() < self._open_until:
+			return None
+		with self._lock:
+			if self._probing:
+				return None
+			self._probing = True
+			if self.state == "open":
+				self.state = "half_open"
+		try:
+			if self._client is not None:
+				self._client.ping()
+				client = self._client
+			else:
+				client = self._connect()
+		except Exception as e:
+			self._trip(e)
+			return None
+		finally:
+			self._probing = False
+		with self._lock:
+			self._client = client
+			if self.state != "closed":
+				logger.info("Redis reachable again; closing circuit breaker")
+			self.state = "closed"
+			self.failures = 0
+			self._backoff = settings.REDIS_BREAKER_BASE_BACKOFF_SECONDS
+		return client
+
+	def _trip(self, exc: BaseException) -> None:
+		with self._lock:
+			if self.state == "open" and time.monotonic() < self._open_until:
+				return  # concurrent failures from the same outage
+			self.failures += 1
+			self.last_error = str(exc)
+			if self.state == "half_open":
+				self._backoff = min(self._backoff * 2, settings.REDIS_BREAKER_MAX_BACKOFF_SECONDS)
+			self.state = "open"
+			self._open_until = time.monotonic() + self._backoff
+		logger.warning("Redis unavailable (%s); bypassing for %.1fs", exc, self._backoff)
+
+	def record_failure(self, exc: BaseException) -> None:
+		# Only transport errors mean Redis is unhealthy; command errors do not.
+		if isinstance(exc, (redis.ConnectionError, redis.TimeoutError)):  # type: ignore[union-attr]
+			self._trip(exc)
+
+	def status(self) -> dict[str, Any]:
+		out: dict[str, Any] = {"state": self.state, "failures": self.failures}
+		if self.state == "open":
+			out["retry_in_seconds"] = round(max(0.0, self._open_until - time.monotonic()), 3)
+			out["last_error"] = self.last_error
+		if self._client is not None:
+			pool = self._client.connection_pool
+			out["pool"] = {
+				"max_connections": pool.max_connections,
+				"created": len(getattr(pool, "_connections", ())),
+			}
+		return out
+
+
+_breaker: RedisCircuitBreaker | None = None
+
+
+def _get_breaker() -> Optional[RedisCircuitBreaker]:
+	global _breaker
+	if redis is None or not settings.REDIS_URL:
+		return None
+	if _breaker is None:
+		with _stats_lock:
+			if _breaker is None:
+				_breaker = RedisCircuitBreaker(settings.REDIS_URL)
+	return _breaker
 
 
 def get_redis():  # -> Optional[redis.Redis]
-	global _redis_client
-	if redis is None:
+	"""Pooled Redis client, or None when Redis is unconfigured or the breaker is open."""
+	breaker = _get_breaker()
+	if breaker is None:
 		return None
-	if _redis_client is not None:
-		return _redis_client
-	url = settings.REDIS_URL
-	if not url:
+	return breaker.client()
+
+
+def report_redis_error(exc: BaseException) -> None:
+	"""Record a failed Redis command so transport errors trip the circuit breaker."""
+	_incr_stat("l2_errors")
+	breaker = _get_breaker()
+	if breaker is not None:
+		breaker.record_failure(exc)
+
+
+def redis_health() -> dict[str, Any]:
+	"""Breaker / pool state for /health."""
+	breaker = _get_breaker()
+	if breaker is None:
+		return {"state": "disabled"}
+	return breaker.status()
+
+
+# ---- Byte-level tier access ----
+#
+# Both tiers hold framed bytes (see app.core.cache_codecs). L1 keeps frames
+# uncompressed; compression is applied only on the way to / from Redis.
+
+def _get_frame(key: str) -> Optional[bytes]:
+	val = _l1.get(key)
+	if val is not None:
+		_incr_stat("l1_hits")
+		return val
+	_incr_stat("l1_misses")
+	r = get_redis()
+	if not r:
 		return None
 	try:
-		_redis_client = redis.from_url(url, decode_responses=True)  # type: ignore
-		# ping to validate
-		_redis_client.ping()
-		return _redis_client
-	except Exception as e:  # pragma: no cover
-		logger.warning("Redis unavailable: %s", e)
+		val = r.get(key)
+	except Exception as e:
+		report_redis_error(e)
 		return None
+	if val is None:
+		_incr_stat("l2_misses")
+		return None
+	_incr_stat("l2_hits")
+	val = codecs.decompress_frame(val)
+	_l1.set(key, val, settings.CACHE_L1_TTL_SECONDS)
+	return val
 
 
-def cache_get(key: str) -> Optional[str]:
+def _set_frame(key: str, frame: bytes, ttl_seconds: int) -> None:
 	r = get_redis()
 	if r:
 		try:
-			return r.get(key)
-		except Exception:
-			return None
-	# local fallback
-	entry = _local_cache.get(key)
-	if not entry:
-		return None
-	val, exp = entry
-	if time.time() > exp:
-		_local_cache.pop(key, None)
-		return None
-	return val
+			r.setex(key, ttl_seconds, codecs.compress_frame(frame))
+		except Exception as e:
+			report_redis_error(e)
+	_l1.set(key, frame, _l1_ttl(ttl_seconds, r is not None))
 
 
-def cache_set(key: str, value: str, ttl_seconds: int) -> None:
+def _get_many_frames(keys: Iterable[str]) -> dict[str, bytes]:
+	keys = list(dict.fromkeys(keys))
+	found: dict[str, bytes] = {}
+	missing: list[str] = []
+	for k in keys:
+		val = _l1.get(k)
+		if val is not None:
+			found[k] = val
+		else:
+			missing.append(k)
+	_incr_stat_by("l1_hits", len(found))
+	_incr_stat_by("l1_misses", len(missing))
+	if not missing:
+		return found
+	r = get_redis()
+	if not r:
+		return found
+	try:
+		vals = r.mget(missing)
+	except Exception as e:
+		report_redis_error(e)
+		return found
+	hits = 0
+	for k, val in zip(missing, vals):
+		if val is None:
+			continue
+		hits += 1
+		val = codecs.decompress_frame(val)
+		found[k] = val
+		_l1.set(k, val, settings.CACHE_L1_TTL_SECONDS)
+	_incr_stat_by("l2_hits", hits)
+	_incr_stat_by("l2_misses", len(missing) - hits)
+	return found
+
+
+def _set_many_frames(items: dict[str, bytes], ttl_seconds: int) -> None:
+	if not items:
+		return
 	r = get_redis()
 	if r:
 		try:
-			r.setex(key, ttl_seconds, value)
-		except Exception:
-			pass
-		return
-	# local fallback
-	_local_cache[key] = (value, time.time() + ttl_seconds)
+			pipe = r.pipeline(transaction=False)
+			for k, v in items.items():
+				pipe.setex(k, ttl_seconds, codecs.compress_frame(v))
+			pipe.execute()
+		except Exception as e:
+			report_redis_error(e)
+	l1_ttl = _l1_ttl(ttl_seconds, r is not None)
+	for k, v in items.items():
+		_l1.set(k, v, l1_ttl)
 
 
-def cache_get_json(key: str) -> Optional[Any]:
-	val = cache_get(key)
-	if val is None:
-		return None
+def _decode_or_none(frame: bytes, decoder: Callable[[bytes], Any]) -> Any:
 	try:
-		return json.loads(val)
+		return decoder(frame)
 	except Exception:
+		logger.warning("Dropping undecodable cache value", exc_info=True)
 		return None
 
 
+def cache_get(key: str) -> Optional[str]:
+	frame = _get_frame(key)
+	return None if frame is None else _decode_or_none(frame, codecs.decode_text)
+
+
+def cache_set(key: str, value: str, ttl_seconds: int) -> None:
+	_set_frame(key, codecs.encode_text(value), ttl_seconds)
+
+
+def cache_get_json(key: str) -> Optional[Any]:
+	frame = _get_frame(key)
+	return None if frame is None else _decode_or_none(frame, codecs.decode)
+
+
 def cache_set_json(key: str, value: Any, ttl_seconds: int) -> None:
 	try:
-		cache_set(key, json.dumps(value, default=str), ttl_seconds)
+		_set_frame(key, codecs.encode(value), ttl_seconds)
 	except Exception:
 		pass
 
@@ -89,14 +433,66 @@ def cache_delete(key: str) -> None:
 	if r:
 		try:
 			r.delete(key)
-		except Exception:  # pragma: no cover
-			pass
-	_local_cache.pop(key, None)
+		except Exception as e:
+			report_redis_error(e)
+	_l1.delete(key)
+
+
+def cache_get_many(keys: Iterable[str]) -> dict[str, str]:
+	"""Fetch several keys at once: L1 first, then one MGET for the rest.
+
+	Returns only the keys that were found.
+	"""
+	out: dict[str, str] = {}
+	for k, frame in _get_many_frames(keys).items():
+		val = _decode_or_none(frame, codecs.decode_text)
+		if val is not None:
+			out[k] = val
+	return out
+
+
+def cache_set_many(items: dict[str, str], ttl_seconds: int) -> None:
+	"""Store several keys with one pipelined round trip of SETEX commands."""
+	_set_many_frames({k: codecs.encode_text(v) for k, v in items.items()}, ttl_seconds)
+
+
+def cache_delete_many(keys: Iterable[str]) -> None:
+	keys = list(keys)
+	if not keys:
+		return
+	r = get_redis()
+	if r:
+		try:
+			r.delete(*keys)
+		except Exception as e:
+			report_redis_error(e)
+	for k in keys:
+		_l1.delete(k)
+
+
+def cache_get_many_json(keys: Iterable[str]) -> dict[str, Any]:
+	out: dict[str, Any] = {}
+	for k, frame in _get_many_frames(keys).items():
+		val = _decode_or_none(frame, codecs.decode)
+		if val is not None:
+			out[k] = val
+	return out
+
+
+def cache_set_many_json(items: dict[str, Any], ttl_seconds: int) -> None:
+	encoded: dict[str, bytes] = {}
+	for k, v in items.items():
+		try:
+			encoded[k] = codecs.encode(v)
+		except Exception:
+			continue
+	_set_many_frames(encoded, ttl_seconds)
 
 
 def cache_delete_prefix(prefix: str) -> int:
 	"""Delete all keys starting with prefix. Returns count deleted.
-	Uses SCAN for Redis; linear scan for local fallback.
+	Uses SCAN for Redis; linear scan for the local tier. Cost grows with the
+	keyspace, so prefer cache_key()/cache_invalidate() on hot write paths.
 	"""
 	r = get_redis()
 	deleted = 0
@@ -115,11 +511,407 @@ def cache_delete_prefix(prefix: str) -> int:
 						pass
 				if cursor == 0:
 					break
-		except Exception:  # pragma: no cover
-			pass
-	# local fallback removal
-	to_delete = [k for k in _local_cache.keys() if k.startswith(prefix)]
-	for k in to_delete:
-		_local_cache.pop(k, None)
-	deleted += len(to_delete)
+		except Exception as e:
+			report_redis_error(e)
+	deleted += _l1.delete_prefix(prefix)
 	return deleted
+
+
+def cache_clear_local() -> None:
+	"""Drop every entry in this process's L1 tier (Redis is untouched)."""
+	_l1.clear()
+
+
+
+# ---- Namespace generations / tags ----
+#
+# Instead of deleting keys, callers embed the current generation of each tag
+# a value depends on in its cache key (see cache_key()). Invalidating a tag is
+# a single INCR; entries built against older generations are never read again
+# and simply age out through their TTL / L1 LRU eviction.
+
+_GEN_PREFIX = "gen:"
+_local_generations: dict[str, int] = {}  # tag -> generation when Redis is absent
+# Generations start from a random base rather than 0, so a generation (and the
+# ETags built from it, see app.core.http_cache) never repeats for different
+# content across restarts, between workers, or after Redis loses its keys.
+# Missing Redis keys are seeded with SET NX, so concurrent seeders agree.
+_LOCAL_GENERATION_BASE = secrets.randbits(48)
+_RECENT_PREFIX = "recent_write:"
+_local_invalidated_at: dict[str, float] = {}  # tag -> time.time() of this process's last invalidation
+_generations_lock = threading.Lock()
+
+
+def cache_generations(tags: Iterable[str]) -> list[int]:
+	"""Current generation for each tag (one round trip for all L1 misses)."""
+	tags = list(tags)
+	r = get_redis()
+	if not r:
+		with _generations_lock:
+			return [_local_generations.get(t, _LOCAL_GENERATION_BASE) for t in tags]
+	out: list[Optional[int]] = []
+	missing: list[int] = []
+	for i, t in enumerate(tags):
+		val = _l1.get(_GEN_PREFIX + t)
+		out.append(int(val) if val is not None else None)
+		if val is None:
+			missing.append(i)
+	if missing:
+		try:
+			pipe = r.pipeline()
+			for i in missing:
+				pipe.set(_GEN_PREFIX + tags[i], secrets.randbits(48), nx=True)
+			pipe.mget([_GEN_PREFIX + tags[i] for i in missing])
+			vals = pipe.execute()[-1]
+		except Exception as e:
+			report_redis_error(e)
+			vals = [None] * len(missing)
+		for i, val in zip(missing, vals):
+			gen = int(val) if val is not None else 0
+			out[i] = gen
+			_l1.set(_GEN_PREFIX + tags[i], str(gen).encode(), settings.CACHE_L1_TTL_SECONDS)
+	return [g or 0 for g in out]
+
+
+def cache_generation(tag: str) -> int:
+	return cache_generations([tag])[0]
+
+
+def cache_invalidate(*tags: str) -> None:
+	"""Bump the generation of each tag, orphaning every key built on it. O(1) per tag.
+
+	Also opens the tag's recent-write window (see cache_recently_invalidated).
+	"""
+	if not tags:
+		return
+	window = settings.DB_REPLICA_MAX_LAG_SECONDS
+	with _generations_lock:
+		now = time.time()
+		for t in tags:
+			_local_invalidated_at[t] = now
+	r = get_redis()
+	if r:
+		try:
+			pipe = r.pipeline()
+			for t in tags:
+				pipe.set(_GEN_PREFIX + t, secrets.randbits(48), nx=True)
+				pipe.incr(_GEN_PREFIX + t)
+			if window > 0:
+				for t in tags:
+					pipe.set(_RECENT_PREFIX + t, b"1", px=int(window * 1000))
+			for t, gen in zip(tags, pipe.execute()[1:2 * len(tags):2]):
+				_l1.set(_GEN_PREFIX + t, str(gen).encode(), settings.CACHE_L1_TTL_SECONDS)
+			return
+		except Exception as e:
+			report_redis_error(e)
+	with _generations_lock:
+		for t in tags:
+			_local_generations[t] = _local_generations.get(t, _LOCAL_GENERATION_BASE) + 1
+	# Redis failed or is absent: drop any stale L1 snapshot of these generations
+	for t in tags:
+		_l1.delete(_GEN_PREFIX + t)
+
+
+def cache_recently_invalidated(tags: Iterable[str]) -> bool:
+	"""True within DB_REPLICA_MAX_LAG_SECONDS of any worker invalidating one of tags.
+
+	Cache refills in that window must read the primary: a lagging replica could
+	return pre-write rows, which would then be stored (and ETag-pinned) under
+	the new generation. Redis errors answer True, the safe side.
+	"""
+	window = settings.DB_REPLICA_MAX_LAG_SECONDS
+	tags = list(tags)
+	if window <= 0 or not tags:
+		return False
+	now = time.time()
+	with _generations_lock:
+		if any(now - _local_invalidated_at.get(t, float("-inf")) < window for t in tags):
+			return True
+	r = get_redis()
+	if not r:
+		return False
+	try:
+		return bool(r.exists(*(_RECENT_PREFIX + t for t in tags)))
+	except Exception as e:
+		report_redis_error(e)
+		return True
+
+
+def cache_key(base: str, *tags: str) -> str:
+	"""Build a cache key for base that is invalidated when any of tags is.
+
+	Example: cache_key(f"product:{pid}", "products", f"category:{cid}")
+	"""
+	if not tags:
+		return base
+	gens = cache_generations(tags)
+	return base + "|" + ",".join(f"{t}={g}" for t, g in zip(tags, gens))
+
+
+# ---- Single-flight (request coalescing) ----
+
+class _Flight:
+	__slots__ = ("done", "result", "error")
+
+	def __init__(self):
+		self.done = threading.Event()
+		self.result: Any = None
+		self.error: BaseException | None = None
+
+
+_flights: dict[str, _Flight] = {}
+_flights_lock = threading.Lock()
+
+# Compare-and-delete so a worker never releases a lock that expired and was
+# re-acquired by someone else.
+_RELEASE_LOCK_LUA = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+
+def _release_lock(r, lock_key: str, token: str) -> None:
+	try:
+		r.eval(_RELEASE_LOCK_LUA, 1, lock_key, token)
+	except Exception as e:
+		report_redis_error(e)
+
+
+def _compute_with_redis_lock(key: str, compute: Callable[[], T], recheck: Callable[[], Optional[T]] | None) -> T:
+	"""Run compute() while holding a short Redis lock for key.
+
+	Workers that lose the race poll recheck() (normally a cache read) until the
+	winner publishes its result, the lock frees up, or the wait budget runs out,
+	in which case they compute themselves rather than fail the request.
+	"""
+	r = get_redis()
+	if not r or recheck is None:
+		return compute()
+	lock_key = "sf:lock:" + key
+	token = uuid.uuid4().hex
+	deadline = time.monotonic() + settings.CACHE_SINGLE_FLIGHT_WAIT_SECONDS
+	while True:
+		try:
+			acquired = r.set(lock_key, token, nx=True, px=settings.CACHE_SINGLE_FLIGHT_LOCK_MS)
+		except Exception as e:
+			report_redis_error(e)
+			return compute()
+		if acquired:
+			try:
+				return compute()
+			finally:
+				_release_lock(r, lock_key, token)
+		time.sleep(settings.CACHE_SINGLE_FLIGHT_POLL_SECONDS)
+		val = recheck()
+		if val is not None:
+			return val
+		if time.monotonic() >= deadline:
+			return compute()
+
+
+def single_flight(key: str, compute: Callable[[], T], recheck: Callable[[], Optional[T]] | None = None) -> T:
+	"""Ensure at most one compute() per key runs at a time.
+
+	Concurrent callers in this process wait for the leader's result (or its
+	exception). When Redis is available and recheck is given, the leader also
+	holds a short cross-worker lock and other workers pick up the result via
+	recheck() instead of computing it again.
+	"""
+	with _flights_lock:
+		flight = _flights.get(key)
+		leader = flight is None
+		if leader:
+			flight = _flights[key] = _Flight()
+	if not leader:
+		if flight.done.wait(settings.CACHE_SINGLE_FLIGHT_WAIT_SECONDS):
+			if flight.error is not None:
+				raise flight.error
+			return flight.result
+		return compute()
+	try:
+		flight.result = _compute_with_redis_lock(key, compute, recheck)
+		return flight.result
+	except BaseException as e:
+		flight.error = e
+		raise
+	finally:
+		with _flights_lock:
+			_flights.pop(key, None)
+		flight.done.set()
+
+
+_NEGATIVE = {"__cache_negative__": True}  # marker stored for known-missing entities
+
+
+def cache_get_or_set_json(
+	key: str,
+	compute: Callable[[], Any],
+	ttl_seconds: int,
+	negative_ttl_seconds: int | None = None,
+) -> Any:
+	"""Read-through JSON cache with single-flight coalescing on miss.
+
+	compute() must return a JSON-serializable value; it is stored under key for
+	ttl_seconds and returned to every coalesced caller. If negative_ttl_seconds
+	is given, compute() returning None is remembered for that long (so repeated
+	lookups of missing ids skip the loader) and None is returned.
+	"""
+	cached = cache_get_json(key)
+	if cached is not None:
+		return None if cached == _NEGATIVE else cached
+
+	def _load() -> Any:
+		value = compute()
+		if value is None:
+			if negative_ttl_seconds:
+				cache_set_json(key, _NEGATIVE, negative_ttl_seconds)
+			return _NEGATIVE
+		cache_set_json(key, value, ttl_seconds)
+		return value
+
+	result = single_flight(key, _load, recheck=lambda: cache_get_json(key))
+	return None if result == _NEGATIVE else result
+
+
+def cache_set_missing(key: str, ttl_seconds: int) -> None:
+	"""Remember key as known-missing, as cache_get_or_set_json does for a None load."""
+	cache_set_json(key, _NEGATIVE, ttl_seconds)
+
+
+# ---- Stale-while-revalidate ----
+#
+# Values are stored as "<soft_expiry_ts>\n<payload>" under the hard TTL. Before
+# the soft expiry the value is fresh; between soft and hard expiry it is served
+# as-is while one background refresh per key recomputes it. The payload is an
+# opaque string so callers can cache pre-encoded response bodies.
+
+_swr_executor: ThreadPoolExecutor | None = None
+_swr_refreshing: set[str] = set()
+_swr_lock = threading.Lock()
+
+
+def _get_swr_executor() -> ThreadPoolExecutor:
+	global _swr_executor
+	if _swr_executor is None:
+		with _swr_lock:
+			if _swr_executor is None:
+				_swr_executor = ThreadPoolExecutor(
+					max_workers=settings.CACHE_SWR_MAX_WORKERS, thread_name_prefix="cache-swr"
+				)
+	return _swr_executor
+
+
+def _swr_store(key: str, value: str, soft_ttl: int, hard_ttl: int) -> None:
+	cache_set(key, f"{time.time() + soft_ttl:.3f}\n{value}", hard_ttl)
+
+
+def _swr_load(key: str) -> Optional[tuple[float, str]]:
+	raw = cache_get(key)
+	if raw is None:
+		return None
+	head, sep, value = raw.partition("\n")
+	if not sep:
+		return None
+	try:
+		return float(head), value
+	except ValueError:
+		return None
+
+
+def _swr_refresh(key: str, compute: Callable[[], str], soft_ttl: int, hard_ttl: int) -> None:
+	r = get_redis()
+	lock_key = "swr:lock:" + key
+	token = uuid.uuid4().hex
+	try:
+		if r:
+			try:
+				# another worker is already refreshing this key
+				if not r.set(lock_key, token, nx=True, px=settings.CACHE_SINGLE_FLIGHT_LOCK_MS):
+					return
+			except Exception as e:
+				report_redis_error(e)
+				r = None
+		try:
+			_swr_store(key, compute(), soft_ttl, hard_ttl)
+		except Exception:
+			logger.exception("Background cache refresh failed for %s", key)
+		finally:
+			if r:
+				_release_lock(r, lock_key, token)
+	finally:
+		with _swr_lock:
+			_swr_refreshing.discard(key)
+
+
+def _schedule_swr_refresh(key: str, compute: Callable[[], str], soft_ttl: int, hard_ttl: int) -> None:
+	with _swr_lock:
+		if key in _swr_refreshing:
+			return
+		_swr_refreshing.add(key)
+	try:
+		_get_swr_executor().submit(_swr_refresh, key, compute, soft_ttl, hard_ttl)
+	except Exception:  # pragma: no cover - executor shut down
+		with _swr_lock:
+			_swr_refreshing.discard(key)
+
+
+def cache_get_or_set_swr(key: str, compute: Callable[[], str], soft_ttl: int, hard_ttl: int) -> str:
+	"""Read-through string cache with stale-while-revalidate.
+
+	Misses (or hard-expired entries) are computed inline under single_flight.
+	Stale hits return immediately and trigger a deduplicated background
+	refresh, so compute() must not depend on request-scoped resources such as
+	the request's DB session.
+	"""
+	entry = _swr_load(key)
+	if entry is not None:
+		soft_exp, value = entry
+		if time.time() >= soft_exp:
+			_schedule_swr_refresh(key, compute, soft_ttl, hard_ttl)
+		return value
+
+	def _load() -> str:
+		value = compute()
+		_swr_store(key, value, soft_ttl, hard_ttl)
+		return value
+
+	def _recheck() -> Optional[str]:
+		found = _swr_load(key)
+		return found[1] if found is not None else None
+
+	return single_flight(key, _load, recheck=_recheck)
+
+
+def cache_get_or_set_swr_json(key: str, compute: Callable[[], Any], soft_ttl: int, hard_ttl: int) -> Any:
+	"""JSON flavour of cache_get_or_set_swr(); compute() returns a JSON-able value."""
+	raw = cache_get_or_set_swr(key, lambda: json.dumps(compute(), default=str), soft_ttl, hard_ttl)
+	return json.loads(raw)
+
+
+def swr_cached(
+	key: str | Callable[..., str],
+	soft_ttl: int,
+	hard_ttl: int,
+	tags: tuple[str, ...] = (),
+	raw: bool = False,
+):
+	"""Decorator caching a loader with stale-while-revalidate.
+
+	key is a fixed string or a callable receiving the loader's arguments;
+	tags are passed to cache_key() so cache_invalidate(tag) orphans entries.
+	With raw=True the loader returns an already-encoded string (e.g. a JSON
+	response body) that is cached and returned verbatim; otherwise it returns
+	a JSON-able value.
+
+	Usage:
+		@swr_cached(lambda factory, skip: f"items:{skip}", soft_ttl=60, hard_ttl=600, tags=("items",))
+		def load_items(factory, skip): ...
+	"""
+	get_or_set = cache_get_or_set_swr if raw else cache_get_or_set_swr_json
+
+	def deco(fn: Callable[..., Any]) -> Callable[..., Any]:
+		@functools.wraps(fn)
+		def wrapper(*args, **kwargs):
+			base = key(*args, **kwargs) if callable(key) else key
+			return get_or_set(cache_key(base, *tags), lambda: fn(*args, **kwargs), soft_ttl, hard_ttl)
+
+		return wrapper
+
+	return deco
@@ -0,0 +1,165 @@
+"""Value codecs for app.core.cache.
+
+Stored values are framed as::
+
+	b"\x00" + <serializer tag> + <compression tag> + payload
+
+Values that do not start with NUL predate framing and are read as UTF-8 JSON
+text, so existing Redis contents stay readable after a deploy.
+
+Serializers turn Python values into bytes (json, msgpack, or "text" for
+pre-encoded strings such as cached response bodies). Compressors are only
+applied at the Redis boundary (see compress_frame), so the in-process L1 keeps
+uncompressed frames and hot hits never pay for decompression.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import zlib
+from typing import Any, Callable
+
+from app.core.config import settings
+
+try:
+	import msgpack  # type: ignore
+except Exception:  # pragma: no cover
+	msgpack = None
+
+try:
+	import zstandard  # type: ignore
+except Exception:  # pragma: no cover
+	zstandard = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"\x00"
+_HEADER_LEN = 3
+_NO_COMPRESSION = b"-"
+
+# name -> (tag, dumps, loads)
+_serializers: dict[str, tuple[bytes, Callable[[Any], bytes], Callable[[bytes], Any]]] = {}
+# name -> (tag, compress, decompress)
+_compressors: dict[str, tuple[bytes, Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {}
+_serializers_by_tag: dict[bytes, str] = {}
+_compressors_by_tag: dict[bytes, str] = {}
+
+
+def register_serializer(name: str, tag: str, dumps: Callable[[Any], bytes], loads: Callable[[bytes], Any]) -> None:
+	t = tag.encode()
+	if len(t) != 1:
+		raise ValueError("serializer tag must be a single ASCII character")
+	_serializers[name] = (t, dumps, loads)
+	_serializers_by_tag[t] = name
+
+
+def register_compressor(name: str, tag: str, compress: Callable[[bytes], bytes], decompress: Callable[[bytes], bytes]) -> None:
+	t = tag.encode()
+	if len(t) != 1 or t == _NO_COMPRESSION:
+		raise ValueError("compressor tag must be a single ASCII character other than '-'")
+	_compressors[name] = (t, compress, decompress)
+	_compressors_by_tag[t] = name
+
+
+register_serializer(
+	"json",
+	"j",
+	lambda v: json.dumps(v, default=str, separators=(",", ":")).encode(),
+	lambda b: json.loads(b),
+)
+register_serializer("text", "t", lambda v: v.encode(), lambda b: b.decode())
+if msgpack is not None:
+	register_serializer(
+		"msgpack",
+		"m",
+		lambda v: msgpack.packb(v, default=str, use_bin_type=True),
+		lambda b: msgpack.unpackb(b, raw=False),
+	)
+
+register_compressor("zlib", "z", lambda b: zlib.compress(b, 1), zlib.decompress)
+if zstandard is not None:
+	# compressor objects are not thread-safe; create per call (cheap relative to payload sizes)
+	register_compressor(
+		"zstd",
+		"s",
+		lambda b: zstandard.ZstdCompressor(level=3).compress(b),
+		lambda b: zstandard.ZstdDecompressor().decompress(b),
+	)
+
+
+def available_codecs() -> dict[str, list[str]]:
+	return {"serializers": sorted(_serializers), "compressors": sorted(_compressors)}
+
+
+_warned: set[str] = set()
+
+
+def _resolve(name: str, registry: dict, fallback: str, kind: str) -> str:
+	if name in registry:
+		return name
+	if name not in _warned:
+		_warned.add(name)
+		logger.warning("Cache %s %r unavailable (optional dependency missing?), using %r", kind, name, fallback)
+	return fallback
+
+
+def encode(value: Any, serializer: str | None = None) -> bytes:
+	"""Serialize value into an uncompressed frame."""
+	name = _resolve(serializer or settings.CACHE_SERIALIZER, _serializers, "json", "serializer")
+	tag, dumps, _ = _serializers[name]
+	return MAGIC + tag + _NO_COMPRESSION + dumps(value)
+
+
+def encode_text(text: str) -> bytes:
+	return encode(text, "text")
+
+
+def _split(frame: bytes) -> tuple[str, bytes]:
+	"""Return (serializer name, uncompressed payload); legacy values are JSON text."""
+	if not frame.startswith(MAGIC):
+		return "json", frame
+	ser, comp = frame[1:2], frame[2:3]
+	payload = frame[_HEADER_LEN:]
+	if comp != _NO_COMPRESSION:
+		payload = _compressors[_compressors_by_tag[comp]][2](payload)
+	return _serializers_by_tag[ser], payload
+
+
+def decode(frame: bytes) -> Any:
+	name, payload = _split(frame)
+	return _serializers[name][2](payload)
+
+
+def decode_text(frame: bytes) -> str:
+	"""Decode a frame as text; structured values are rendered back to JSON."""
+	name, payload = _split(frame)
+	if name in ("text", "json"):
+		return payload.decode()
+	return json.dumps(_serializers[name][2](payload), default=str)
+
+
+def compress_frame(frame: bytes, compression: str | None = None, min_bytes: int | None = None) -> bytes:
+	"""Compress an uncompressed frame's payload if it is large enough (for L2 writes)."""
+	if not frame.startswith(MAGIC) or frame[2:3] != _NO_COMPRESSION:
+		return frame
+	name = compression or settings.CACHE_COMPRESSION
+	if name == "none":
+		return frame
+	threshold = settings.CACHE_COMPRESS_MIN_BYTES if min_bytes is None else min_bytes
+	payload = frame[_HEADER_LEN:]
+	if len(payload) < threshold:
+		return frame
+	name = _resolve(name, _compressors, "zlib", "compressor")
+	tag, compress, _ = _compressors[name]
+	packed = compress(payload)
+	if len(packed) >= len(payload):
+		return frame
+	return frame[:2] + tag + packed
+
+
+def decompress_frame(frame: bytes) -> bytes:
+	"""Inverse of compress_frame (for L2 reads before populating L1)."""
+	if not frame.startswith(MAGIC) or frame[2:3] == _NO_COMPRESSION:
+		return frame
+	payload = _compressors[_compressors_by_tag[frame[2:3]]][2](frame[_HEADER_LEN:])
+	return frame[:2] + _NO_COMPRESSION + payload
@@ -0,0 +1,40 @@
+"""Great-circle helpers for driver proximity queries.
+
+bounding_box() gives the lat/lng ranges that contain every point within a
+radius, for index-friendly prefilters; haversine_km() is the exact distance
+check applied to the candidates.
+"""
+from __future__ import annotations
+
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+	phi1, phi2 = math.radians(lat1), math.radians(lat2)
+	a = math.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2
+	return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat: float, lng: float, radius_km: float) -> tuple[float, float, list[tuple[float, float]]]:
+	"""(lat_min, lat_max, lng ranges) covering the circle around (lat, lng).
+
+	The longitude ranges are split in two when the box crosses the
+	antimeridian, and cover all longitudes when it reaches a pole.
+	"""
+	dlat = radius_km / KM_PER_DEGREE_LAT
+	lat_min, lat_max = lat - dlat, lat + dlat
+	if lat_min <= -90 or lat_max >= 90:
+		return max(lat_min, -90.0), min(lat_max, 90.0), [(-180.0, 180.0)]
+	# widest point of the circle is at the latitude furthest from the equator
+	dlng = dlat / math.cos(math.radians(max(abs(lat_min), abs(lat_max))))
+	if dlng >= 180:
+		return lat_min, lat_max, [(-180.0, 180.0)]
+	lng_min, lng_max = lng - dlng, lng + dlng
+	if lng_min < -180:
+		return lat_min, lat_max, [(lng_min + 360, 180.0), (-180.0, lng_max)]
+	if lng_max > 180:
+		return lat_min, lat_max, [(lng_min, 180.0), (-180.0, lng_max - 360)]
+	return lat_min, lat_max, [(lng_min, lng_max)]
@@ -0,0 +1,303 @@
+"""In-process grid index of live driver positions for nearby-driver lookups.
+
+Positions live in fixed-degree grid cells; each cell keeps parallel compact
+arrays (ids, latitudes, longitudes, last-seen epoch seconds), so a k-nearest
+query touches only the cells under the search circle's bounding box and
+never leaves the process. Entries whose last-seen time is older than max_age
+are skipped and evicted.
+
+Workers stay in sync over Redis pub/sub (DriverGeoSync): every position
+change is applied locally and published on CHANNEL, and a daemon thread
+applies other workers' changes. After (re)subscribing, the index is reloaded
+from the database, so messages missed while disconnected cannot leave it
+stale; until then `ready` is False and callers fall back to SQL.
+"""
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+import math
+import queue
+import secrets
+import threading
+import time
+from array import array
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from app.core.cache import get_redis, report_redis_error
+from app.core.geo import bounding_box, haversine_km
+
+logger = logging.getLogger("geo_index")
+
+CHANNEL = "drivers:geo"
+OUTBOX_MAX = 10_000  # queued publishes; beyond this updates are dropped (the next ping resends)
+
+# (driver_id, latitude, longitude, last_seen epoch seconds)
+Position = tuple[int, float, float, float]
+
+
+class _Cell:
+	__slots__ = ("ids", "lats", "lngs", "seen")
+
+	def __init__(self) -> None:
+		self.ids = array("q")
+		self.lats = array("d")
+		self.lngs = array("d")
+		self.seen = array("d")
+
+
+class DriverGeoIndex:
+	"""Thread-safe grid of driver positions; see the module docstring."""
+
+	def __init__(self, cell_degrees: float = 0.01, max_age_seconds: float = 120.0):
+		self.cell_degrees = cell_degrees
+		self.max_age_seconds = max_age_seconds
+		self.ready = False
+		self._cells: dict[tuple[int, int], _Cell] = {}
+		self._where: dict[int, tuple[tuple[int, int], int]] = {}  # driver id -> (cell key, slot)
+		self._lock = threading.Lock()
+
+	def __len__(self) -> int:
+		return len(self._where)
+
+	def _key(self, lat: float, lng: float) -> tuple[int, int]:
+		return math.floor(lat / self.cell_degrees), math.floor(lng / self.cell_degrees)
+
+	def _remove_locked(self, driver_id: int) -> None:
+		key, slot = self._where.pop(driver_id)
+		cell = self._cells[key]
+		last = len(cell.ids) - 1
+		if slot != last:  # swap-remove keeps the arrays dense
+			moved = cell.ids[last]
+			cell.ids[slot], cell.lats[slot], cell.lngs[slot], cell.seen[slot] = (
+				moved, cell.lats[last], cell.lngs[last], cell.seen[last]
+			)
+			self._where[moved] = (key, slot)
+		for column in (cell.ids, cell.lats, cell.lngs, cell.seen):
+			column.pop()
+		if not cell.ids:
+			del self._cells[key]
+
+	def _seen_locked(self, driver_id: int) -> float | None:
+		where = self._where.get(driver_id)
+		if where is None:
+			return None
+		key, slot = where
+		return self._cells[key].seen[slot]
+
+	def upsert(self, driver_id: int, lat: float, lng: float, seen: float) -> bool:
+		"""Place driver at (lat, lng); ignored (False) if an equally new or newer position is known."""
+		with self._lock:
+			current = self._seen_locked(driver_id)
+			if current is not None:
+				if current > seen:
+					return False
+				self._remove_locked(driver_id)
+			key = self._key(lat, lng)
+			cell = self._cells.get(key)
+			if cell is None:
+				cell = self._cells[key] = _Cell()
+			self._where[driver_id] = (key, len(cell.ids))
+			cell.ids.append(driver_id)
+			cell.lats.append(lat)
+			cell.lngs.append(lng)
+			cell.seen.append(seen)
+			return True
+
+	def remove(self, driver_id: int, seen: float | None = None) -> bool:
+		"""Drop driver, unless seen is given and a newer position is already known."""
+		with self._lock:
+			current = self._seen_locked(driver_id)
+			if current is None or (seen is not None and current > seen):
+				return False
+			self._remove_locked(driver_id)
+			return True
+
+	def replace_all(self, positions: Iterable[Position]) -> None:
+		fresh = DriverGeoIndex(self.cell_degrees, self.max_age_seconds)
+		for driver_id, lat, lng, seen in positions:
+			fresh.upsert(driver_id, lat, lng, seen)
+		with self._lock:
+			self._cells, self._where = fresh._cells, fresh._where
+
+	def evict_stale(self, now: float | None = None) -> int:
+		cutoff = (time.time() if now is None else now) - self.max_age_seconds
+		with self._lock:
+			stale = [i for cell in self._cells.values() for i, s in zip(cell.ids, cell.seen) if s < cutoff]
+			for driver_id in stale:
+				self._remove_locked(driver_id)
+		return len(stale)
+
+	def nearest(
+		self, lat: float, lng: float, radius_km: float, limit: int, now: float | None = None
+	) -> list[tuple[float, int, float, float]]:
+		"""Up to limit (distance_km, driver_id, lat, lng) within radius_km, nearest first."""
+		cutoff = (time.time() if now is None else now) - self.max_age_seconds
+		lat_min, lat_max, lng_ranges = bounding_box(lat, lng, radius_km)
+		step = self.cell_degrees
+		hits: list[tuple[float, int, float, float]] = []
+		stale: list[int] = []
+		with self._lock:
+			keys = [
+				(y, x)
+				for lo, hi in lng_ranges
+				for y in range(math.floor(lat_min / step), math.floor(lat_max / step) + 1)
+				for x in range(math.floor(lo / step), math.floor(hi / step) + 1)
+			]
+			if len(keys) > len(self._cells):  # huge radius: walking every cell is cheaper
+				keys = list(self._cells)
+			for key in keys:
+				cell = self._cells.get(key)
+				if cell is None:
+					continue
+				for driver_id, dlat, dlng, seen in zip(cell.ids, cell.lats, cell.lngs, cell.seen):
+					if seen < cutoff:
+						stale.append(driver_id)
+						continue
+					if not (lat_min <= dlat <= lat_max):
+						continue
+					distance = haversine_km(lat, lng, dlat, dlng)
+					if distance <= radius_km:
+						hits.append((distance, driver_id, dlat, dlng))
+			for driver_id in stale:
+				self._remove_locked(driver_id)
+		return heapq.nsmallest(limit, hits)
+
+	def status(self) -> dict[str, Any]:
+		return {"ready": self.ready, "drivers": len(self._where), "cells": len(self._cells)}
+
+
+class DriverGeoSync:
+	"""Loads a DriverGeoIndex from the database and keeps it in sync across workers.
+
+	loader returns every live position from the database; it runs after each
+	(re)subscribe, so updates published meanwhile are buffered by the
+	subscription and applied on top (newest last-seen wins). With
+	redis_factory=None the index is process-local (single worker only) and the
+	thread just loads it once and sweeps stale entries.
+
+	publish_* update the local index immediately and only enqueue the Redis
+	PUBLISH; a second daemon thread sends it, so callers on the event loop never
+	wait on Redis (or on the breaker's reconnect probe).
+	"""
+
+	def __init__(
+		self,
+		index: DriverGeoIndex,
+		loader: Callable[[], Iterable[Position]],
+		redis_factory: Callable[[], Any] | None = get_redis,
+		sweep_seconds: float = 10.0,
+	):
+		self.index = index
+		self._loader = loader
+		self._redis = redis_factory
+		self._sweep_seconds = sweep_seconds
+		self._origin = secrets.token_hex(8)
+		self._stop = threading.Event()
+		self._thread: threading.Thread | None = None
+		self._outbox: queue.Queue[str] = queue.Queue(maxsize=OUTBOX_MAX)
+		self._publisher: threading.Thread | None = None
+
+	def start(self) -> None:
+		if self._thread is None:
+			self._thread = threading.Thread(target=self._run, name="driver-geo-sync", daemon=True)
+			self._thread.start()
+		if self._redis is not None and self._publisher is None:
+			self._publisher = threading.Thread(target=self._run_publisher, name="driver-geo-publish", daemon=True)
+			self._publisher.start()
+
+	def stop(self) -> None:
+		self._stop.set()
+		for thread in (self._thread, self._publisher):
+			if thread is not None:
+				thread.join(timeout=2)
+		self._thread = self._publisher = None
+
+	def publish_position(self, driver_id: int, lat: float, lng: float, seen: float) -> None:
+		self.index.upsert(driver_id, lat, lng, seen)
+		self._publish({"id": driver_id, "lat": lat, "lng": lng, "seen": seen})
+
+	def publish_removal(self, driver_id: int, seen: float) -> None:
+		self.index.remove(driver_id, seen)
+		self._publish({"id": driver_id, "seen": seen})
+
+	def _publish(self, message: dict) -> None:
+		if self._redis is None:
+			return
+		try:
+			self._outbox.put_nowait(json.dumps({**message, "src": self._origin}, separators=(",", ":")))
+		except queue.Full:
+			logger.warning("driver geo outbox full; dropping update for driver %s", message["id"])
+
+	def _run_publisher(self) -> None:
+		while not self._stop.is_set():
+			try:
+				payload = self._outbox.get(timeout=0.5)
+			except queue.Empty:
+				continue
+			r = self._redis()
+			if r is None:
+				continue  # other workers resync from the DB once Redis is back
+			try:
+				r.publish(CHANNEL, payload)
+			except Exception as e:
+				report_redis_error(e)
+
+	def apply(self, raw: bytes | str) -> None:
+		message = json.loads(raw)
+		if message.get("src") == self._origin:
+			return
+		if "lat" in message:
+			self.index.upsert(message["id"], message["lat"], message["lng"], message["seen"])
+		else:
+			self.index.remove(message["id"], message["seen"])
+
+	def _run(self) -> None:
+		if self._redis is None:
+			self._run_local()
+			return
+		while not self._stop.is_set():
+			r = self._redis()
+			if r is None:
+				self.index.ready = False
+				self._stop.wait(1.0)
+				continue
+			pubsub = r.pubsub(ignore_subscribe_messages=True)
+			try:
+				pubsub.subscribe(CHANNEL)
+				self.index.replace_all(self._loader())
+				self.index.ready = True
+				next_sweep = time.monotonic() + self._sweep_seconds
+				while not self._stop.is_set():
+					# poll below the client's socket timeout so idle channels don't raise
+					message = pubsub.get_message(timeout=0.2)
+					if message is not None and message["type"] == "message":
+						self.apply(message["data"])
+					if time.monotonic() >= next_sweep:
+						self.index.evict_stale()
+						next_sweep = time.monotonic() + self._sweep_seconds
+			except Exception as e:
+				logger.warning("driver geo sync interrupted (%s); falling back to SQL until resynced", e)
+				report_redis_error(e)
+				self.index.ready = False
+				self._stop.wait(1.0)
+			finally:
+				try:
+					pubsub.close()
+				except Exception:
+					pass
+		self.index.ready = False
+
+	def _run_local(self) -> None:
+		while not self.index.ready and not self._stop.is_set():
+			try:
+				self.index.replace_all(self._loader())
+				self.index.ready = True
+			except Exception as e:
+				logger.warning("driver geo index load failed (%s); retrying", e)
+				self._stop.wait(1.0)
+		while not self._stop.wait(self._sweep_seconds):
+			self.index.evict_stale()
+		self.index.ready = False
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import hashlib
+
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.cache import cache_generations
+
+
+class NotModified(Exception):
+	"""Raised by conditional_get() when the client's cached copy is current."""
+
+	def __init__(self, etag: str, cache_control: str):
+		self.etag = etag
+		self.cache_control = cache_control
+
+
+def _etag_from_bytes(data: bytes) -> str:
+	return '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+
+
+def make_etag(*parts: str) -> str:
+	return _etag_from_bytes("\x1f".join(parts).encode())
+
+
+def _cache_control(max_age: int) -> str:
+	# max_age=0: clients may store the body but must revalidate with If-None-Match
+	return f"public, max-age={max_age}" if max_age > 0 else "no-cache"
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+	if not if_none_match:
+		return False
+	if if_none_match.strip() == "*":
+		return True
+	candidates = [c.strip() for c in if_none_match.split(",")]
+	# weak comparison per RFC 9110 13.1.2: W/ prefixes are ignored for If-None-Match
+	return any(c.removeprefix("W/") == etag for c in candidates)
+
+
+def not_modified_response(exc: NotModified) -> Response:
+	return Response(status_code=304, headers={"ETag": exc.etag, "Cache-Control": exc.cache_control})
+
+
+def conditional_get(*tags: str, max_age: int = 0, content: bool = False):
+	"""Dependency factory adding ETag / If-None-Match handling to GET routes.
+
+	With tags, the ETag is derived from the request URL and the current cache
+	generations of tags (see app.core.cache.cache_key), so a matching request
+	is answered with 304 before the endpoint touches the DB or serializer.
+	This relies on every write invalidating those tags.
+	With content=True (for cheap, DB-free routes) the ETag is a hash of the
+	response body computed by ConditionalGetMiddleware.
+
+	Usage:
+		@router.get("/", dependencies=[Depends(conditional_get("products"))])
+	"""
+	cache_control = _cache_control(max_age)
+
+	def _dep(request: Request) -> None:
+		request.state.cache_control = cache_control
+		if content:
+			request.state.etag_from_body = True
+			return
+		query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+		gens = cache_generations(tags)
+		etag = make_etag(request.url.path, query, *(f"{t}={g}" for t, g in zip(tags, gens)))
+		request.state.etag = etag
+		if etag_matches(request.headers.get("if-none-match"), etag):
+			raise NotModified(etag, cache_control)
+
+	return _dep
+
+
+class ConditionalGetMiddleware(BaseHTTPMiddleware):
+	"""Attach ETag / Cache-Control prepared by conditional_get() to 200 responses.
+
+	Must be installed inside (before) GZipMiddleware so body-derived ETags are
+	computed over the identity encoding.
+	"""
+
+	async def dispatch(self, request: Request, call_next):
+		response = await call_next(request)
+		if request.method not in ("GET", "HEAD") or response.status_code != 200:
+			return response
+		cache_control = getattr(request.state, "cache_control", None)
+		if cache_control is None:
+			return response
+		etag = getattr(request.state, "etag", None)
+		if etag is None and getattr(request.state, "etag_from_body", False):
+			body = b"".join([chunk async for chunk in response.body_iterator])
+			etag = _etag_from_bytes(body)
+			if etag_matches(request.headers.get("if-none-match"), etag):
+				return not_modified_response(NotModified(etag, cache_control))
+			headers = dict(response.headers)
+			headers.pop("content-length", None)
+			response = Response(
+				content=body, status_code=response.status_code, headers=headers, media_type=response.media_type
+			)
+		if etag is not None:
+			response.headers["ETag"] = etag
+		response.headers["Cache-Control"] = cache_control
+		return response
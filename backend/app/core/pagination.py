@@ -0,0 +1,46 @@
+"""Opaque keyset (seek) pagination cursors.
+
+A cursor is the sort key of the last row of a page, JSON-encoded and
+base64url'd so clients treat it as an opaque token. Callers decide which
+columns go in and convert them back (see product_service.list_products).
+"""
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+from typing import Any
+
+from fastapi import HTTPException, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _default(value: Any) -> Any:
+	if isinstance(value, datetime):
+		return value.isoformat()
+	return str(value)
+
+
+def encode_cursor(*values: Any) -> str:
+	raw = json.dumps(list(values), default=_default, separators=(",", ":")).encode()
+	return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(token: str, arity: int) -> list[Any]:
+	"""Return the cursor's values; malformed tokens are a client error (400)."""
+	try:
+		raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+		values = json.loads(raw)
+	except (ValueError, TypeError):
+		values = None
+	if not isinstance(values, list) or len(values) != arity:
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+	return values
+
+
+def decode_datetime(value: Any) -> datetime:
+	try:
+		return datetime.fromisoformat(value)
+	except (TypeError, ValueError):
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
@@ -8,7 +8,7 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.core.cache import get_redis
+from app.core.cache import get_redis, report_redis_error
 from app.db.session import get_db
 from app.crud import crud_user
 
@@ -134,8 +134,8 @@ def record_failed_login(key: str) -> int:
             pipe.expire(redis_key, window)
             new_count, _ = pipe.execute()
             return int(new_count)
-        except Exception:  # pragma: no cover
-            pass
+        except Exception as e:  # pragma: no cover
+            report_redis_error(e)
     # fallback
     now = _now_ts()
     window = settings.LOGIN_LOCKOUT_SECONDS
@@ -157,8 +157,8 @@ def reset_failed_login(key: str) -> None:
     if r:
         try:
             r.delete(f"auth:fail:{key}")
-        except Exception:  # pragma: no cover
-            pass
+        except Exception as e:  # pragma: no cover
+            report_redis_error(e)
     _failed_login_store.pop(key, None)
 
 
@@ -170,8 +170,8 @@ def is_locked_out(key: str) -> bool:
             if not val:
                 return False
             return int(val) >= settings.MAX_LOGIN_ATTEMPTS
-        except Exception:  # pragma: no cover
-            pass
+        except Exception as e:  # pragma: no cover
+            report_redis_error(e)
     entry = _failed_login_store.get(key)
     if not entry:
         return False
@@ -0,0 +1,37 @@
+"""Rebuild the driver_daily_stats rollup from the orders table.
+
+Order writes through the ORM keep the rollup current; run this once after
+creating the table, and again after bulk SQL writes to orders that bypass
+the ORM (imports, manual fixes):
+
+	python -m app.db.backfill_driver_stats [--driver-id N]
+
+The rebuild runs in one transaction, so readers see either the old or the
+new rollup; order writes that race with it may need a second run.
+"""
+import argparse
+import time
+
+from app.db.session import engine
+import app.models  # noqa: F401  (register every mapper before touching Order)
+from app.services.driver_service import daily_stats_backfill_stmts
+
+
+def backfill_driver_stats(driver_id: int | None = None) -> int:
+	"""Rebuild rows for one driver (or all); returns the number of rows written."""
+	written = 0
+	with engine.begin() as conn:
+		clear, *inserts = daily_stats_backfill_stmts(conn.dialect.name, driver_id)
+		conn.execute(clear)
+		for stmt in inserts:
+			written += conn.execute(stmt).rowcount
+	return written
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--driver-id", type=int, help="only rebuild this driver's rows")
+	args = parser.parse_args()
+	t0 = time.perf_counter()
+	rows = backfill_driver_stats(args.driver_id)
+	print(f"driver_daily_stats: wrote {rows} rows in {time.perf_counter() - t0:.1f}s")
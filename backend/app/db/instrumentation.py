@@ -0,0 +1,117 @@
+"""Per-request SQL instrumentation via SQLAlchemy engine events.
+
+Listeners are attached to the Engine class, so every engine (primary, replicas,
+and the sync engines behind the async ones) is covered. Within a request scope
+(see request_logging_middleware in app.main) queries are counted and timed,
+and statements repeated at least SQL_N_PLUS_ONE_THRESHOLD times are reported
+as likely N+1 patterns. Statements slower than SQL_SLOW_QUERY_MS are logged
+with their parameters whether or not a request scope is active.
+"""
+from __future__ import annotations
+
+import contextvars
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger("sql")
+
+_MAX_LOGGED_CHARS = 500
+
+
+class QueryStats:
+	"""Query counters for one request; shared by the threads/tasks serving it."""
+
+	__slots__ = ("count", "seconds", "statements", "started", "_lock")
+
+	def __init__(self) -> None:
+		self.count = 0
+		self.seconds = 0.0
+		self.statements: Counter[str] = Counter()
+		self.started = time.perf_counter()
+		self._lock = threading.Lock()
+
+	def record(self, statement: str, seconds: float) -> None:
+		with self._lock:
+			self.count += 1
+			self.seconds += seconds
+			self.statements[statement] += 1
+
+	def repeated(self, threshold: int | None = None) -> list[tuple[str, int]]:
+		"""Statements executed at least threshold times (same SQL, any parameters)."""
+		threshold = settings.SQL_N_PLUS_ONE_THRESHOLD if threshold is None else threshold
+		if threshold <= 0:
+			return []
+		with self._lock:
+			return [(s, n) for s, n in self.statements.most_common() if n >= threshold]
+
+	def server_timing(self) -> str:
+		total_ms = (time.perf_counter() - self.started) * 1000
+		return f'db;dur={self.seconds * 1000:.2f};desc="{self.count} queries", app;dur={total_ms:.2f}'
+
+
+_current: contextvars.ContextVar[QueryStats | None] = contextvars.ContextVar("sql_query_stats", default=None)
+
+
+def begin_query_stats() -> tuple[QueryStats, contextvars.Token]:
+	stats = QueryStats()
+	return stats, _current.set(stats)
+
+
+def end_query_stats(token: contextvars.Token) -> None:
+	_current.reset(token)
+
+
+def current_query_stats() -> QueryStats | None:
+	return _current.get()
+
+
+def _short(value: Any) -> str:
+	text = value if isinstance(value, str) else repr(value)
+	text = " ".join(text.split())
+	return text if len(text) <= _MAX_LOGGED_CHARS else text[:_MAX_LOGGED_CHARS] + "..."
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+	conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+	starts = conn.info.get("query_start")
+	if not starts:
+		return
+	elapsed = time.perf_counter() - starts.pop()
+	stats = _current.get()
+	if stats is not None:
+		stats.record(statement, elapsed)
+	slow_ms = settings.SQL_SLOW_QUERY_MS
+	if slow_ms > 0 and elapsed * 1000 >= slow_ms:
+		logger.warning(
+			{"slow_query_ms": round(elapsed * 1000, 2), "statement": _short(statement), "parameters": _short(parameters)}
+		)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(ctx) -> None:
+	# failed statements never reach after_cursor_execute; drop their start time
+	starts = ctx.connection.info.get("query_start") if ctx.connection is not None else None
+	if starts:
+		starts.pop()
+
+
+def summarize(stats: QueryStats) -> dict[str, Any]:
+	"""Fields merged into the request log line."""
+	out: dict[str, Any] = {"db_queries": stats.count, "db_ms": round(stats.seconds * 1000, 2)}
+	repeated = stats.repeated()
+	if repeated:
+		out["n_plus_one"] = [{"statement": _short(s), "count": n} for s, n in repeated]
+	return out
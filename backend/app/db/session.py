@@ -1,16 +1,349 @@
-from sqlalchemy import create_engine
+import contextvars
+import itertools
+import logging
+import threading
+import time
+
+from sqlalchemy import create_engine, event, exc as sa_exc, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from typing import Generator
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.selectable import CompoundSelect
+from typing import Any, AsyncGenerator, Callable, Generator
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+
+class PoolTelemetry:
+	"""Checkout counters for one engine's pool; gauges are read live from the pool."""
+
+	def __init__(self, name: str):
+		self.name = name
+		self.pool: QueuePool | None = None
+		self._lock = threading.Lock()
+		self.checkouts = 0
+		self.timeouts = 0
+		self.wait_seconds_total = 0.0
+		self.wait_seconds_max = 0.0
+
+	def observe(self, waited: float, timed_out: bool = False) -> None:
+		with self._lock:
+			if timed_out:
+				self.timeouts += 1
+			else:
+				self.checkouts += 1
+			self.wait_seconds_total += waited
+			self.wait_seconds_max = max(self.wait_seconds_max, waited)
+		if timed_out:
+			logger.warning("DB pool %s exhausted: checkout timed out after %.2fs", self.name, waited)
+
+	def snapshot(self) -> dict[str, Any]:
+		pool = self.pool
+		with self._lock:
+			out: dict[str, Any] = {
+				"checkouts": self.checkouts,
+				"timeouts": self.timeouts,
+				"wait_seconds_total": round(self.wait_seconds_total, 6),
+				"wait_seconds_max": round(self.wait_seconds_max, 6),
+			}
+		if pool is not None:
+			out.update(
+				size=pool.size(),
+				checked_out=pool.checkedout(),
+				overflow=max(pool.overflow(), 0),
+				idle=pool.checkedin(),
+			)
+		return out
+
+	def reset(self) -> None:
+		with self._lock:
+			self.checkouts = self.timeouts = 0
+			self.wait_seconds_total = self.wait_seconds_max = 0.0
+
+
+_pool_telemetry: dict[str, PoolTelemetry] = {}
+
+
+def _instrumented_pool(base: type[QueuePool], name: str) -> type[QueuePool]:
+	"""Subclass base so every checkout records its wait time (and timeouts).
+
+	The telemetry lives on the class because Pool.recreate() (engine.dispose)
+	builds a fresh instance of the same class.
+	"""
+	telemetry = _pool_telemetry.setdefault(name, PoolTelemetry(name))
+
+	class _Pool(base):  # type: ignore[misc, valid-type]
+		_telemetry = telemetry
+
+		def __init__(self, *args, **kwargs):
+			super().__init__(*args, **kwargs)
+			self._telemetry.pool = self
+
+		def _do_get(self):
+			t0 = time.perf_counter()
+			try:
+				conn = super()._do_get()
+			except sa_exc.TimeoutError:
+				self._telemetry.observe(time.perf_counter() - t0, timed_out=True)
+				raise
+			self._telemetry.observe(time.perf_counter() - t0)
+			return conn
+
+	_Pool.__name__ = _Pool.__qualname__ = f"Instrumented{base.__name__}"
+	return _Pool
+
+
+def _engine_kwargs(url: str, name: str, pool_base: type[QueuePool]) -> dict[str, Any]:
+	pre_ping = settings.DB_POOL_LIVENESS == "pre_ping"
+	if make_url(url).get_backend_name() == "sqlite":
+		# SQLite uses its own pool classes; sizing knobs don't apply
+		return {"pool_pre_ping": pre_ping}
+	return {
+		"poolclass": _instrumented_pool(pool_base, name),
+		"pool_size": settings.DB_POOL_SIZE,
+		"max_overflow": settings.DB_MAX_OVERFLOW,
+		"pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+		"pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+		"pool_use_lifo": settings.DB_POOL_USE_LIFO,
+		# with "recycle", stale connections are retired by age instead of pinged on
+		# every checkout; a connection dropped mid-flight still fails that one
+		# statement and the pool is invalidated by SQLAlchemy's disconnect handling
+		"pool_pre_ping": pre_ping,
+	}
+
+
+def pool_stats() -> dict[str, dict[str, Any]]:
+	"""Per-engine pool gauges (checked_out, overflow, ...) and checkout counters."""
+	return {name: t.snapshot() for name, t in _pool_telemetry.items()}
+
+
+def reset_pool_stats() -> None:
+	for t in _pool_telemetry.values():
+		t.reset()
+
+
 engine = create_engine(
 	settings.DATABASE_URL,
-	pool_pre_ping=True,
+	**_engine_kwargs(settings.DATABASE_URL, "primary", QueuePool),
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# async drivers for the sync DBAPIs we ship with
+_ASYNC_DRIVERS = {"mysql": "aiomysql", "sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def async_url_for(url: str) -> str:
+	"""Derive the asyncio driver URL from a sync DATABASE_URL (mysql+pymysql -> mysql+aiomysql)."""
+	u = make_url(url)
+	driver = _ASYNC_DRIVERS.get(u.get_backend_name())
+	if driver is None:
+		raise ValueError(f"No async driver known for {u.get_backend_name()!r}; set ASYNC_DATABASE_URL")
+	return u.set(drivername=f"{u.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+_async_url = settings.ASYNC_DATABASE_URL or async_url_for(settings.DATABASE_URL)
+async_engine = create_async_engine(
+	_async_url,
+	**_engine_kwargs(_async_url, "primary_async", AsyncAdaptedQueuePool),
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+# ---- Read replicas ----
+
+class _RequestDBState:
+	__slots__ = ("wrote",)
+
+	def __init__(self) -> None:
+		self.wrote = False
+
+
+# Mutable holder shared by every thread/task serving one request (contextvars are
+# copied into the threadpool, the object inside them is not), so a write made by a
+# sync endpoint is visible to read sessions used later in the same request.
+_request_db_state: contextvars.ContextVar[_RequestDBState | None] = contextvars.ContextVar("request_db_state", default=None)
+
+
+def begin_request_scope() -> contextvars.Token:
+	return _request_db_state.set(_RequestDBState())
+
+
+def end_request_scope(token: contextvars.Token) -> None:
+	_request_db_state.reset(token)
+
+
+def request_wrote() -> bool:
+	state = _request_db_state.get()
+	return state is not None and state.wrote
+
+
+def _mark_request_wrote(*_args) -> None:
+	state = _request_db_state.get()
+	if state is not None:
+		state.wrote = True
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context) -> None:
+	_mark_request_wrote()
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _after_dml(orm_execute_state) -> None:
+	if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+		_mark_request_wrote()
+
+
+def _redact(url: str) -> str:
+	return make_url(url).render_as_string(hide_password=True)
+
+
+class _Replica:
+	def __init__(self, url: str, engine: Engine, async_engine=None):
+		self.url = url
+		self.engine = engine
+		self.async_engine = async_engine
+		self.healthy = True
+		self.last_error: str | None = None
+
+
+class ReplicaSet:
+	"""Round-robin over healthy read replicas.
+
+	A daemon thread probes every replica with SELECT 1 each check_interval seconds;
+	disconnect errors seen by queries mark a replica down immediately. With no
+	healthy replica, pick() returns None and callers fall back to the primary.
+	"""
+
+	def __init__(self, replicas: list[_Replica], check_interval: float = 0.0):
+		self.replicas = replicas
+		self._rr = itertools.count()
+		self._lock = threading.Lock()
+		for r in replicas:
+			for e in filter(None, (r.engine, r.async_engine and r.async_engine.sync_engine)):
+				event.listen(e, "handle_error", self._on_error(r))
+		self._stop = threading.Event()
+		if replicas and check_interval > 0:
+			t = threading.Thread(target=self._run, args=(check_interval,), name="db-replica-health", daemon=True)
+			t.start()
+
+	def _on_error(self, replica: _Replica):
+		def handler(ctx) -> None:
+			if ctx.is_disconnect:
+				self.mark_down(replica, str(ctx.original_exception))
+		return handler
+
+	def mark_down(self, replica: _Replica, error: str) -> None:
+		if replica.healthy:
+			logger.warning("DB replica %s marked down: %s", _redact(replica.url), error)
+		replica.healthy = False
+		replica.last_error = error
+
+	def pick(self) -> _Replica | None:
+		if not self.replicas:
+			return None
+		with self._lock:
+			start = next(self._rr)
+		n = len(self.replicas)
+		for i in range(n):
+			r = self.replicas[(start + i) % n]
+			if r.healthy:
+				return r
+		return None
+
+	def check(self) -> None:
+		for r in self.replicas:
+			try:
+				with r.engine.connect() as conn:
+					conn.execute(text("SELECT 1"))
+			except Exception as exc:  # any failure takes the replica out of rotation
+				self.mark_down(r, str(exc))
+				continue
+			if not r.healthy:
+				logger.info("DB replica %s healthy again", _redact(r.url))
+			r.healthy = True
+			r.last_error = None
+
+	def _run(self, interval: float) -> None:
+		while not self._stop.wait(interval):
+			self.check()
+
+	def stop(self) -> None:
+		self._stop.set()
+
+	def health(self) -> list[dict[str, Any]]:
+		return [{"url": _redact(r.url), "healthy": r.healthy, "error": r.last_error} for r in self.replicas]
+
+
+class RoutingSession(Session):
+	"""Session that sends SELECTs to a read replica and everything else to the primary.
+
+	Reads go to the primary once this request has written (read-your-writes),
+	while flushing, and when no replica is healthy. The chosen replica is pinned
+	for the session's lifetime so one request sees a single snapshot source.
+	"""
+
+	def __init__(self, *args, replicas: ReplicaSet | None = None, use_async: bool = False, **kwargs):
+		super().__init__(*args, **kwargs)
+		self._replicas = replicas
+		self._use_async = use_async
+		self._pinned: Engine | None = None
+
+	def get_bind(self, mapper=None, *, clause=None, **kw):
+		primary = super().get_bind(mapper, clause=clause, **kw)
+		if self._replicas is None or self._flushing or request_wrote():
+			return primary
+		if not isinstance(clause, (Select, CompoundSelect)):
+			return primary
+		if self._pinned is None:
+			replica = self._replicas.pick()
+			if replica is None:
+				return primary
+			self._pinned = replica.async_engine.sync_engine if self._use_async else replica.engine
+		return self._pinned
+
+	def close(self) -> None:
+		super().close()
+		self._pinned = None
+
+
+def _build_replicas() -> ReplicaSet:
+	urls = [u.strip() for u in (settings.DATABASE_REPLICA_URLS or "").split(",") if u.strip()]
+	replicas = []
+	for i, url in enumerate(urls):
+		aurl = async_url_for(url)
+		replicas.append(
+			_Replica(
+				url,
+				create_engine(url, **_engine_kwargs(url, f"replica{i}", QueuePool)),
+				create_async_engine(aurl, **_engine_kwargs(aurl, f"replica{i}_async", AsyncAdaptedQueuePool)),
+			)
+		)
+	return ReplicaSet(replicas, settings.DB_REPLICA_HEALTH_CHECK_SECONDS)
+
+
+replica_set = _build_replicas()
+ReadSessionLocal = sessionmaker(
+	autocommit=False, autoflush=False, bind=engine, class_=RoutingSession, replicas=replica_set
+)
+AsyncReadSessionLocal = async_sessionmaker(
+	async_engine,
+	autoflush=False,
+	expire_on_commit=False,
+	sync_session_class=RoutingSession,
+	replicas=replica_set,
+	use_async=True,
+)
+
+
+def replica_health() -> list[dict[str, Any]]:
+	return replica_set.health()
+
 Base = declarative_base()
 
 
@@ -21,3 +354,34 @@ def get_db() -> Generator:
 		yield db
 	finally:
 		db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+	"""Yield an AsyncSession for async routes so DB round trips don't block the event loop."""
+	async with AsyncSessionLocal() as db:
+		yield db
+
+
+def get_read_db() -> Generator:
+	"""Like get_db, but SELECTs may be served by a read replica (see RoutingSession)."""
+	db = ReadSessionLocal()
+	try:
+		yield db
+	finally:
+		db.close()
+
+
+async def get_async_read_db() -> AsyncGenerator[AsyncSession, None]:
+	async with AsyncReadSessionLocal() as db:
+		yield db
+
+
+def get_read_session_factory() -> Callable[[], Session]:
+	"""get_session_factory counterpart for read-only loaders (cached list bodies)."""
+	return ReadSessionLocal
+
+
+def get_session_factory() -> Callable[[], Session]:
+	"""Dependency returning the session factory for work that outlives the request
+	(e.g. background cache refreshes), which must not reuse the request session."""
+	return SessionLocal
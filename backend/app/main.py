@@ -4,7 +4,12 @@ from fastapi.middleware.gzip import GZipMiddleware
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
-from app.db.session import get_db
+from app.db.session import begin_request_scope, end_request_scope, get_db, pool_stats, replica_health
+from app.db.instrumentation import begin_query_stats, end_query_stats, summarize as summarize_queries
+from app.core.cache import redis_health
+from app.services.driver_service import driver_geo_health
+from app.core.config import settings
+from app.core.http_cache import ConditionalGetMiddleware, NotModified, not_modified_response
 from app.api.auth import router as auth_router
 from app.api.register import router as register_router
 from app.api.me import router as me_router
@@ -16,6 +21,8 @@ from app.api.admin_broadcasts import router as broadcasts_router
 from app.api.drivers import router as drivers_router
 
 app = FastAPI(title="dieHantar API")
+# Added first so it sits inside GZip and sees uncompressed bodies
+app.add_middleware(ConditionalGetMiddleware)
 app.add_middleware(GZipMiddleware, minimum_size=1000)
 
 # Ensure SQLAlchemy model classes are registered for relationship resolution
@@ -64,12 +71,22 @@ def read_root():
 
 @app.get("/health", tags=["health"])
 def health(db: Session = Depends(get_db)):
-    # simple check executing a lightweight query
+    # simple check executing a lightweight query; Redis is optional so its
+    # breaker state is reported without affecting the overall status.
+    # db_pool carries pool gauges/counters (empty for SQLite); replicas likewise
+    # only inform, reads fall back to the primary when none is healthy; so does
+    # the driver geo index (null until first used, SQL answers while not ready).
+    extra = {
+        "redis": redis_health(),
+        "db_pool": pool_stats(),
+        "db_replicas": replica_health(),
+        "driver_geo_index": driver_geo_health(),
+    }
     try:
         db.execute(text("SELECT 1"))
-        return {"status": "ok"}
+        return {"status": "ok", **extra}
     except Exception as e:
-        return {"status": "degraded", "error": str(e)}
+        return {"status": "degraded", "error": str(e), **extra}
 
 
 app.include_router(auth_router, tags=["Authentication"])
@@ -92,11 +109,18 @@ async def request_logging_middleware(request: Request, call_next):
     rid = str(uuid.uuid4())
     start = time.time()
     response = None
+    stats, stats_token = begin_query_stats()
     try:
         response = await call_next(request)
+        if settings.SQL_SERVER_TIMING:
+            response.headers["Server-Timing"] = stats.server_timing()
         return response
     finally:
+        end_query_stats(stats_token)
         duration_ms = int((time.time() - start) * 1000)
+        db = summarize_queries(stats)
+        if "n_plus_one" in db:
+            logger.warning({"request_id": rid, "path": request.url.path, "n_plus_one": db["n_plus_one"]})
         logger.info(
             {
                 "request_id": rid,
@@ -104,14 +128,31 @@ async def request_logging_middleware(request: Request, call_next):
                 "path": request.url.path,
                 "status_code": getattr(response, "status_code", 500),
                 "duration_ms": duration_ms,
+                **db,
             }
         )
 
+@app.middleware("http")
+async def db_request_scope_middleware(request: Request, call_next):
+    # per-request write marker: read sessions stick to the primary after a write
+    token = begin_request_scope()
+    try:
+        return await call_next(request)
+    finally:
+        end_request_scope(token)
+
+@app.exception_handler(NotModified)
+async def not_modified_handler(request: Request, exc: NotModified):
+    return not_modified_response(exc)
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse(
         status_code=exc.status_code,
-        content={"error": {"code": exc.status_code, "message": exc.detail}},
+        # "error" is the app's envelope; "detail" is FastAPI's default error key,
+        # kept alongside it so clients and tests written against stock FastAPI
+        # (e.g. tests/test_drivers.py) keep working. Additive: no key is removed.
+        content={"error": {"code": exc.status_code, "message": exc.detail}, "detail": exc.detail},
     )
 
 @app.exception_handler(Exception)
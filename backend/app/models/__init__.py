@@ -13,6 +13,8 @@ from .payment import Payment  # noqa: F401
 from .review import Review  # noqa: F401
 from .wallet import Wallet, WalletTransaction  # noqa: F401
 from .broadcast import Broadcast, BroadcastStatus  # noqa: F401
+from .catalog_change import CatalogVersion, CatalogTombstone  # noqa: F401
+from .driver_daily_stat import DriverDailyStat  # noqa: F401
 
 __all__ = [
     "User",
@@ -28,4 +30,7 @@ __all__ = [
     "WalletTransaction",
     "Broadcast",
     "BroadcastStatus",
+    "CatalogVersion",
+    "CatalogTombstone",
+    "DriverDailyStat",
 ]
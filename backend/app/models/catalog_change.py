@@ -0,0 +1,31 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String
+from sqlalchemy.sql import func
+
+from app.db.session import Base
+
+
+class CatalogVersion(Base):
+	"""Single-row counter behind products/categories.change_version.
+
+	Writers bump it inside their transaction, so the row lock orders commits by
+	version and a delta-sync reader can never see version N+1 before N.
+	"""
+	__tablename__ = "catalog_version"
+
+	id = Column(Integer, primary_key=True)
+	value = Column(BigInteger, nullable=False, default=0)
+
+
+class CatalogTombstone(Base):
+	"""Deleted catalog rows, so delta sync can tell clients to drop them."""
+	__tablename__ = "catalog_tombstones"
+
+	id = Column(Integer, primary_key=True, index=True)
+	entity = Column(String(20), nullable=False)  # product|category
+	entity_id = Column(Integer, nullable=False)
+	change_version = Column(BigInteger, nullable=False)
+	deleted_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+	__table_args__ = (
+		Index("idx_catalog_tombstones_change_version", "change_version"),
+	)
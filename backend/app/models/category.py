@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import BigInteger, Column, Integer, String, DateTime, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -12,6 +12,14 @@ class Category(Base):
 	name = Column(String(100), nullable=False)
 	icon_url = Column(String(255), nullable=True)
 	created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+	# catalog_version value of the last write; drives GET /products/changes
+	change_version = Column(BigInteger, nullable=False, default=0, server_default="0")
+	# products with is_available in this category; kept current by product_service writes
+	available_product_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+	__table_args__ = (
+		Index("idx_categories_change_version", "change_version"),
+	)
 
 	# relationships
 	products = relationship("Product", back_populates="category")
@@ -1,6 +1,6 @@
 from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Numeric, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, true
 
 from app.db.session import Base
 
@@ -13,6 +13,10 @@ class Driver(Base):
 	license_plate = Column(String(20), nullable=True)
 	vehicle_type = Column(String(50), nullable=True)
 	is_available = Column(Boolean, default=True, nullable=False)
+	is_active = Column(Boolean, default=True, server_default=true(), nullable=False)
+	rating = Column(Numeric(3, 2), nullable=True)
+	total_trips = Column(Integer, default=0, server_default="0", nullable=False)
+	created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 	# last known location / heartbeat
 	last_latitude = Column(Numeric(10, 8), nullable=True)
 	last_longitude = Column(Numeric(11, 8), nullable=True)
@@ -20,6 +24,8 @@ class Driver(Base):
 
 	__table_args__ = (
 		Index("idx_drivers_user_id", "user_id"),
+		# nearby-driver search: flag equality, then a latitude range with longitude checked in-index
+		Index("idx_drivers_available_lat_lng", "is_available", "is_active", "last_latitude", "last_longitude"),
 	)
 
 	# relationships
@@ -0,0 +1,150 @@
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from sqlalchemy import Column, Date, Float, ForeignKey, Integer, Numeric, event, insert, inspect, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from app.db.session import Base
+from app.models.order import Order, OrderStatus
+
+# Day bucket holding a driver's all-time totals next to the per-day rows, so the
+# metrics read is one range of at most ~31 rows (see DriverService.calculate_metrics)
+LIFETIME_DAY = date(1970, 1, 1)
+
+STAT_COLUMNS = ("orders", "accepted", "completed", "earnings", "delivery_seconds_sum", "delivery_count")
+
+
+class DriverDailyStat(Base):
+	"""Per-driver, per-UTC-day order counters, bucketed by order created_at.
+
+	Maintained in the writing transaction by the Order flush listeners below;
+	rebuild with `python -m app.db.backfill_driver_stats` after bulk SQL
+	writes that bypass the ORM.
+	"""
+	__tablename__ = "driver_daily_stats"
+
+	driver_id = Column(Integer, ForeignKey("drivers.id", ondelete="CASCADE"), primary_key=True)
+	day = Column(Date, primary_key=True)
+	orders = Column(Integer, nullable=False, default=0, server_default="0")
+	accepted = Column(Integer, nullable=False, default=0, server_default="0")  # not cancelled
+	completed = Column(Integer, nullable=False, default=0, server_default="0")  # delivered
+	earnings = Column(Numeric(14, 2), nullable=False, default=0, server_default="0")  # delivered total_amount
+	delivery_seconds_sum = Column(Float, nullable=False, default=0, server_default="0")
+	delivery_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+def _utc_naive(value: datetime | None) -> datetime | None:
+	if value is not None and value.tzinfo is not None:
+		return value.astimezone(timezone.utc).replace(tzinfo=None)
+	return value
+
+
+def order_contribution(driver_id, status, total_amount, created_at, delivered_at) -> dict | None:
+	"""What one order adds to its driver's counters, or None if it counts nowhere."""
+	if driver_id is None or created_at is None:
+		return None
+	delivered = status == OrderStatus.DELIVERED
+	created_at, delivered_at = _utc_naive(created_at), _utc_naive(delivered_at)
+	timed = delivered and delivered_at is not None
+	return {
+		"driver_id": driver_id,
+		"day": created_at.date(),
+		"orders": 1,
+		"accepted": int(status != OrderStatus.CANCELLED),
+		"completed": int(delivered),
+		"earnings": Decimal(str(total_amount or 0)) if delivered else Decimal(0),
+		"delivery_seconds_sum": (delivered_at - created_at).total_seconds() if timed else 0.0,
+		"delivery_count": int(timed),
+	}
+
+
+def upsert_stats_stmt(dialect: str, rows: list[dict]):
+	"""INSERT rows, adding their counters to existing (driver_id, day) rows.
+
+	None for dialects without a native upsert; see _add_stats_portable.
+	"""
+	table = DriverDailyStat.__table__
+	if dialect == "mysql":
+		stmt = mysql.insert(table).values(rows)
+		return stmt.on_duplicate_key_update({c: table.c[c] + stmt.inserted[c] for c in STAT_COLUMNS})
+	if dialect in ("sqlite", "postgresql"):
+		stmt = (sqlite.insert if dialect == "sqlite" else postgresql.insert)(table).values(rows)
+		return stmt.on_conflict_do_update(
+			index_elements=["driver_id", "day"], set_={c: table.c[c] + stmt.excluded[c] for c in STAT_COLUMNS}
+		)
+	return None
+
+
+def _add_stats_portable(connection, rows: list[dict]) -> None:
+	"""Per row: relative UPDATE, then INSERT when no (driver_id, day) row exists yet."""
+	table = DriverDailyStat.__table__
+	for row in rows:
+		key = (table.c.driver_id == row["driver_id"]) & (table.c.day == row["day"])
+		result = connection.execute(update(table).where(key).values({c: table.c[c] + row[c] for c in STAT_COLUMNS}))
+		if result.rowcount == 0:
+			connection.execute(insert(table).values(row))
+
+
+def _apply(connection, deltas: list[tuple[dict, int]]) -> None:
+	"""Add sign * contribution to the day and lifetime rows, netting out no-ops."""
+	merged: dict[tuple, dict] = defaultdict(lambda: dict.fromkeys(STAT_COLUMNS, 0))
+	for contribution, sign in deltas:
+		for day in (contribution["day"], LIFETIME_DAY):
+			row = merged[(contribution["driver_id"], day)]
+			for c in STAT_COLUMNS:
+				row[c] += sign * contribution[c]
+	rows = [{"driver_id": d, "day": day, **counters} for (d, day), counters in merged.items() if any(counters.values())]
+	if not rows:
+		return
+	stmt = upsert_stats_stmt(connection.dialect.name, rows)
+	if stmt is None:
+		_add_stats_portable(connection, rows)
+	else:
+		connection.execute(stmt)
+
+
+_TRACKED = ("driver_id", "status", "total_amount", "created_at", "delivered_at")
+
+
+def _current(order: Order) -> dict | None:
+	return order_contribution(*(getattr(order, name) for name in _TRACKED))
+
+
+def _previous(order: Order) -> dict | None:
+	attrs = inspect(order).attrs
+	values = []
+	for name in _TRACKED:
+		history = attrs[name].history
+		values.append(history.deleted[0] if history.deleted else getattr(order, name))
+	return order_contribution(*values)
+
+
+@event.listens_for(Order, "before_insert")
+def _stamp_created_at(mapper, connection, order: Order) -> None:
+	# the day bucket is needed before the server default could be read back
+	if order.created_at is None:
+		order.created_at = datetime.utcnow()
+
+
+@event.listens_for(Order, "after_insert")
+def _order_inserted(mapper, connection, order: Order) -> None:
+	contribution = _current(order)
+	if contribution:
+		_apply(connection, [(contribution, 1)])
+
+
+@event.listens_for(Order, "after_update")
+def _order_updated(mapper, connection, order: Order) -> None:
+	attrs = inspect(order).attrs
+	if not any(attrs[name].history.has_changes() for name in _TRACKED):
+		return
+	deltas = [(c, sign) for c, sign in ((_previous(order), -1), (_current(order), 1)) if c]
+	_apply(connection, deltas)
+
+
+@event.listens_for(Order, "before_delete")
+def _order_deleted(mapper, connection, order: Order) -> None:
+	contribution = _previous(order)
+	if contribution:
+		_apply(connection, [(contribution, -1)])
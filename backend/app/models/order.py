@@ -1,7 +1,7 @@
 from enum import Enum
 from sqlalchemy import Column, Integer, Text, DateTime, Numeric, ForeignKey, Enum as SAEnum, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import column_property, relationship, validates
 
 from app.db.session import Base
 
@@ -14,23 +14,51 @@ class OrderStatus(str, Enum):
 	DELIVERED = "DELIVERED"
 	CANCELLED = "CANCELLED"
 
+	@classmethod
+	def _missing_(cls, value):
+		# Lookups are case-insensitive ("delivered" -> DELIVERED); the stored
+		# value is always the canonical upper-case name. Unknown names still
+		# raise ValueError.
+		if isinstance(value, str):
+			return cls.__members__.get(value.upper())
+		return None
+
 
 class Order(Base):
 	__tablename__ = "orders"
 
 	id = Column(Integer, primary_key=True, index=True)
 	user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
-	status = Column(SAEnum(OrderStatus, name="order_status"), default=OrderStatus.PENDING, nullable=False)
-	total_amount = Column(Numeric(10, 2), nullable=False)
+	# Columns feeding the driver_daily_stats rollup use active_history, so an update
+	# of an expired instance still knows the value it replaced (see models/driver_daily_stat.py)
+	driver_id = column_property(Column(Integer, ForeignKey("drivers.id", ondelete="SET NULL"), nullable=True), active_history=True)
+	status = column_property(
+		Column(SAEnum(OrderStatus, name="order_status"), default=OrderStatus.PENDING, nullable=False), active_history=True
+	)
+	total_amount = column_property(Column(Numeric(10, 2), nullable=False), active_history=True)
 	delivery_address = Column(Text, nullable=True)
-	created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+	created_at = column_property(Column(DateTime(timezone=True), server_default=func.now(), nullable=False), active_history=True)
+	delivered_at = column_property(Column(DateTime(timezone=True), nullable=True), active_history=True)
 	updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
 	__table_args__ = (
 		Index("idx_orders_user_id", "user_id"),
 		Index("idx_orders_status", "status"),
+		# driver metrics: today's live aggregate and the rollup backfill range over created_at
+		Index("idx_orders_driver_created", "driver_id", "created_at"),
+		# a driver's orders in one status, newest first (active/completed lists)
+		Index("idx_orders_driver_status_created", "driver_id", "status", "created_at"),
+		Index("idx_orders_driver_delivered", "driver_id", "delivered_at"),
 	)
 
+	@validates("status")
+	def _coerce_status(self, key, value):
+		# The driver_daily_stats flush listeners compare status with OrderStatus
+		# members, so a plain string ("delivered") becomes the enum on
+		# assignment; otherwise the rollup would miscount it before SAEnum
+		# rejected it at flush.
+		return OrderStatus(value) if value is not None else value
+
 	# relationships
 	user = relationship("User", back_populates="orders")
 	items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
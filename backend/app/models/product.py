@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Numeric, ForeignKey, Index
+from sqlalchemy import BigInteger, Column, DDL, Integer, String, Text, Boolean, DateTime, Numeric, ForeignKey, Index, event
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -15,12 +16,42 @@ class Product(Base):
 	price = Column(Numeric(10, 2), nullable=False)
 	image_url = Column(String(255), nullable=True)
 	is_available = Column(Boolean, default=True, nullable=False)
-	created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+	# SQLite (dev/tests) stores CURRENT_TIMESTAMP without microseconds; bind cursor values in
+	# the same format so keyset equality on created_at matches
+	created_at = Column(
+		DateTime(timezone=True).with_variant(sqlite.DATETIME(truncate_microseconds=True), "sqlite"),
+		server_default=func.now(),
+		nullable=False,
+	)
+	# catalog_version value of the last write; drives GET /products/changes
+	change_version = Column(BigInteger, nullable=False, default=0, server_default="0")
 
 	__table_args__ = (
 		Index("idx_products_category_id", "category_id"),
+		Index("idx_products_created_id", "created_at", "id"),
+		Index("idx_products_change_version", "change_version"),
+		# full-text search (GET /products/search); SQLite uses the products_fts table below
+		Index("ft_products_name_description", "name", "description", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
 	)
 
 	# relationships
 	category = relationship("Category", back_populates="products")
 	order_items = relationship("OrderItem", back_populates="product")
+
+
+# SQLite (dev/tests): FTS5 external-content index over products, kept in sync by triggers.
+# Production MySQL uses the FULLTEXT index above; see Alembic revision 20261018_0006.
+PRODUCTS_FTS_DDL = (
+	"CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(name, description, content='products', content_rowid='id')",
+	"CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN "
+	"INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+	"CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN "
+	"INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); END",
+	"CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description ON products BEGIN "
+	"INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); "
+	"INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+)
+
+for _stmt in PRODUCTS_FTS_DDL:
+	event.listen(Product.__table__, "after_create", DDL(_stmt).execute_if(dialect="sqlite"))
+event.listen(Product.__table__, "after_drop", DDL("DROP TABLE IF EXISTS products_fts").execute_if(dialect="sqlite"))
@@ -17,3 +17,7 @@ class CategoryRead(CategoryBase):
 
     class Config:
         from_attributes = True
+
+
+class CategoryListItem(CategoryRead):
+    available_product_count: int = 0
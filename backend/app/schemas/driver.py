@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from datetime import datetime
+
 from pydantic import BaseModel, Field, field_validator
 
 
@@ -13,17 +15,34 @@ class DriverLocationUpdate(BaseModel):
 
 
 class DriverProfile(BaseModel):
+    id: int
+    user_id: int
+    vehicle_type: str | None = None
+    license_plate: str | None = None
+    is_active: bool
     is_available: bool
+    rating: float | None = None
+    total_trips: int = 0
     last_latitude: float | None = None
     last_longitude: float | None = None
+    created_at: datetime | None = None
+    last_seen_at: datetime | None = None
 
     class Config:
         from_attributes = True
 
 
 class DriverMetrics(BaseModel):
-    assigned: int
-    delivered: int
-    cancelled: int
+    total_trips: int
+    total_earnings: float
+    average_rating: float
+    acceptance_rate: float
     completion_rate: float
-    cancellation_rate: float
+    average_delivery_time: float  # minutes
+    weekly_orders: int
+    weekly_earnings: float
+    monthly_orders: int
+    monthly_earnings: float
+    daily_orders: int
+    daily_earnings: float
+    online_hours_this_month: float
@@ -2,6 +2,8 @@ from datetime import datetime
 from decimal import Decimal
 from pydantic import BaseModel
 
+from app.schemas.category import CategoryRead
+
 
 class ProductBase(BaseModel):
     category_id: int | None = None
@@ -37,3 +39,32 @@ class ProductRead(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class ProductDetail(ProductRead):
+    category: CategoryRead | None = None
+
+
+class ProductBulkError(BaseModel):
+    row: int  # 0-based position in the submitted list / data rows of the stream
+    detail: str
+
+
+class ProductBulkResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: list[ProductBulkError] = []
+
+
+class CatalogDeletions(BaseModel):
+    products: list[int] = []
+    categories: list[int] = []
+
+
+class CatalogChanges(BaseModel):
+    """Delta since a client's last sync; pass version back as ?since= next time."""
+    version: int
+    has_more: bool
+    products: list[ProductRead] = []
+    categories: list[CategoryRead] = []
+    deleted: CatalogDeletions = CatalogDeletions()
@@ -0,0 +1,33 @@
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.catalog_change import CatalogTombstone, CatalogVersion
+
+# Versions are handed out per write transaction from the single catalog_version
+# row. The UPDATE takes a row lock held until commit, so catalog writers commit
+# in version order; writes are rare next to reads, so the serialization is cheap.
+
+_bump = update(CatalogVersion.__table__).where(CatalogVersion.id == 1).values(value=CatalogVersion.value + 1)
+_current = select(CatalogVersion.value).where(CatalogVersion.id == 1)
+
+
+def next_change_version(db: Session) -> int:
+    if db.execute(_bump).rowcount == 0:
+        # fresh database without the seeded row (tests, DEV_AUTO_CREATE)
+        db.add(CatalogVersion(id=1, value=1))
+        db.flush()
+        return 1
+    return db.scalar(_current)
+
+
+async def next_change_version_async(db: AsyncSession) -> int:
+    if (await db.execute(_bump)).rowcount == 0:
+        db.add(CatalogVersion(id=1, value=1))
+        await db.flush()
+        return 1
+    return await db.scalar(_current)
+
+
+def tombstone(entity: str, entity_id: int, version: int) -> CatalogTombstone:
+    return CatalogTombstone(entity=entity, entity_id=entity_id, change_version=version)
@@ -1,7 +1,12 @@
+from collections.abc import Mapping
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.models.category import Category
 from app.schemas.category import CategoryCreate
+from app.services.catalog_service import next_change_version
 from fastapi import HTTPException, status
 
 
@@ -9,13 +14,42 @@ def list_categories(db: Session) -> list[Category]:
     return db.query(Category).order_by(Category.name.asc()).all()
 
 
+def get_category(db: Session, category_id: int) -> Category | None:
+    return db.get(Category, category_id)
+
+
+def _count_updates(deltas: Mapping[int | None, int]):
+    # relative UPDATEs, so concurrent product writes never lose an increment
+    for category_id, delta in deltas.items():
+        if category_id is not None and delta:
+            yield (
+                update(Category.__table__)
+                .where(Category.id == category_id)
+                .values(available_product_count=Category.available_product_count + delta)
+            )
+
+
+def adjust_available_counts(db: Session, deltas: Mapping[int | None, int]) -> None:
+    """Apply {category_id: +/-n} to the materialized available-product counts.
+
+    Runs inside the caller's transaction; None keys (uncategorized) are ignored.
+    """
+    for stmt in _count_updates(deltas):
+        db.execute(stmt)
+
+
+async def adjust_available_counts_async(db: AsyncSession, deltas: Mapping[int | None, int]) -> None:
+    for stmt in _count_updates(deltas):
+        await db.execute(stmt)
+
+
 def create_category(db: Session, payload: CategoryCreate) -> Category:
     # Enforce uniqueness at application level to provide a friendly error before DB constraint
     existing = db.query(Category).filter(Category.name == payload.name).first()
     if existing:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Category name already exists")
 
-    obj = Category(name=payload.name, icon_url=payload.icon_url)
+    obj = Category(name=payload.name, icon_url=payload.icon_url, change_version=next_change_version(db))
     db.add(obj)
     db.commit()
     db.refresh(obj)
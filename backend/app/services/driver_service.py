@@ -1,28 +1,281 @@
-from datetime import datetime, timedelta
-from typing import Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import func, case
+import math
+import threading
+from datetime import datetime, time, timedelta, timezone
+from typing import Any, Mapping, NamedTuple, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Date, and_, case, delete, func, insert, literal, literal_column, or_, select
 
+from ..core.cache import get_redis
+from ..core.config import settings
+from ..core.geo import EARTH_RADIUS_KM, bounding_box
+from ..core.geo_index import DriverGeoIndex, DriverGeoSync, Position
+from ..db.session import SessionLocal
 from ..models.driver import Driver
-from ..models.order import Order
+from ..models.driver_daily_stat import LIFETIME_DAY, STAT_COLUMNS, DriverDailyStat
+from ..models.order import Order, OrderStatus
 from ..schemas.driver import DriverMetrics
 
 
+def haversine_km_sql(lat: float, lng: float, lat_col, lng_col):
+    """Great-circle distance in SQL (MySQL, SQLite >= 3.35 math functions, PostgreSQL)."""
+    half_dlat = func.radians(lat_col - lat) / 2
+    half_dlng = func.radians(lng_col - lng) / 2
+    a = func.pow(func.sin(half_dlat), 2) + math.cos(math.radians(lat)) * func.cos(func.radians(lat_col)) * func.pow(func.sin(half_dlng), 2)
+    return 2 * EARTH_RADIUS_KM * func.asin(func.sqrt(a))
+
+
+def bounding_box_clauses(lat: float, lng: float, radius_km: float) -> list:
+    """Range predicates on idx_drivers_available_lat_lng; superset of the radius."""
+    lat_min, lat_max, lng_ranges = bounding_box(lat, lng, radius_km)
+    clauses = [Driver.last_latitude.between(lat_min, lat_max)]
+    if lng_ranges != [(-180.0, 180.0)]:
+        clauses.append(or_(*(Driver.last_longitude.between(lo, hi) for lo, hi in lng_ranges)))
+    return clauses
+
+
+class NearbyDriver(NamedTuple):
+    id: int
+    latitude: float
+    longitude: float
+    distance_km: float
+
+
+def _epoch(dt: datetime) -> float:
+    # last_seen_at is written as naive UTC (and SQLite drops tzinfo on read)
+    return (dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def live_positions_stmt(seen_since: datetime):
+    """Available, active drivers with a location reported since seen_since."""
+    return select(Driver.id, Driver.last_latitude, Driver.last_longitude, Driver.last_seen_at).where(
+        Driver.is_available == True,
+        Driver.is_active == True,
+        Driver.last_latitude.isnot(None),
+        Driver.last_longitude.isnot(None),
+        Driver.last_seen_at >= seen_since,
+    )
+
+
+def load_live_positions() -> list[Position]:
+    """Geo index bootstrap: every live driver position, read from the primary."""
+    seen_since = datetime.utcnow() - timedelta(seconds=settings.DRIVER_GEO_MAX_AGE_SECONDS)
+    with SessionLocal() as db:
+        return [
+            (driver_id, float(lat), float(lng), _epoch(seen))
+            for driver_id, lat, lng, seen in db.execute(live_positions_stmt(seen_since))
+        ]
+
+
+_geo_sync: DriverGeoSync | None = None
+_geo_sync_lock = threading.Lock()
+
+
+def driver_geo_sync() -> DriverGeoSync | None:
+    """Process-wide geo index sync, started on first use; None when DRIVER_GEO_INDEX disables it."""
+    global _geo_sync
+    mode = settings.DRIVER_GEO_INDEX
+    if mode == "off" or (mode == "redis" and not settings.REDIS_URL):
+        return None
+    if _geo_sync is None:
+        with _geo_sync_lock:
+            if _geo_sync is None:
+                index = DriverGeoIndex(settings.DRIVER_GEO_CELL_DEGREES, settings.DRIVER_GEO_MAX_AGE_SECONDS)
+                sync = DriverGeoSync(index, load_live_positions, get_redis if mode == "redis" else None)
+                sync.start()
+                _geo_sync = sync
+    return _geo_sync
+
+
+def driver_geo_health() -> dict[str, Any] | None:
+    return _geo_sync.index.status() if _geo_sync is not None else None
+
+
+def seconds_between(dialect: str, start, end):
+    if dialect == "mysql":
+        return func.timestampdiff(literal_column("SECOND"), start, end)
+    if dialect == "sqlite":
+        return (func.julianday(end) - func.julianday(start)) * 86400
+    return func.extract("epoch", end - start)
+
+
+class _Periods:
+    """Metric period bounds for the UTC day containing now."""
+
+    def __init__(self, now: datetime):
+        self.day_start = datetime.combine(now.date(), time.min)
+        self.day_end = self.day_start + timedelta(days=1)
+        self.week_start = self.day_start - timedelta(days=self.day_start.weekday())
+        self.month_start = self.day_start.replace(day=1)
+        self.window_start = self.day_start - timedelta(days=30)  # acceptance rate window
+
+
+def metrics_stmt(driver_id: int, now: datetime, dialect: str, since: datetime | None = None):
+    """Every order-derived metric for one driver as a single aggregate row.
+
+    Periods are half-open created_at ranges compared against plain datetime
+    bounds (never func.date(created_at)), so the WHERE clause is the driver_id
+    equality (plus created_at >= since, if given) and each metric is a CASE
+    over the same index range.
+    """
+    p = _Periods(now)
+    delivered = Order.status == OrderStatus.DELIVERED
+    accepted = Order.status != OrderStatus.CANCELLED
+    created = Order.created_at
+
+    def count_if(*conditions):
+        return func.count(case((and_(*conditions), 1)))
+
+    def earnings_if(*conditions):
+        return func.sum(case((and_(delivered, *conditions), Order.total_amount)))
+
+    stmt = select(
+        earnings_if().label("total_earnings"),
+        count_if(created >= p.week_start).label("weekly_orders"),
+        earnings_if(created >= p.week_start).label("weekly_earnings"),
+        count_if(created >= p.month_start).label("monthly_orders"),
+        earnings_if(created >= p.month_start).label("monthly_earnings"),
+        count_if(created >= p.day_start, created < p.day_end).label("daily_orders"),
+        earnings_if(created >= p.day_start, created < p.day_end).label("daily_earnings"),
+        count_if(created >= p.window_start).label("offers_30d"),
+        count_if(created >= p.window_start, accepted).label("accepted_30d"),
+        count_if(accepted).label("accepted"),
+        count_if(delivered).label("completed"),
+        func.avg(
+            case((and_(delivered, Order.delivered_at.isnot(None)), seconds_between(dialect, created, Order.delivered_at)))
+        ).label("avg_delivery_seconds"),
+    ).where(Order.driver_id == driver_id)
+    if since is not None:
+        stmt = stmt.where(created >= since)
+    return stmt
+
+
+def daily_stats_rows_stmt(driver_id: int, now: datetime):
+    """The lifetime row plus one row per day in the 30 days before today (<= 31 rows)."""
+    p = _Periods(now)
+    return select(DriverDailyStat).where(
+        DriverDailyStat.driver_id == driver_id,
+        or_(
+            DriverDailyStat.day == LIFETIME_DAY,
+            and_(DriverDailyStat.day >= p.window_start.date(), DriverDailyStat.day < p.day_start.date()),
+        ),
+    )
+
+
+def daily_stats_backfill_stmts(dialect: str, driver_id: int | None = None) -> list:
+    """Statements rebuilding driver_daily_stats (all drivers, or one) from orders.
+
+    Run them in one transaction; see app.db.backfill_driver_stats.
+    """
+    delivered = Order.status == OrderStatus.DELIVERED
+    timed = and_(delivered, Order.delivered_at.isnot(None))
+    counters = (
+        func.count(),
+        func.count(case((Order.status != OrderStatus.CANCELLED, 1))),
+        func.count(case((delivered, 1))),
+        func.coalesce(func.sum(case((delivered, Order.total_amount))), 0),
+        func.coalesce(func.sum(case((timed, seconds_between(dialect, Order.created_at, Order.delivered_at)))), 0),
+        func.count(case((timed, 1))),
+    )
+    scope = Order.driver_id == driver_id if driver_id is not None else Order.driver_id.isnot(None)
+    day = func.date(Order.created_at)
+    per_day = select(Order.driver_id, day, *counters).where(scope).group_by(Order.driver_id, day)
+    lifetime = select(Order.driver_id, literal(LIFETIME_DAY, Date), *counters).where(scope).group_by(Order.driver_id)
+
+    table = DriverDailyStat.__table__
+    columns = ["driver_id", "day", *STAT_COLUMNS]
+    clear = delete(table)
+    if driver_id is not None:
+        clear = clear.where(table.c.driver_id == driver_id)
+    return [clear, insert(table).from_select(columns, per_day), insert(table).from_select(columns, lifetime)]
+
+
+def _build_metrics(driver: Driver, m: Mapping[str, Any]) -> DriverMetrics:
+    acceptance_rate = (m["accepted_30d"] / m["offers_30d"] * 100) if m["offers_30d"] else 0.0
+    completion_rate = (m["completed"] / m["accepted"] * 100) if m["accepted"] else 0.0
+    average_delivery_time = float(m["avg_delivery_seconds"] or 0.0) / 60
+
+    # Online hours calculation (approximate based on last_seen_at updates)
+    # This is a simplified calculation - in production, you'd want to track
+    # actual online/offline events. Estimate 30 minutes online per order
+    # offered in the last 30 days (this is a rough estimate)
+    estimated_online_hours = m["offers_30d"] * 0.5
+
+    return DriverMetrics(
+        total_trips=driver.total_trips or 0,
+        total_earnings=float(m["total_earnings"] or 0),
+        average_rating=float(driver.rating or 0.0),
+        acceptance_rate=round(acceptance_rate, 2),
+        completion_rate=round(completion_rate, 2),
+        average_delivery_time=round(average_delivery_time, 2),
+        weekly_orders=m["weekly_orders"],
+        weekly_earnings=float(m["weekly_earnings"] or 0),
+        monthly_orders=m["monthly_orders"],
+        monthly_earnings=float(m["monthly_earnings"] or 0),
+        daily_orders=m["daily_orders"],
+        daily_earnings=float(m["daily_earnings"] or 0),
+        online_hours_this_month=round(estimated_online_hours, 2)
+    )
+
+
+def _combine_rollup(rows: list[DriverDailyStat], today: Mapping[str, Any], now: datetime) -> dict[str, Any]:
+    """Metrics from the rollup rows of past days plus today's live aggregate row."""
+    p = _Periods(now)
+    lifetime = next(r for r in rows if r.day == LIFETIME_DAY)
+    days = [r for r in rows if r.day != LIFETIME_DAY]
+
+    def since(start: datetime, column: str):
+        return sum((getattr(r, column) for r in days if r.day >= start.date()), 0)
+
+    today_earnings = today["daily_earnings"] or 0
+    return {
+        "total_earnings": lifetime.earnings,
+        "weekly_orders": since(p.week_start, "orders") + today["daily_orders"],
+        "weekly_earnings": since(p.week_start, "earnings") + today_earnings,
+        "monthly_orders": since(p.month_start, "orders") + today["daily_orders"],
+        "monthly_earnings": since(p.month_start, "earnings") + today_earnings,
+        "daily_orders": today["daily_orders"],
+        "daily_earnings": today_earnings,
+        "offers_30d": since(p.window_start, "orders") + today["offers_30d"],
+        "accepted_30d": since(p.window_start, "accepted") + today["accepted_30d"],
+        "accepted": lifetime.accepted,
+        "completed": lifetime.completed,
+        "avg_delivery_seconds": lifetime.delivery_seconds_sum / lifetime.delivery_count if lifetime.delivery_count else None,
+    }
+
+
 class DriverService:
-    def __init__(self, db: Session):
+    """Driver operations on an AsyncSession; every query is awaited so the
+    event loop keeps serving other requests during DB round trips."""
+
+    def __init__(self, db: AsyncSession, geo: DriverGeoSync | None = None):
         self.db = db
+        self.geo = geo if geo is not None else driver_geo_sync()
+
+    async def get_driver(self, driver_id: int) -> Optional[Driver]:
+        return await self.db.get(Driver, driver_id)
+
+    async def get_by_user_id(self, user_id: int) -> Optional[Driver]:
+        # a re-registered driver gets a new profile; the newest one is current
+        return await self.db.scalar(
+            select(Driver).where(Driver.user_id == user_id).order_by(Driver.id.desc()).limit(1)
+        )
+
+    async def _require_driver(self, driver_id: int) -> Driver:
+        driver = await self.get_driver(driver_id)
+        if not driver:
+            raise ValueError("Driver not found")
+        return driver
     
     async def update_availability(self, driver_id: int, is_available: bool) -> Driver:
         """Update driver availability status"""
-        driver = self.db.query(Driver).filter(Driver.id == driver_id).first()
-        if not driver:
-            raise ValueError("Driver not found")
+        driver = await self._require_driver(driver_id)
         
         driver.is_available = is_available
         driver.last_seen_at = datetime.utcnow()
         
-        self.db.commit()
-        self.db.refresh(driver)
+        await self.db.commit()
+        await self.db.refresh(driver)
+        self._publish_position(driver)
         
         return driver
     
@@ -33,177 +286,79 @@ class DriverService:
         longitude: float
     ) -> Driver:
         """Update driver's current location"""
-        driver = self.db.query(Driver).filter(Driver.id == driver_id).first()
-        if not driver:
-            raise ValueError("Driver not found")
+        driver = await self._require_driver(driver_id)
         
         driver.last_latitude = latitude
         driver.last_longitude = longitude
         driver.last_seen_at = datetime.utcnow()
         
-        self.db.commit()
-        self.db.refresh(driver)
+        await self.db.commit()
+        await self.db.refresh(driver)
+        self._publish_position(driver)
         
         return driver
+
+    def _publish_position(self, driver: Driver) -> None:
+        """Mirror a committed driver row into the geo index (all workers)."""
+        if self.geo is None:
+            return
+        seen = _epoch(driver.last_seen_at)
+        if driver.is_available and driver.is_active and driver.last_latitude is not None and driver.last_longitude is not None:
+            self.geo.publish_position(driver.id, float(driver.last_latitude), float(driver.last_longitude), seen)
+        else:
+            self.geo.publish_removal(driver.id, seen)
     
     async def calculate_metrics(self, driver_id: int) -> DriverMetrics:
-        """Calculate comprehensive driver performance metrics"""
-        driver = self.db.query(Driver).filter(Driver.id == driver_id).first()
-        if not driver:
-            raise ValueError("Driver not found")
-        
-        # Base metrics from driver model
-        total_trips = driver.total_trips or 0
-        average_rating = float(driver.rating or 0.0)
-        
-        # Calculate date ranges
-        today = datetime.utcnow().date()
-        week_start = today - timedelta(days=today.weekday())
-        month_start = today.replace(day=1)
-        
-        # Query orders for additional metrics
-        orders_query = self.db.query(Order).filter(Order.driver_id == driver_id)
-        
-        # Total earnings calculation
-        total_earnings = self.db.query(
-            func.sum(Order.total_amount)
-        ).filter(
-            Order.driver_id == driver_id,
-            Order.status.in_(['delivered', 'completed'])
-        ).scalar() or 0.0
-        
-        # Weekly metrics
-        weekly_orders = orders_query.filter(
-            func.date(Order.created_at) >= week_start
-        ).count()
-        
-        weekly_earnings = self.db.query(
-            func.sum(Order.total_amount)
-        ).filter(
-            Order.driver_id == driver_id,
-            Order.status.in_(['delivered', 'completed']),
-            func.date(Order.created_at) >= week_start
-        ).scalar() or 0.0
-        
-        # Monthly metrics
-        monthly_orders = orders_query.filter(
-            func.date(Order.created_at) >= month_start
-        ).count()
-        
-        monthly_earnings = self.db.query(
-            func.sum(Order.total_amount)
-        ).filter(
-            Order.driver_id == driver_id,
-            Order.status.in_(['delivered', 'completed']),
-            func.date(Order.created_at) >= month_start
-        ).scalar() or 0.0
-        
-        # Daily metrics (today)
-        daily_orders = orders_query.filter(
-            func.date(Order.created_at) == today
-        ).count()
-        
-        daily_earnings = self.db.query(
-            func.sum(Order.total_amount)
-        ).filter(
-            Order.driver_id == driver_id,
-            Order.status.in_(['delivered', 'completed']),
-            func.date(Order.created_at) == today
-        ).scalar() or 0.0
-        
-        # Acceptance rate (last 30 days)
-        thirty_days_ago = today - timedelta(days=30)
-        total_offers = orders_query.filter(
-            func.date(Order.created_at) >= thirty_days_ago
-        ).count()
-        
-        accepted_offers = orders_query.filter(
-            func.date(Order.created_at) >= thirty_days_ago,
-            Order.status != 'cancelled'
-        ).count()
-        
-        acceptance_rate = (accepted_offers / total_offers * 100) if total_offers > 0 else 0.0
-        
-        # Completion rate
-        total_accepted = orders_query.filter(
-            Order.status != 'cancelled'
-        ).count()
-        
-        completed_orders = orders_query.filter(
-            Order.status.in_(['delivered', 'completed'])
-        ).count()
-        
-        completion_rate = (completed_orders / total_accepted * 100) if total_accepted > 0 else 0.0
-        
-        # Calculate average delivery time (in minutes)
-        avg_delivery_time_result = self.db.query(
-            func.avg(
-                func.extract('epoch', Order.delivered_at - Order.created_at) / 60
-            )
-        ).filter(
-            Order.driver_id == driver_id,
-            Order.status.in_(['delivered', 'completed']),
-            Order.delivered_at.isnot(None)
-        ).scalar()
-        
-        average_delivery_time = float(avg_delivery_time_result or 0.0)
-        
-        # Online hours calculation (approximate based on last_seen_at updates)
-        # This is a simplified calculation - in production, you'd want to track 
-        # actual online/offline events
-        last_30_days_orders = orders_query.filter(
-            func.date(Order.created_at) >= thirty_days_ago
-        ).count()
-        
-        # Estimate 30 minutes online per order (this is a rough estimate)
-        estimated_online_hours = last_30_days_orders * 0.5 if last_30_days_orders > 0 else 0.0
-        
-        return DriverMetrics(
-            total_trips=total_trips,
-            total_earnings=float(total_earnings),
-            average_rating=average_rating,
-            acceptance_rate=round(acceptance_rate, 2),
-            completion_rate=round(completion_rate, 2),
-            average_delivery_time=round(average_delivery_time, 2),
-            weekly_orders=weekly_orders,
-            weekly_earnings=float(weekly_earnings),
-            monthly_orders=monthly_orders,
-            monthly_earnings=float(monthly_earnings),
-            daily_orders=daily_orders,
-            daily_earnings=float(daily_earnings),
-            online_hours_this_month=round(estimated_online_hours, 2)
-        )
+        """Calculate comprehensive driver performance metrics
+
+        Reads the driver_daily_stats rollup (lifetime row + up to 30 past days)
+        and aggregates only today's orders live, so the cost no longer grows
+        with the driver's history. Drivers without a lifetime row (no orders
+        yet, or history not backfilled) fall back to one query over orders.
+        """
+        driver = await self._require_driver(driver_id)
+
+        now = datetime.utcnow()
+        dialect = self.db.get_bind().dialect.name
+        rows = list((await self.db.scalars(daily_stats_rows_stmt(driver_id, now))).all())
+        if not any(r.day == LIFETIME_DAY for r in rows):
+            row = (await self.db.execute(metrics_stmt(driver_id, now, dialect))).one()
+            return _build_metrics(driver, row._mapping)
+
+        today = (await self.db.execute(metrics_stmt(driver_id, now, dialect, since=_Periods(now).day_start))).one()
+        return _build_metrics(driver, _combine_rollup(rows, today._mapping, now))
     
     async def get_nearby_drivers(
         self, 
         latitude: float, 
         longitude: float, 
-        radius_km: float = 10.0
-    ) -> list[Driver]:
-        """Get available drivers within specified radius"""
-        # Using simplified distance calculation
-        # In production, you might want to use PostGIS or more sophisticated geolocation
-        drivers = self.db.query(Driver).filter(
-            Driver.is_available == True,
-            Driver.is_active == True,
-            Driver.last_latitude.isnot(None),
-            Driver.last_longitude.isnot(None)
-        ).all()
-        
-        nearby_drivers = []
-        for driver in drivers:
-            if driver.last_latitude and driver.last_longitude:
-                # Simple distance calculation (not accurate for large distances)
-                lat_diff = abs(driver.last_latitude - latitude)
-                lng_diff = abs(driver.last_longitude - longitude)
-                
-                # Rough approximation: 1 degree ≈ 111 km
-                distance_km = ((lat_diff ** 2 + lng_diff ** 2) ** 0.5) * 111
-                
-                if distance_km <= radius_km:
-                    nearby_drivers.append(driver)
-        
-        return nearby_drivers
+        radius_km: float = 10.0,
+        limit: int = 20
+    ) -> list[NearbyDriver]:
+        """Get available drivers within radius_km, nearest first (at most limit)
+
+        Answered from the in-process geo index when it is loaded, otherwise
+        by SQL; both skip drivers not seen for DRIVER_GEO_MAX_AGE_SECONDS.
+        """
+        if self.geo is not None and self.geo.index.ready:
+            return [
+                NearbyDriver(driver_id, lat, lng, distance)
+                for distance, driver_id, lat, lng in self.geo.index.nearest(latitude, longitude, radius_km, limit)
+            ]
+
+        seen_since = datetime.utcnow() - timedelta(seconds=settings.DRIVER_GEO_MAX_AGE_SECONDS)
+        distance = haversine_km_sql(latitude, longitude, Driver.last_latitude, Driver.last_longitude).label("distance_km")
+        stmt = (
+            select(Driver.id, Driver.last_latitude, Driver.last_longitude, distance)
+            .where(Driver.is_available == True, Driver.is_active == True, *bounding_box_clauses(latitude, longitude, radius_km))
+            .where(Driver.last_seen_at >= seen_since, distance <= radius_km)
+            .order_by(distance)
+            .limit(limit)
+        )
+        return [
+            NearbyDriver(driver_id, float(lat), float(lng), float(dist))
+            for driver_id, lat, lng, dist in await self.db.execute(stmt)
+        ]
     
     async def update_driver_rating(
         self, 
@@ -211,13 +366,11 @@ class DriverService:
         new_rating: float
     ) -> Driver:
         """Update driver rating based on new order rating"""
-        driver = self.db.query(Driver).filter(Driver.id == driver_id).first()
-        if not driver:
-            raise ValueError("Driver not found")
+        driver = await self._require_driver(driver_id)
         
         # Calculate new average rating
         total_trips = driver.total_trips or 0
-        current_rating = driver.rating or 0.0
+        current_rating = float(driver.rating or 0.0)
         
         if total_trips == 0:
             driver.rating = new_rating
@@ -229,7 +382,7 @@ class DriverService:
         
         driver.total_trips = total_trips + 1
         
-        self.db.commit()
-        self.db.refresh(driver)
+        await self.db.commit()
+        await self.db.refresh(driver)
         
         return driver
\ No newline at end of file
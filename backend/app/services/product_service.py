@@ -1,36 +1,76 @@
+import re
+import secrets
+from collections import Counter
+from collections.abc import AsyncIterable, Iterable
+from datetime import datetime
+
+from sqlalchemy import case, column, func, insert, literal, literal_column, or_, select, table, union_all, update
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, selectinload
 from fastapi import HTTPException
 
 from app.models.product import Product
 from app.models.category import Category
+from app.models.catalog_change import CatalogTombstone
 from app.schemas.product import ProductCreate, ProductUpdate
+from app.core.pagination import decode_cursor, decode_datetime, encode_cursor
+from app.services.catalog_service import next_change_version, next_change_version_async, tombstone
+from app.services.category_service import adjust_available_counts, adjust_available_counts_async
 
 
-def list_products(db: Session, skip: int = 0, limit: int = 20, available: bool | None = None, category_id: int | None = None) -> list[Product]:
-    query = db.query(Product).options(selectinload(Product.category))
-    if available is not None:
-        query = query.filter(Product.is_available == available)
-    if category_id is not None:
-        query = query.filter(Product.category_id == category_id)
-    return query.order_by(Product.created_at.desc()).offset(skip).limit(limit).all()
+# Statements are shared by the sync (Session) paths and the AsyncSession bulk stream below.
 
+def product_cursor(product) -> str:
+    """Opaque cursor positioned after product (entity or projected row) in list order (created_at desc, id desc)."""
+    return encode_cursor(product.created_at, product.id)
 
-def get_product(db: Session, product_id: int) -> Product | None:
-    return (
-        db.query(Product)
-        .options(selectinload(Product.category))
-        .filter(Product.id == product_id)
-        .first()
-    )
 
+def decode_product_cursor(token: str) -> tuple[datetime, int]:
+    created_at, product_id = decode_cursor(token, 2)
+    if not isinstance(product_id, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return decode_datetime(created_at), product_id
+
+
+# Exactly the columns ProductRead serializes, in field order
+PRODUCT_READ_COLUMNS = (
+    Product.id,
+    Product.category_id,
+    Product.name,
+    Product.description,
+    Product.price,
+    Product.image_url,
+    Product.is_available,
+    Product.created_at,
+)
 
-def create_product(db: Session, payload: ProductCreate) -> Product:
-    if payload.category_id is not None:
-        category = db.query(Category).filter(Category.id == payload.category_id).first()
-        if category is None:
-            raise HTTPException(status_code=400, detail="Category not found")
 
-    obj = Product(
+def _list_products_stmt(skip: int, limit: int, available: bool | None, category_id: int | None, after: tuple[datetime, int] | None = None, stmt=None):
+    if stmt is None:
+        stmt = select(Product).options(selectinload(Product.category))
+    if available is not None:
+        stmt = stmt.where(Product.is_available == available)
+    if category_id is not None:
+        stmt = stmt.where(Product.category_id == category_id)
+    if after is not None:
+        # seek predicate instead of OFFSET: a range scan on idx_products_created_id
+        # (created_at, id) without reading skipped rows; category/availability
+        # filters are applied to rows in that range (there is no composite index).
+        # The leading created_at <= bound gives both MySQL and SQLite a plain range
+        # scan; the OR only filters ties inside it (a top-level OR does not).
+        created_at, last_id = after
+        stmt = stmt.where(
+            Product.created_at <= created_at,
+            or_(Product.created_at < created_at, Product.id < last_id),
+        )
+    # id breaks created_at ties so pages never overlap or skip rows
+    return stmt.order_by(Product.created_at.desc(), Product.id.desc()).offset(skip).limit(limit)
+
+
+def _new_product(payload: ProductCreate) -> Product:
+    return Product(
         category_id=payload.category_id,
         name=payload.name,
         description=payload.description,
@@ -38,36 +78,306 @@ def create_product(db: Session, payload: ProductCreate) -> Product:
         image_url=payload.image_url,
         is_available=payload.is_available,
     )
+
+
+def _counted_in(product) -> int | None:
+    """Category whose available_product_count includes product (None if not counted)."""
+    return product.category_id if product.is_available else None
+
+
+def _count_move(before: int | None, after: int | None) -> Counter:
+    deltas: Counter = Counter()
+    deltas[before] -= 1
+    deltas[after] += 1
+    return deltas
+
+
+def _bulk_counts(values: list[dict]) -> Counter:
+    return Counter(v["category_id"] for v in values if v["is_available"])
+
+
+def search_cursor(score: float, product: Product) -> str:
+    return encode_cursor(score, product.id)
+
+
+def decode_search_cursor(token: str) -> tuple[float, int]:
+    score, product_id = decode_cursor(token, 2)
+    if not isinstance(score, (int, float)) or not isinstance(product_id, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return float(score), product_id
+
+
+_products_fts = table("products_fts", column("rowid"))
+_SEARCH_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def _search_score(dialect: str, q: str):
+    """(score expression, extra WHERE clauses); higher score ranks first."""
+    if dialect == "mysql":
+        # natural language mode over ft_products_name_description; 0 means no match
+        score = match(Product.name, Product.description, against=q).in_natural_language_mode()
+        return score, [score > 0]
+    if dialect == "sqlite":
+        # FTS5: quote every token so user input can't inject query syntax; OR mirrors
+        # MySQL natural language mode (any term matches, more matches rank higher)
+        fts_query = " OR ".join(f'"{t}"' for t in _SEARCH_TOKEN.findall(q))
+        fts = literal_column("products_fts")
+        return -func.bm25(fts), [fts.op("MATCH")(fts_query)]
+    # no full-text index: case-insensitive LIKE per token, ranked by how many tokens match
+    tokens = list(dict.fromkeys(t.lower() for t in _SEARCH_TOKEN.findall(q)))
+    score = sum(
+        case(
+            (or_(func.lower(Product.name).contains(t, autoescape=True),
+                 func.lower(Product.description).contains(t, autoescape=True)), 1),
+            else_=0,
+        )
+        for t in tokens
+    )
+    return score, [score > 0]
+
+
+def search_products(
+    db: Session,
+    q: str,
+    limit: int = 20,
+    available: bool | None = None,
+    category_id: int | None = None,
+    after: tuple[float, int] | None = None,
+) -> list[tuple[Product, float]]:
+    """Ranked full-text search over name and description, as (product, score) pairs."""
+    if not _SEARCH_TOKEN.search(q):
+        return []
+    dialect = db.get_bind().dialect.name
+    score, conditions = _search_score(dialect, q)
+    stmt = select(Product, score.label("score")).where(*conditions)
+    if dialect == "sqlite":
+        stmt = stmt.join(_products_fts, _products_fts.c.rowid == Product.id)
+    if available is not None:
+        stmt = stmt.where(Product.is_available == available)
+    if category_id is not None:
+        stmt = stmt.where(Product.category_id == category_id)
+    if after is not None:
+        last_score, last_id = after
+        stmt = stmt.where(score <= last_score, or_(score < last_score, Product.id < last_id))
+    stmt = stmt.order_by(score.desc(), Product.id.desc()).limit(limit)
+    return [(product, float(s)) for product, s in db.execute(stmt).all()]
+
+
+# rows per multi-row INSERT in bulk imports; keeps statements well under max_allowed_packet
+BULK_CHUNK_SIZE = 500
+
+# A bulk row is (row number, payload) or (row number, error detail) when parsing/validation failed.
+BulkRow = tuple[int, ProductCreate | str]
+
+_BULK_COLUMNS = {"category_id", "name", "description", "price", "image_url", "is_available"}
+
+
+def _category_ids_stmt(ids: Iterable[int]):
+    return select(Category.id).where(Category.id.in_(list(ids)))
+
+
+def _bulk_values(chunk: list[BulkRow], valid_category_ids: set[int], errors: list[dict], version: int) -> list[dict]:
+    values = []
+    for row, payload in chunk:
+        if isinstance(payload, str):
+            errors.append({"row": row, "detail": payload})
+        elif payload.category_id is not None and payload.category_id not in valid_category_ids:
+            errors.append({"row": row, "detail": "Category not found"})
+        else:
+            values.append({**payload.model_dump(include=_BULK_COLUMNS), "change_version": version})
+    return values
+
+
+def _bulk_result(inserted: int, errors: list[dict]) -> dict:
+    return {"inserted": inserted, "failed": len(errors), "errors": errors}
+
+
+def _category_not_found() -> HTTPException:
+    return HTTPException(status_code=400, detail="Category not found")
+
+
+def _product_not_found() -> HTTPException:
+    return HTTPException(status_code=404, detail="Product not found")
+
+
+def list_product_rows(db: Session, skip: int = 0, limit: int = 20, available: bool | None = None, category_id: int | None = None, after: tuple[datetime, int] | None = None) -> list[Row]:
+    """Read-only fast path for listings: one column-projection query, no ORM entities.
+
+    Skips entity construction, identity-map bookkeeping and the category
+    selectin round trip that list_products pays for; rows carry exactly
+    ProductRead's fields (validate them with from_attributes like entities).
+    """
+    stmt = _list_products_stmt(skip, limit, available, category_id, after, stmt=select(*PRODUCT_READ_COLUMNS))
+    return list(db.execute(stmt).all())
+
+
+def list_products(db: Session, skip: int = 0, limit: int = 20, available: bool | None = None, category_id: int | None = None, after: tuple[datetime, int] | None = None) -> list[Product]:
+    return list(db.scalars(_list_products_stmt(skip, limit, available, category_id, after)).all())
+
+
+def get_product(db: Session, product_id: int) -> Product | None:
+    # category is not eager-loaded; callers resolve it via its own (cached) lookup
+    return db.get(Product, product_id)
+
+
+def create_product(db: Session, payload: ProductCreate) -> Product:
+    if payload.category_id is not None:
+        category = db.get(Category, payload.category_id)
+        if category is None:
+            raise _category_not_found()
+
+    obj = _new_product(payload)
+    obj.change_version = next_change_version(db)
     db.add(obj)
+    adjust_available_counts(db, {_counted_in(obj): 1})
     db.commit()
     db.refresh(obj)
     return obj
 
 
 def update_product(db: Session, product_id: int, payload: ProductUpdate) -> Product:
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = db.get(Product, product_id)
     if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
+        raise _product_not_found()
 
     data = payload.model_dump(exclude_unset=True)
 
     if "category_id" in data and data["category_id"] is not None:
-        cat = db.query(Category).filter(Category.id == data["category_id"]).first()
+        cat = db.get(Category, data["category_id"])
         if cat is None:
-            raise HTTPException(status_code=400, detail="Category not found")
+            raise _category_not_found()
 
+    counted_before = _counted_in(product)
     for field, value in data.items():
         setattr(product, field, value)
 
+    adjust_available_counts(db, _count_move(counted_before, _counted_in(product)))
+    product.change_version = next_change_version(db)
     db.commit()
     db.refresh(product)
     return product
 
 
 def delete_product(db: Session, product_id: int) -> None:
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = db.get(Product, product_id)
     if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
+        raise _product_not_found()
     db.delete(product)
+    adjust_available_counts(db, {_counted_in(product): -1})
+    db.add(tombstone("product", product.id, next_change_version(db)))
     db.commit()
     return None
+
+
+def bulk_create_products(db: Session, rows: list[BulkRow]) -> dict:
+    """Insert valid rows in one transaction; invalid rows are reported, not raised.
+
+    Category ids are checked with a single IN query and rows go in as multi-row
+    INSERTs of BULK_CHUNK_SIZE, so cost no longer scales with per-row commits.
+    """
+    category_ids = {p.category_id for _, p in rows if not isinstance(p, str) and p.category_id is not None}
+    valid = set(db.scalars(_category_ids_stmt(category_ids))) if category_ids else set()
+
+    errors: list[dict] = []
+    inserted = 0
+    counts: Counter = Counter()
+    version = next_change_version(db)  # one version for the whole import
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        values = _bulk_values(rows[start:start + BULK_CHUNK_SIZE], valid, errors, version)
+        if values:
+            db.execute(insert(Product.__table__).values(values))
+            inserted += len(values)
+            counts.update(_bulk_counts(values))
+    adjust_available_counts(db, counts)
+    db.commit()
+    return _bulk_result(inserted, errors)
+
+
+def _page_upper_version(db: Session, since: int, limit: int) -> tuple[int | None, bool]:
+    """Highest version to include so a page holds about limit changes.
+
+    Pages end on whole versions (a bulk import shares one version), so a page
+    can exceed limit rather than split a version across pages.
+    """
+    versions = union_all(
+        select(Product.change_version.label("v")).where(Product.change_version > since),
+        select(Category.change_version.label("v")).where(Category.change_version > since),
+        select(CatalogTombstone.change_version.label("v")).where(CatalogTombstone.change_version > since),
+    ).subquery()
+    upper = db.scalar(select(versions.c.v).order_by(versions.c.v).offset(limit - 1).limit(1))
+    if upper is None:
+        return db.scalar(select(func.max(versions.c.v))), False
+    has_more = db.scalar(select(literal(True)).where(versions.c.v > upper).limit(1)) is not None
+    return upper, has_more
+
+
+def changes_since(db: Session, since: int, limit: int = 500) -> dict:
+    """Upserted products/categories and tombstones with since < version <= page bound."""
+    upper, has_more = _page_upper_version(db, since, limit)
+    if upper is None:
+        return {"version": since, "has_more": False, "products": [], "categories": [], "deleted": {"products": [], "categories": []}}
+
+    def in_page(col):
+        return (col > since) & (col <= upper)
+
+    products = db.execute(
+        select(*PRODUCT_READ_COLUMNS).where(in_page(Product.change_version)).order_by(Product.change_version, Product.id)
+    ).all()
+    categories = db.scalars(
+        select(Category).where(in_page(Category.change_version)).order_by(Category.change_version, Category.id)
+    ).all()
+    deleted: dict[str, list[int]] = {"products": [], "categories": []}
+    for entity, entity_id in db.execute(
+        select(CatalogTombstone.entity, CatalogTombstone.entity_id)
+        .where(in_page(CatalogTombstone.change_version))
+        .order_by(CatalogTombstone.change_version, CatalogTombstone.id)
+    ):
+        deleted[f"{entity}s"].append(entity_id)
+    return {"version": upper, "has_more": has_more, "products": products, "categories": categories, "deleted": deleted}
+
+
+async def bulk_create_products_stream(db: AsyncSession, rows: AsyncIterable[BulkRow]) -> dict:
+    """Streaming counterpart of bulk_create_products for NDJSON/CSV uploads.
+
+    Rows are consumed as they arrive and flushed every BULK_CHUNK_SIZE rows;
+    category ids not seen before are checked once per chunk. Everything is
+    committed together at the end, so an aborted upload inserts nothing.
+    """
+    valid: set[int] = set()
+    checked: set[int] = set()
+    errors: list[dict] = []
+    inserted = 0
+    counts: Counter = Counter()
+    # Rows are stamped with a private negative marker and given the real change
+    # version just before commit, so the catalog_version row lock isn't held for
+    # the length of the upload (negative versions are never served by /changes);
+    # category counts are applied at the same point for the same reason.
+    marker = -(secrets.randbits(62) + 1)
+
+    async def flush(chunk: list[BulkRow]) -> int:
+        unchecked = {p.category_id for _, p in chunk if not isinstance(p, str) and p.category_id is not None} - checked
+        if unchecked:
+            valid.update((await db.scalars(_category_ids_stmt(unchecked))).all())
+            checked.update(unchecked)
+        values = _bulk_values(chunk, valid, errors, marker)
+        if values:
+            await db.execute(insert(Product.__table__).values(values))
+            counts.update(_bulk_counts(values))
+        return len(values)
+
+    chunk: list[BulkRow] = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            inserted += await flush(chunk)
+            chunk = []
+    if chunk:
+        inserted += await flush(chunk)
+    if inserted:
+        version = await next_change_version_async(db)
+        await db.execute(
+            update(Product.__table__).where(Product.change_version == marker).values(change_version=version)
+        )
+        await adjust_available_counts_async(db, counts)
+    await db.commit()
+    return _bulk_result(inserted, errors)
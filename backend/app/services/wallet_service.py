@@ -7,8 +7,13 @@ from fastapi import HTTPException, status
 from app.models.wallet import Wallet, WalletTransaction
 
 
+def get_wallet(db: Session, user_id: int) -> Wallet | None:
+    """Read-only lookup, safe on replica-routed sessions (see get_read_db)."""
+    return db.query(Wallet).filter(Wallet.user_id == user_id).first()
+
+
 def get_or_create_wallet(db: Session, user_id: int) -> Wallet:
-    wallet = db.query(Wallet).filter(Wallet.user_id == user_id).first()
+    wallet = get_wallet(db, user_id)
     if wallet:
         return wallet
     wallet = Wallet(user_id=user_id, balance=Decimal("0"))
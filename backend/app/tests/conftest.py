@@ -2,17 +2,27 @@ from collections.abc import Generator
 from typing import Any
 
 import os
+import tempfile
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
 # Ensure strong SECRET_KEY for test settings before app import
 os.environ.setdefault("SECRET_KEY", "test-secret-very-long-string-0123456789abcdef0123456789abcd")
 
 from ..main import app
-from ..db.session import Base, get_db
+from ..db.session import (
+    Base,
+    get_async_db,
+    get_async_read_db,
+    get_db,
+    get_read_db,
+    get_read_session_factory,
+    get_session_factory,
+)
 # Ensure models are imported so metadata includes all tables
 from app.models import (
     user as _user,  # noqa: F401
@@ -24,16 +34,22 @@ from app.models import (
     driver as _driver,  # noqa: F401
     payment as _payment,  # noqa: F401
     review as _review,  # noqa: F401
+    driver_daily_stat as _driver_daily_stat,  # noqa: F401
 )
 
 
-# Create a dedicated in-memory SQLite for tests
+# Dedicated file-backed SQLite for tests: an in-memory DB can't be shared between
+# the sync engine and the aiosqlite engine used by AsyncSession routes.
+_db_dir = tempfile.TemporaryDirectory(prefix="diehantar-test-")
+_db_path = os.path.join(_db_dir.name, "test.db")
 engine = create_engine(
-    "sqlite+pysqlite:///:memory:",
+    f"sqlite+pysqlite:///{_db_path}",
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,  # ensure the same in-memory DB persists across sessions
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# NullPool: each test's event loop (TestClient portal) opens its own connection
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{_db_path}", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -44,6 +60,8 @@ def setup_database() -> Generator[None, None, None]:
     Base.metadata.create_all(bind=engine)
     yield
     Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+    _db_dir.cleanup()
 
 
 def override_get_db() -> Generator[Any, None, None]:
@@ -54,8 +72,19 @@ def override_get_db() -> Generator[Any, None, None]:
         db.close()
 
 
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
 # Apply dependency override so all routes use the test DB
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
+app.dependency_overrides[get_session_factory] = lambda: TestingSessionLocal
+# no replicas in tests: read dependencies use the same DB (routing is covered in test_db_replicas)
+app.dependency_overrides[get_read_db] = override_get_db
+app.dependency_overrides[get_async_read_db] = override_get_async_db
+app.dependency_overrides[get_read_session_factory] = lambda: TestingSessionLocal
 
 
 @pytest.fixture()
@@ -0,0 +1,204 @@
+import time
+
+import fakeredis
+
+from app.core import cache
+from app.core.cache import LocalLRUCache
+
+
+def test_lru_evicts_by_entry_count():
+    c = LocalLRUCache(max_entries=2, max_bytes=10_000, sweep_interval=0)
+    c.set("a", "1", 60)
+    c.set("b", "2", 60)
+    assert c.get("a") == "1"  # touch a so b becomes least recently used
+    c.set("c", "3", 60)
+    assert c.get("b") is None
+    assert c.get("a") == "1" and c.get("c") == "3"
+
+
+def test_lru_evicts_by_bytes_and_rejects_oversized():
+    c = LocalLRUCache(max_entries=100, max_bytes=20, sweep_interval=0)
+    c.set("k1", "x" * 9, 60)
+    c.set("k2", "y" * 9, 60)
+    assert c.get("k1") is None  # 20 bytes max, second entry pushed out the first
+    assert c.nbytes <= 20
+    c.set("big", "z" * 100, 60)
+    assert c.get("big") is None
+
+
+def test_lru_ttl_and_sweep():
+    c = LocalLRUCache(max_entries=10, max_bytes=10_000, sweep_interval=0)
+    c.set("short", "v", 0.01)
+    c.set("long", "v", 60)
+    time.sleep(0.02)
+    assert c.sweep() == 1
+    assert len(c) == 1
+    assert c.get("long") == "v"
+
+
+def test_cache_stats_count_l1_hits_and_misses():
+    cache.cache_clear_local()
+    cache.reset_cache_stats()
+    assert cache.cache_get("stats:missing") is None
+    cache.cache_set("stats:present", "v", 30)
+    assert cache.cache_get("stats:present") == "v"
+    stats = cache.cache_stats()
+    assert stats["l1_hits"] == 1
+    assert stats["l1_misses"] == 1
+    assert stats["l1_entries"] >= 1
+
+
+def test_single_flight_coalesces_concurrent_callers():
+    import threading
+
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(2)
+        return {"v": 42}
+
+    results = []
+
+    def worker():
+        results.append(cache.single_flight("sf:test", compute))
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    threads[0].start()
+    started.wait(2)
+    for t in threads[1:]:
+        t.start()
+    time.sleep(0.05)
+    release.set()
+    for t in threads:
+        t.join(2)
+
+    assert len(calls) == 1
+    assert results == [{"v": 42}] * 5
+
+
+def test_cache_get_or_set_json_reads_through():
+    cache.cache_clear_local()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return [1, 2, 3]
+
+    assert cache.cache_get_or_set_json("sf:json", compute, 30) == [1, 2, 3]
+    assert cache.cache_get_or_set_json("sf:json", compute, 30) == [1, 2, 3]
+    assert len(calls) == 1
+
+
+def test_cache_key_changes_when_any_tag_is_invalidated():
+    k1 = cache.cache_key("product:1", "products", "category:7")
+    cache.cache_set(k1, "v", 30)
+    assert cache.cache_get(cache.cache_key("product:1", "products", "category:7")) == "v"
+
+    cache.cache_invalidate("category:7")
+    k2 = cache.cache_key("product:1", "products", "category:7")
+    assert k2 != k1
+    assert cache.cache_get(k2) is None
+
+    cache.cache_invalidate("products")
+    assert cache.cache_key("product:1", "products", "category:7") != k2
+    assert cache.cache_key("product:1") == "product:1"
+
+
+def test_local_generations_do_not_restart_at_zero(monkeypatch):
+    # without Redis a fresh process must not reuse generation 0, or ETags built
+    # from it would repeat for different content across restarts/workers
+    monkeypatch.setattr(cache, "_local_generations", {})
+    first = cache.cache_generation("restart-probe")
+    assert first == cache._LOCAL_GENERATION_BASE
+    monkeypatch.setattr(cache, "_LOCAL_GENERATION_BASE", first + 12345)
+    monkeypatch.setattr(cache, "_local_generations", {})
+    assert cache.cache_generation("restart-probe") != first
+    cache.cache_invalidate("restart-probe")
+    assert cache.cache_generation("restart-probe") == first + 12346
+
+
+def test_redis_generations_are_seeded_randomly(monkeypatch):
+    # a missing Redis key (fresh or flushed Redis) must not read as 0 either
+    r = fakeredis.FakeRedis()
+    monkeypatch.setattr(cache, "get_redis", lambda: r)
+    cache.cache_clear_local()
+    first = cache.cache_generation("seed-probe")
+    assert first > 0 and int(r.get("gen:seed-probe")) == first
+
+    cache.cache_invalidate("seed-probe", "seed-fresh")
+    assert cache.cache_generation("seed-probe") == first + 1
+    assert int(r.get("gen:seed-fresh")) > 1
+
+    r.flushall()
+    cache.cache_clear_local()
+    assert cache.cache_generation("seed-probe") != first + 1
+
+
+def test_swr_serves_stale_and_refreshes_in_background():
+    counter = {"n": 0}
+
+    @cache.swr_cached("swr:test", soft_ttl=0, hard_ttl=30)
+    def load():
+        counter["n"] += 1
+        return counter["n"]
+
+    assert load() == 1  # miss: computed inline
+    time.sleep(0.01)
+    assert load() == 1  # stale: served immediately, refresh scheduled
+    value = 1
+    for _ in range(100):
+        value = load()
+        if value >= 2:
+            break
+        time.sleep(0.01)
+    assert value >= 2
+
+
+def test_redis_breaker_opens_and_short_circuits_when_unreachable():
+    breaker = cache.RedisCircuitBreaker("redis://127.0.0.1:1/0")
+    assert breaker.client() is None
+    assert breaker.status()["state"] == "open"
+
+    start = time.perf_counter()
+    for _ in range(100):
+        assert breaker.client() is None
+    assert time.perf_counter() - start < 0.05  # no connection attempts while open
+
+
+def test_health_reports_redis_state(client):
+    r = client.get("/health")
+    assert r.status_code == 200
+    assert "state" in r.json()["redis"]
+
+
+def test_get_set_delete_many_json():
+    cache.cache_set_many_json({"many:a": {"x": 1}, "many:b": [2]}, 30)
+    got = cache.cache_get_many_json(["many:a", "many:b", "many:missing", "many:a"])
+    assert got == {"many:a": {"x": 1}, "many:b": [2]}
+    cache.cache_delete_many(["many:a"])
+    assert cache.cache_get_many(["many:a", "many:b"]) == {"many:b": "[2]"}
+
+
+def test_codec_frames_roundtrip_and_read_legacy_values():
+    from app.core import cache_codecs as codecs
+
+    value = [{"id": i, "name": "Nasi goreng " * 20, "price": "12.50"} for i in range(20)]
+    for serializer in codecs.available_codecs()["serializers"]:
+        if serializer == "text":
+            continue
+        frame = codecs.encode(value, serializer)
+        for compression in ["none"] + codecs.available_codecs()["compressors"]:
+            stored = codecs.compress_frame(frame, compression, min_bytes=0)
+            if compression != "none":
+                assert len(stored) < len(frame)
+            assert codecs.decompress_frame(stored) == frame
+            assert codecs.decode(stored) == value
+
+    # values written before framing are plain JSON text
+    assert codecs.decode(b'{"a": 1}') == {"a": 1}
+    assert codecs.decode_text(b'[1, 2]') == "[1, 2]"
+    assert codecs.decode_text(codecs.encode_text("body")) == "body"
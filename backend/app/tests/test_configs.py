@@ -11,3 +11,15 @@ def test_splash_and_capabilities(client: TestClient):
     assert r.status_code == 200
     caps = r.json()
     assert "api_version" in caps and "endpoints" in caps
+
+
+def test_config_etag_returns_304_when_unchanged(client: TestClient):
+    r = client.get("/config/brand")
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+    assert r.headers["cache-control"] == "public, max-age=300"
+
+    r = client.get("/config/brand", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert r.headers["etag"] == etag
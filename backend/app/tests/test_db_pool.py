@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy import create_engine, exc as sa_exc, text
+from sqlalchemy.pool import QueuePool
+
+from app.db import session as db_session
+
+
+@pytest.fixture()
+def tiny_engine(tmp_path):
+    poolclass = db_session._instrumented_pool(QueuePool, "test_tiny")
+    engine = create_engine(
+        f"sqlite+pysqlite:///{tmp_path / 'pool.db'}",
+        poolclass=poolclass,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+    yield engine
+    engine.dispose()
+    db_session._pool_telemetry.pop("test_tiny", None)
+
+
+def test_pool_stats_track_checkouts_overflow_and_timeouts(tiny_engine):
+    c1 = tiny_engine.connect()
+    c2 = tiny_engine.connect()  # overflow connection
+    c1.execute(text("SELECT 1"))
+
+    stats = db_session.pool_stats()["test_tiny"]
+    assert stats["checkouts"] == 2
+    assert stats["checked_out"] == 2
+    assert stats["overflow"] == 1
+    assert stats["size"] == 1
+
+    with pytest.raises(sa_exc.TimeoutError):
+        tiny_engine.connect()
+    stats = db_session.pool_stats()["test_tiny"]
+    assert stats["timeouts"] == 1
+    assert stats["wait_seconds_max"] >= 0.05
+
+    c1.close()
+    c2.close()
+    stats = db_session.pool_stats()["test_tiny"]
+    assert stats["checked_out"] == 0
+
+
+def test_pool_telemetry_survives_dispose(tiny_engine):
+    tiny_engine.connect().close()
+    tiny_engine.dispose()  # recreates the pool instance
+    tiny_engine.connect().close()
+    assert db_session.pool_stats()["test_tiny"]["checkouts"] == 2
+
+
+def test_health_reports_db_pool(client):
+    body = client.get("/health").json()
+    assert "db_pool" in body
@@ -0,0 +1,89 @@
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.api.deps import cache_fill_session_factory
+from app.core import cache
+from app.db import session as db_session
+from app.models.category import Category
+
+
+def _seed(engine, name: str) -> None:
+    Category.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(Category.__table__.insert().values(name=name))
+
+
+@pytest.fixture()
+def routed(tmp_path):
+    primary = create_engine(f"sqlite+pysqlite:///{tmp_path / 'primary.db'}")
+    replica_engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'replica.db'}")
+    _seed(primary, "from-primary")
+    _seed(replica_engine, "from-replica")
+    replica = db_session._Replica("sqlite:///replica.db", replica_engine)
+    replicas = db_session.ReplicaSet([replica], check_interval=0)
+    factory = sessionmaker(bind=primary, class_=db_session.RoutingSession, replicas=replicas)
+    yield factory, replicas, replica
+    primary.dispose()
+    replica_engine.dispose()
+
+
+def _names(db) -> list[str]:
+    return list(db.scalars(select(Category.name)).all())
+
+
+def test_reads_go_to_replica(routed):
+    factory, _, _ = routed
+    with factory() as db:
+        assert _names(db) == ["from-replica"]
+
+
+def test_read_your_writes_within_request(routed):
+    factory, _, _ = routed
+    token = db_session.begin_request_scope()
+    try:
+        with factory() as writer:
+            writer.add(Category(name="new"))
+            writer.commit()
+        with factory() as reader:
+            assert sorted(_names(reader)) == ["from-primary", "new"]
+    finally:
+        db_session.end_request_scope(token)
+    # a fresh request reads from the replica again
+    token = db_session.begin_request_scope()
+    try:
+        with factory() as reader:
+            assert _names(reader) == ["from-replica"]
+    finally:
+        db_session.end_request_scope(token)
+
+
+def test_unhealthy_replica_falls_back_to_primary(routed):
+    factory, replicas, replica = routed
+    replicas.mark_down(replica, "boom")
+    with factory() as db:
+        assert _names(db) == ["from-primary"]
+    assert replicas.health()[0]["healthy"] is False
+
+    replicas.check()  # probe succeeds -> back in rotation
+    with factory() as db:
+        assert _names(db) == ["from-replica"]
+
+
+def test_cache_refills_read_primary_right_after_invalidation(routed, tmp_path, monkeypatch):
+    read_factory, _, _ = routed
+    primary = create_engine(f"sqlite+pysqlite:///{tmp_path / 'primary.db'}")
+    primary_factory = sessionmaker(bind=primary)
+    fill = cache_fill_session_factory("replica-lag-probe")(read_factory, primary_factory)
+
+    with fill() as db:
+        assert _names(db) == ["from-replica"]
+    # another request just wrote: a lagging replica must not refill the cache
+    cache.cache_invalidate("replica-lag-probe")
+    with fill() as db:
+        assert _names(db) == ["from-primary"]
+
+    monkeypatch.setattr(cache, "_local_invalidated_at", {"replica-lag-probe": 0.0})
+    with fill() as db:
+        assert _names(db) == ["from-replica"]
+    primary.dispose()
@@ -0,0 +1,140 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import fakeredis
+from sqlalchemy.orm import Session
+
+from app.core.geo import KM_PER_DEGREE_LAT, haversine_km
+from app.core.geo_index import DriverGeoIndex, DriverGeoSync
+from app.models.driver import Driver
+from app.services.driver_service import DriverService
+from app.tests.conftest import TestingAsyncSessionLocal
+
+STEP = 1 / KM_PER_DEGREE_LAT  # one km of latitude
+
+
+def _wait(predicate, timeout: float = 3.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_nearest_orders_by_distance_and_respects_radius_and_limit():
+    index = DriverGeoIndex(cell_degrees=0.01)
+    now = time.time()
+    index.upsert(1, 10.0 + 12 * STEP, 20.0, now)
+    index.upsert(2, 10.0, 20.0 + 5 * STEP / 0.985, now)
+    index.upsert(3, 10.0 + STEP, 20.0, now)
+
+    assert [i for _, i, _, _ in index.nearest(10.0, 20.0, 10, 20, now)] == [3, 2]
+    assert [i for _, i, _, _ in index.nearest(10.0, 20.0, 15, 20, now)] == [3, 2, 1]
+    assert [i for _, i, _, _ in index.nearest(10.0, 20.0, 15, 1, now)] == [3]
+    distance, _, lat, lng = index.nearest(10.0, 20.0, 15, 1, now)[0]
+    assert distance == haversine_km(10.0, 20.0, lat, lng)
+
+
+def test_nearest_across_antimeridian_and_moves_between_cells():
+    index = DriverGeoIndex(cell_degrees=0.01)
+    now = time.time()
+    index.upsert(1, -20.0, 179.99, now)
+    index.upsert(2, -20.0, -179.98, now)
+    assert [i for _, i, _, _ in index.nearest(-20.0, 179.995, 5, 20, now)] == [1, 2]
+
+    # a move swap-removes the old slot; the driver left behind stays addressable
+    index.upsert(1, 5.0, 5.0, now + 1)
+    assert [i for _, i, _, _ in index.nearest(-20.0, 179.995, 5, 20, now)] == [2]
+    assert [i for _, i, _, _ in index.nearest(5.0, 5.0, 1, 20, now)] == [1]
+    assert index.status()["drivers"] == 2
+
+
+def test_stale_positions_are_ignored_and_evicted():
+    index = DriverGeoIndex(cell_degrees=0.01, max_age_seconds=60)
+    now = time.time()
+    index.upsert(1, 0.0, 0.0, now - 61)
+    index.upsert(2, 0.0, 0.001, now)
+    index.upsert(3, 40.0, 40.0, now - 120)
+
+    assert [i for _, i, _, _ in index.nearest(0.0, 0.0, 1, 20, now)] == [2]
+    index.evict_stale(now)
+    assert len(index) == 1
+
+    # an out-of-order (older) update does not overwrite a newer position
+    assert not index.upsert(2, 50.0, 50.0, now - 5)
+    assert not index.remove(2, now - 5)
+    assert index.nearest(0.0, 0.0, 1, 20, now)[0][1] == 2
+
+
+def test_workers_sync_through_redis_pubsub():
+    server = fakeredis.FakeServer()
+    now = time.time()
+    a = DriverGeoSync(DriverGeoIndex(), lambda: [(1, 1.0, 1.0, now)], lambda: fakeredis.FakeRedis(server=server))
+    b = DriverGeoSync(DriverGeoIndex(), lambda: [(1, 1.0, 1.0, now)], lambda: fakeredis.FakeRedis(server=server))
+    a.start()
+    b.start()
+    try:
+        _wait(lambda: a.index.ready and b.index.ready)
+        assert [i for _, i, _, _ in b.index.nearest(1.0, 1.0, 1, 20, now)] == [1]
+
+        a.publish_position(2, 1.0, 1.001, now + 1)
+        a.publish_removal(1, now + 1)
+        _wait(lambda: [i for _, i, _, _ in b.index.nearest(1.0, 1.0, 1, 20, now + 1)] == [2])
+        assert len(b.index) == 1
+        assert [i for _, i, _, _ in a.index.nearest(1.0, 1.0, 1, 20, now + 1)] == [2]
+    finally:
+        a.stop()
+        b.stop()
+    assert not a.index.ready
+
+
+def test_publish_does_not_wait_on_redis():
+    server = fakeredis.FakeServer()
+    listener = fakeredis.FakeRedis(server=server).pubsub(ignore_subscribe_messages=True)
+    listener.subscribe("drivers:geo")
+
+    def slow_redis():
+        time.sleep(0.3)  # e.g. the breaker's reconnect probe
+        return fakeredis.FakeRedis(server=server)
+
+    geo = DriverGeoSync(DriverGeoIndex(), lambda: [], slow_redis)
+    geo.start()
+    try:
+        started = time.monotonic()
+        geo.publish_position(1, 1.0, 1.0, time.time())
+        assert time.monotonic() - started < 0.1
+        assert len(geo.index) == 1
+        _wait(lambda: listener.get_message(timeout=0.05) is not None)
+    finally:
+        geo.stop()
+        listener.close()
+
+
+def test_service_keeps_index_current_and_serves_nearby_from_it(db: Session):
+    stale = Driver(vehicle_type="motorcycle", last_latitude=30.0, last_longitude=30.0,
+                   last_seen_at=datetime.utcnow() - timedelta(minutes=10))
+    moving = Driver(vehicle_type="motorcycle")
+    db.add_all([stale, moving])
+    db.commit()
+
+    index = DriverGeoIndex()
+    geo = DriverGeoSync(index, lambda: [], redis_factory=None)
+
+    async def run():
+        async with TestingAsyncSessionLocal() as session:
+            service = DriverService(session, geo=geo)
+            # SQL path (index not loaded yet) already skips drivers not seen recently
+            assert await service.get_nearby_drivers(30.0, 30.0, radius_km=5) == []
+
+            index.ready = True
+            await service.update_location(moving.id, 30.0, 30.0 + STEP)
+            nearby = await service.get_nearby_drivers(30.0, 30.0, radius_km=5)
+            assert [d.id for d in nearby] == [moving.id]
+            assert nearby[0].distance_km < 1.01
+
+            await service.update_availability(moving.id, False)
+            assert await service.get_nearby_drivers(30.0, 30.0, radius_km=5) == []
+            await service.update_availability(moving.id, True)
+            assert [d.id for d in await service.get_nearby_drivers(30.0, 30.0, radius_km=5)] == [moving.id]
+
+    asyncio.run(run())
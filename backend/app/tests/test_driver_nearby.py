@@ -0,0 +1,53 @@
+import asyncio
+
+from sqlalchemy.orm import Session
+
+from app.core.geo import KM_PER_DEGREE_LAT, bounding_box, haversine_km
+from app.models.driver import Driver
+from app.services.driver_service import DriverService
+from app.tests.conftest import TestingAsyncSessionLocal
+
+
+def _nearby(*args, **kwargs) -> list[int]:
+    async def run():
+        async with TestingAsyncSessionLocal() as db:
+            return [d.id for d in await DriverService(db).get_nearby_drivers(*args, **kwargs)]
+    return asyncio.run(run())
+
+
+def _add(db: Session, lat: float, lng: float, **flags) -> int:
+    driver = Driver(vehicle_type="motorcycle", last_latitude=lat, last_longitude=lng, **flags)
+    db.add(driver)
+    db.commit()
+    return driver.id
+
+
+def test_bounding_box_contains_circle_and_wraps_antimeridian():
+    lat_min, lat_max, ranges = bounding_box(0.0, 179.95, 20)
+    assert ranges == [(ranges[0][0], 180.0), (-180.0, ranges[1][1])]
+    assert ranges[1][1] > -179.9
+    assert bounding_box(89.95, 10.0, 20)[2] == [(-180.0, 180.0)]
+    # every box edge is at least radius away from the center
+    lat_min, lat_max, [(lng_min, lng_max)] = bounding_box(-6.2, 106.8, 10)
+    assert haversine_km(-6.2, 106.8, lat_max, 106.8) >= 10 - 1e-9
+    assert haversine_km(-6.2, 106.8, -6.2, lng_max) >= 10
+
+
+def test_nearby_drivers_filters_radius_and_orders_by_distance(db: Session):
+    lat, lng = 10.0, 20.0
+    step = 1 / KM_PER_DEGREE_LAT  # one km of latitude
+    far = _add(db, lat + 12 * step, lng)
+    five = _add(db, lat, lng + 5 * step / 0.985)
+    one = _add(db, lat + step, lng)
+    _add(db, lat, lng, is_available=False)
+    _add(db, lat, lng, is_active=False)
+
+    assert _nearby(lat, lng, radius_km=10) == [one, five]
+    assert _nearby(lat, lng, radius_km=15) == [one, five, far]
+    assert _nearby(lat, lng, radius_km=15, limit=1) == [one]
+
+
+def test_nearby_drivers_across_antimeridian(db: Session):
+    east = _add(db, -20.0, 179.99)
+    west = _add(db, -20.0, -179.98)
+    assert _nearby(-20.0, 179.995, radius_km=5) == [east, west]
@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.driver import Driver
+from app.models.driver_daily_stat import LIFETIME_DAY, DriverDailyStat, _add_stats_portable
+from app.models.order import Order, OrderStatus
+from app.models.user import User
+from app.services.driver_service import (
+    _build_metrics,
+    _combine_rollup,
+    daily_stats_backfill_stmts,
+    daily_stats_rows_stmt,
+    metrics_stmt,
+)
+
+
+def _driver(db: Session, email: str) -> Driver:
+    user = User(email=email, hashed_password="x")
+    db.add(user)
+    db.flush()
+    driver = Driver(user_id=user.id, vehicle_type="motorcycle")
+    db.add(driver)
+    db.commit()
+    return driver
+
+
+def _rows(db: Session, driver_id: int) -> dict:
+    stats = db.scalars(select(DriverDailyStat).where(DriverDailyStat.driver_id == driver_id)).all()
+    return {s.day: (s.orders, s.accepted, s.completed, float(s.earnings), s.delivery_count) for s in stats}
+
+
+def test_rollup_follows_order_transitions_and_matches_backfill(db: Session):
+    driver = _driver(db, "rollup-driver@example.com")
+    now = datetime.utcnow()
+    yesterday = now - timedelta(days=1)
+    old = Order(driver_id=driver.id, status=OrderStatus.DELIVERED, total_amount=20, created_at=yesterday,
+                delivered_at=yesterday + timedelta(minutes=30))
+    new = Order(driver_id=driver.id, status=OrderStatus.PENDING, total_amount=10, created_at=now)
+    cancelled = Order(driver_id=driver.id, status=OrderStatus.PENDING, total_amount=99, created_at=now)
+    db.add_all([old, new, cancelled])
+    db.commit()
+    assert _rows(db, driver.id)[now.date()] == (2, 2, 0, 0.0, 0)
+
+    # transitions on expired instances (after commit) still subtract the right old values
+    new.status = OrderStatus.DELIVERED
+    new.delivered_at = now + timedelta(minutes=20)
+    cancelled.status = OrderStatus.CANCELLED
+    db.commit()
+    db.delete(old)
+    db.commit()
+
+    rows = _rows(db, driver.id)
+    assert rows[now.date()] == (2, 1, 1, 10.0, 1)
+    assert rows[yesterday.date()] == (0, 0, 0, 0.0, 0)
+    assert rows[LIFETIME_DAY] == (2, 1, 1, 10.0, 1)
+
+    # the backfill rebuilds the same non-empty rows from orders
+    for stmt in daily_stats_backfill_stmts(db.get_bind().dialect.name, driver.id):
+        db.execute(stmt)
+    db.commit()
+    db.expire_all()
+    assert _rows(db, driver.id) == {day: r for day, r in rows.items() if r[0]}
+
+
+def test_portable_upsert_adds_to_existing_rows(db: Session):
+    # the fallback used on dialects without a native upsert
+    driver = _driver(db, "rollup-portable@example.com")
+    day = datetime.utcnow().date()
+    row = {"driver_id": driver.id, "day": day, "orders": 1, "accepted": 1, "completed": 1,
+           "earnings": 10, "delivery_seconds_sum": 60.0, "delivery_count": 1}
+    conn = db.connection()
+    _add_stats_portable(conn, [row])
+    _add_stats_portable(conn, [{**row, "orders": 2, "completed": 0, "earnings": 0, "delivery_count": 0}])
+    db.commit()
+    assert _rows(db, driver.id) == {day: (3, 2, 1, 10.0, 1)}
+
+
+def test_rollup_metrics_match_single_query(db: Session):
+    driver = _driver(db, "rollup-metrics@example.com")
+    now = datetime.utcnow()
+    for days_ago, status, amount in [(0, "DELIVERED", 5), (0, "CANCELLED", 7), (3, "DELIVERED", 11),
+                                     (20, "PENDING", 13), (29, "DELIVERED", 17), (45, "DELIVERED", 19)]:
+        created = now - timedelta(days=days_ago)
+        db.add(Order(driver_id=driver.id, status=status, total_amount=amount, created_at=created,
+                     delivered_at=created + timedelta(minutes=days_ago + 10) if status == "DELIVERED" else None))
+    db.commit()
+
+    dialect = db.get_bind().dialect.name
+    live = dict(db.execute(metrics_stmt(driver.id, now, dialect)).one()._mapping)
+    rows = list(db.scalars(daily_stats_rows_stmt(driver.id, now)).all())
+    assert len(rows) <= 31
+    today = db.execute(metrics_stmt(driver.id, now, dialect, since=datetime.combine(now.date(), datetime.min.time()))).one()
+    combined = _combine_rollup(rows, today._mapping, now)
+
+    assert combined.keys() == live.keys()
+    for key, value in live.items():
+        # julianday() arithmetic makes SQLite's live seconds inexact
+        assert float(combined[key] or 0) == pytest.approx(float(value or 0)), key
+
+
+def test_metrics_stmt_exact_values(db: Session):
+    driver = _driver(db, "metrics-exact@example.com")
+    driver.rating, driver.total_trips = 4.5, 9
+    other = _driver(db, "metrics-exact-other@example.com")
+    now = datetime(2026, 10, 15, 12, 0)  # Thursday: week from Mon 12th, 30-day window from Sep 15th
+    D, C, P = OrderStatus.DELIVERED, OrderStatus.CANCELLED, OrderStatus.PENDING
+    for created, status, amount, minutes in [
+        (datetime(2026, 10, 15, 10), D, 100, 30),  # today
+        (datetime(2026, 10, 15, 11), C, 50, None),
+        (datetime(2026, 10, 13, 9), D, 200, 20),  # this week
+        (datetime(2026, 10, 13, 10), P, 70, None),
+        (datetime(2026, 10, 5, 8), D, 300, 40),  # this month
+        (datetime(2026, 9, 20, 8), C, 40, None),  # last 30 days
+        (datetime(2026, 9, 20, 9), D, 400, 10),
+        (datetime(2026, 8, 1, 8), D, 500, 60),  # lifetime only
+    ]:
+        db.add(Order(driver_id=driver.id, status=status, total_amount=amount, created_at=created,
+                     delivered_at=created + timedelta(minutes=minutes) if minutes else None))
+    db.add(Order(driver_id=other.id, status=D, total_amount=999, created_at=datetime(2026, 10, 15, 9),
+                 delivered_at=datetime(2026, 10, 15, 9, 5)))
+    db.commit()
+
+    row = db.execute(metrics_stmt(driver.id, now, db.get_bind().dialect.name)).one()
+    metrics = _build_metrics(driver, row._mapping).model_dump()
+    # julianday() arithmetic makes SQLite's seconds inexact
+    assert metrics.pop("average_delivery_time") == pytest.approx(32.0, abs=0.01)  # (30+20+40+10+60) / 5
+    assert metrics == {
+        "total_trips": 9,
+        "total_earnings": 1500.0,
+        "average_rating": 4.5,
+        "acceptance_rate": 71.43,  # 5 of 7 orders in the window not cancelled
+        "completion_rate": 83.33,  # 5 delivered of 6 not cancelled
+        "weekly_orders": 4,
+        "weekly_earnings": 300.0,
+        "monthly_orders": 5,
+        "monthly_earnings": 600.0,
+        "daily_orders": 2,
+        "daily_earnings": 100.0,
+        "online_hours_this_month": 3.5,
+    }
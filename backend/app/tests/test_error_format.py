@@ -19,6 +19,7 @@ def test_structured_error_duplicate_category(client: TestClient):
     assert "error" in body
     assert body["error"]["code"] == 400
     assert isinstance(body["error"]["message"], str)
+    assert body["detail"] == body["error"]["message"]
 
 
 def test_structured_error_not_found(client: TestClient):
@@ -27,3 +28,5 @@ def test_structured_error_not_found(client: TestClient):
     body = r.json()
     assert body["error"]["code"] == 404
     assert body["error"]["message"] == "Product not found"
+    # FastAPI's default "detail" key is kept next to the envelope
+    assert body["detail"] == "Product not found"
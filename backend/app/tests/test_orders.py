@@ -0,0 +1,25 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.order import Order, OrderStatus
+
+
+def test_order_status_lookup_is_case_insensitive():
+    assert OrderStatus("delivered") is OrderStatus.DELIVERED
+    assert OrderStatus("On_The_Way") is OrderStatus.ON_THE_WAY
+    with pytest.raises(ValueError):
+        OrderStatus("lost")
+
+
+def test_order_status_is_coerced_on_assignment(db: Session):
+    order = Order(status="cancelled", total_amount=1)
+    assert order.status is OrderStatus.CANCELLED
+    order.status = "delivered"
+    assert order.status is OrderStatus.DELIVERED
+    with pytest.raises(ValueError):
+        order.status = "lost"
+
+    db.add(order)
+    db.commit()
+    db.expire(order)
+    assert order.status is OrderStatus.DELIVERED  # stored as the canonical name
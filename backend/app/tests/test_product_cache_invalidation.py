@@ -27,3 +27,19 @@ def test_product_list_cache_invalidation(client: TestClient):
     assert r2.status_code == 200
     arr = r2.json()
     assert any(p["id"] == prod_id for p in arr)
+
+
+def test_product_list_etag_changes_after_mutation(client: TestClient):
+    client.post("/auth/signup", json={"email": "etag@example.com", "password": "Secret123", "full_name": "Etag User"})
+    r = client.post("/auth/login", json={"email": "etag@example.com", "password": "Secret123"})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    r = client.get("/products/")
+    etag = r.headers["etag"]
+    assert r.headers["cache-control"] == "no-cache"
+    assert client.get("/products/", headers={"If-None-Match": etag}).status_code == 304
+
+    client.post("/products/", headers=headers, json={"name": "Gadget", "price": 5})
+    r = client.get("/products/", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
@@ -0,0 +1,312 @@
+import json
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.models.product import Product
+from app.services.product_service import _search_score
+
+
+def auth_headers(client: TestClient):
+    client.post("/auth/signup", json={"email": "products@example.com", "password": "Secret123", "full_name": "Products"})
+    r = client.post("/auth/login", json={"email": "products@example.com", "password": "Secret123"})
+    token = r.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_product_list_cached_body_matches_schema(client: TestClient):
+    headers = auth_headers(client)
+    r = client.post("/products/", headers=headers, json={"name": "Kopi", "price": 12.5})
+    assert r.status_code == 201
+
+    first = client.get("/products/", params={"limit": 5})
+    second = client.get("/products/", params={"limit": 5})  # served from cache
+    assert first.status_code == second.status_code == 200
+    assert first.headers["content-type"] == "application/json"
+    assert first.content == second.content
+    item = next(p for p in second.json() if p["name"] == "Kopi")
+    assert set(item) == {"id", "category_id", "name", "description", "price", "image_url", "is_available", "created_at"}
+    assert item["price"] == "12.50"
+
+
+def test_product_detail_read_through_and_write_through(client: TestClient):
+    headers = auth_headers(client)
+    assert client.get("/products/999999").status_code == 404
+    assert client.get("/products/999999").status_code == 404  # negative-cached
+
+    r = client.post("/categories/", headers=headers, json={"name": "Minuman Detail"})
+    cat_id = r.json()["id"]
+    r = client.post("/products/", headers=headers, json={"name": "Es Teh", "price": 5, "category_id": cat_id})
+    prod_id = r.json()["id"]
+
+    r = client.get(f"/products/{prod_id}")
+    assert r.status_code == 200
+    assert r.json()["name"] == "Es Teh"
+    assert r.json()["category"]["name"] == "Minuman Detail"
+
+    client.patch(f"/products/{prod_id}", headers=headers, json={"name": "Es Teh Manis"})
+    assert client.get(f"/products/{prod_id}").json()["name"] == "Es Teh Manis"
+
+    assert client.delete(f"/products/{prod_id}", headers=headers).status_code == 204
+    assert client.get(f"/products/{prod_id}").status_code == 404
+
+
+def test_product_list_cursor_pagination_walks_all_pages(client: TestClient):
+    headers = auth_headers(client)
+    r = client.post("/categories/", headers=headers, json={"name": "Keyset"})
+    cat_id = r.json()["id"]
+    # created within the same second: ordering relies on the id tie-breaker
+    created = [
+        client.post("/products/", headers=headers, json={"name": f"Keyset {i}", "price": 1, "category_id": cat_id}).json()["id"]
+        for i in range(7)
+    ]
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, "category_id": cat_id}
+        if cursor:
+            params["cursor"] = cursor
+        r = client.get("/products/", params=params)
+        assert r.status_code == 200
+        seen += [p["id"] for p in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert seen == sorted(created, reverse=True)
+    offset_page = client.get("/products/", params={"limit": 3, "skip": 3, "category_id": cat_id}).json()
+    assert [p["id"] for p in offset_page] == seen[3:6]
+
+
+def test_product_list_rejects_bad_cursor(client: TestClient):
+    headers = auth_headers(client)
+    client.post("/products/", headers=headers, json={"name": "Cursor", "price": 1})
+    assert client.get("/products/", params={"cursor": "not-a-cursor"}).status_code == 400
+    cursor = client.get("/products/", params={"limit": 1}).headers["X-Next-Cursor"]
+    assert client.get("/products/", params={"cursor": cursor, "skip": 1}).status_code == 400
+
+
+def test_bulk_import_reports_row_errors_and_invalidates_once(client: TestClient):
+    headers = auth_headers(client)
+    cat_id = client.post("/categories/", headers=headers, json={"name": "Bulk"}).json()["id"]
+    before = client.get("/products/", params={"category_id": cat_id})
+    assert before.json() == []
+
+    items = [{"name": f"Bulk {i}", "price": 10 + i, "category_id": cat_id} for i in range(3)]
+    items.append({"name": "No category", "price": 1, "category_id": 987654})
+    items.append({"price": 1})  # missing name
+    r = client.post("/products/bulk", headers=headers, json=items)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["inserted"] == 3
+    assert body["failed"] == 2
+    assert [e["row"] for e in body["errors"]] == [3, 4]
+    assert body["errors"][0]["detail"] == "Category not found"
+    assert "name" in body["errors"][1]["detail"]
+
+    after = client.get("/products/", params={"category_id": cat_id}).json()
+    assert sorted(p["name"] for p in after) == ["Bulk 0", "Bulk 1", "Bulk 2"]
+
+
+def test_bulk_imports_replace_negative_detail_entries(client: TestClient):
+    headers = auth_headers(client)
+    last = client.post("/products/", headers=headers, json={"name": "Before bulk", "price": 1}).json()["id"]
+    assert client.get(f"/products/{last + 1}").status_code == 404
+    assert client.get(f"/products/{last + 2}").status_code == 404
+
+    client.post("/products/bulk", headers=headers, json=[{"name": "Bulk next", "price": 1}])
+    assert client.get(f"/products/{last + 1}").json()["name"] == "Bulk next"
+    stream = json.dumps({"name": "Stream next", "price": 1})
+    client.post("/products/bulk/stream", headers={**headers, "Content-Type": "application/x-ndjson"}, content=stream)
+    assert client.get(f"/products/{last + 2}").json()["name"] == "Stream next"
+
+
+def test_bulk_stream_ndjson_and_csv(client: TestClient):
+    headers = auth_headers(client)
+    cat_id = client.post("/categories/", headers=headers, json={"name": "Bulk Stream"}).json()["id"]
+
+    ndjson = "\n".join(
+        [
+            json.dumps({"name": "Nd 1", "price": 3, "category_id": cat_id}),
+            "",
+            "{not json",
+            json.dumps({"name": "Nd 2", "price": 4, "category_id": cat_id, "is_available": False}),
+        ]
+    )
+    r = client.post("/products/bulk/stream", headers={**headers, "Content-Type": "application/x-ndjson"}, content=ndjson)
+    assert r.status_code == 200
+    assert r.json()["inserted"] == 2
+    assert r.json()["errors"][0]["row"] == 1
+
+    csv_body = (
+        "name,price,category_id,description,is_available\r\n"
+        f'Csv 1,5.5,{cat_id},"multi\nline, with comma",true\r\n'
+        f"Csv 2,6,{cat_id},,\r\n"
+        "Csv 3,not-a-price,,,\r\n"
+    )
+    r = client.post("/products/bulk/stream", headers={**headers, "Content-Type": "text/csv"}, content=csv_body)
+    assert r.status_code == 200
+    assert r.json()["inserted"] == 2
+    assert [e["row"] for e in r.json()["errors"]] == [2]
+
+    names = {p["name"]: p for p in client.get("/products/", params={"category_id": cat_id, "limit": 100}).json()}
+    assert set(names) == {"Nd 1", "Nd 2", "Csv 1", "Csv 2"}
+    assert names["Csv 1"]["description"] == "multi\nline, with comma"
+    assert names["Nd 2"]["is_available"] is False
+
+    r = client.post("/products/bulk/stream", headers={**headers, "Content-Type": "text/plain"}, content="x")
+    assert r.status_code == 415
+
+    # undecodable bytes are a row error, not a 500
+    bad = json.dumps({"name": "Nd 3", "price": 1}).encode() + b'\n{"name": "\xff", "price": 1}\n'
+    r = client.post("/products/bulk/stream", headers={**headers, "Content-Type": "application/x-ndjson"}, content=bad)
+    assert r.status_code == 200
+    assert r.json()["inserted"] == 1
+    assert r.json()["errors"] == [{"row": 1, "detail": "Invalid UTF-8"}]
+
+    bad = b"name,price\r\nCsv \xfe,1\r\nCsv 4,2\r\n"
+    r = client.post("/products/bulk/stream", headers={**headers, "Content-Type": "text/csv"}, content=bad)
+    assert r.json()["inserted"] == 1
+    assert r.json()["errors"] == [{"row": 0, "detail": "Invalid UTF-8"}]
+    r = client.post("/products/bulk/stream", headers={**headers, "Content-Type": "text/csv"}, content=b"n\xffame\r\n")
+    assert r.status_code == 400
+
+
+def test_product_search_ranks_filters_and_paginates(client: TestClient):
+    headers = auth_headers(client)
+    cat_id = client.post("/categories/", headers=headers, json={"name": "Search"}).json()["id"]
+    products = [
+        {"name": "Rendang Sapi", "description": "rendang padang pedas", "price": 40, "category_id": cat_id},
+        {"name": "Sate Kambing", "description": "bumbu kacang", "price": 30, "category_id": cat_id},
+        {"name": "Nasi Rendang", "description": "nasi dengan rendang", "price": 25, "category_id": cat_id, "is_available": False},
+        {"name": "Rendang Telur", "description": None, "price": 15},
+    ]
+    ids = {p["name"]: client.post("/products/", headers=headers, json=p).json()["id"] for p in products}
+
+    r = client.get("/products/search", params={"q": "RENDANG", "category_id": cat_id})
+    assert r.status_code == 200
+    names = [p["name"] for p in r.json()]
+    assert set(names) == {"Rendang Sapi", "Nasi Rendang"}
+    assert "Sate Kambing" not in names
+
+    r = client.get("/products/search", params={"q": "rendang", "category_id": cat_id, "available": True})
+    assert [p["name"] for p in r.json()] == ["Rendang Sapi"]
+
+    # keyset pagination over ranked results visits every match exactly once
+    seen, cursor = [], None
+    while True:
+        params = {"q": "rendang", "limit": 1}
+        if cursor:
+            params["cursor"] = cursor
+        r = client.get("/products/search", params=params)
+        seen += [p["id"] for p in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert sorted(seen) == sorted(ids[n] for n in ("Rendang Sapi", "Nasi Rendang", "Rendang Telur"))
+
+    # edits are searchable immediately (FTS triggers + cache invalidation)
+    client.patch(f"/products/{ids['Sate Kambing']}", headers=headers, json={"name": "Sate Rendang"})
+    r = client.get("/products/search", params={"q": "rendang", "category_id": cat_id})
+    assert "Sate Rendang" in [p["name"] for p in r.json()]
+
+    assert client.get("/products/search", params={"q": "x"}).status_code == 422
+    assert client.get("/products/search", params={"q": '"); DROP'}).status_code == 200
+
+
+def _sync(client: TestClient, since: int, limit: int = 500) -> tuple[int, dict]:
+    """Follow has_more to the end; returns the final version and merged changes."""
+    merged = {"products": {}, "categories": {}, "deleted_products": set()}
+    while True:
+        r = client.get("/products/changes", params={"since": since, "limit": limit})
+        assert r.status_code == 200
+        body = r.json()
+        assert body["version"] >= since
+        merged["products"].update({p["id"]: p for p in body["products"]})
+        merged["categories"].update({c["id"]: c for c in body["categories"]})
+        merged["deleted_products"].update(body["deleted"]["products"])
+        since = body["version"]
+        if not body["has_more"]:
+            return since, merged
+
+
+def test_product_changes_delta_sync(client: TestClient):
+    headers = auth_headers(client)
+    version, _ = _sync(client, 0)
+
+    cat_id = client.post("/categories/", headers=headers, json={"name": "Delta Cat"}).json()["id"]
+    ids = [
+        client.post("/products/", headers=headers, json={"name": f"Delta {i}", "price": 3, "category_id": cat_id}).json()["id"]
+        for i in range(3)
+    ]
+    client.patch(f"/products/{ids[0]}", headers=headers, json={"price": 4})
+    assert client.delete(f"/products/{ids[1]}", headers=headers).status_code == 204
+
+    # small pages still converge; the deleted product only shows up as a tombstone
+    new_version, changes = _sync(client, version, limit=2)
+    assert new_version > version
+    assert set(changes["products"]) == {ids[0], ids[2]}
+    assert changes["products"][ids[0]]["price"] == "4.00"
+    assert set(changes["categories"]) == {cat_id}
+    assert changes["deleted_products"] == {ids[1]}
+
+    r = client.get("/products/changes", params={"since": new_version})
+    assert r.json() == {
+        "version": new_version, "has_more": False, "products": [], "categories": [],
+        "deleted": {"products": [], "categories": []},
+    }
+    r2 = client.get("/products/changes", params={"since": new_version}, headers={"If-None-Match": r.headers["etag"]})
+    assert r2.status_code == 304
+
+
+def test_category_list_counts_follow_product_writes(client: TestClient):
+    headers = auth_headers(client)
+    a = client.post("/categories/", headers=headers, json={"name": "Count A"}).json()["id"]
+    b = client.post("/categories/", headers=headers, json={"name": "Count B"}).json()["id"]
+
+    def counts():
+        items = {c["id"]: c for c in client.get("/categories/").json()}
+        return items[a]["available_product_count"], items[b]["available_product_count"]
+
+    assert counts() == (0, 0)
+    p1 = client.post("/products/", headers=headers, json={"name": "C1", "price": 1, "category_id": a}).json()["id"]
+    client.post("/products/", headers=headers, json={"name": "C2", "price": 1, "category_id": a, "is_available": False})
+    assert counts() == (1, 0)  # cached list was invalidated by the create
+
+    r = client.post("/products/bulk", headers=headers, json=[
+        {"name": "C3", "price": 1, "category_id": b},
+        {"name": "C4", "price": 1, "category_id": b},
+        {"name": "C5", "price": 1, "category_id": b, "is_available": False},
+    ])
+    assert r.json()["inserted"] == 3
+    assert counts() == (1, 2)
+
+    client.patch(f"/products/{p1}", headers=headers, json={"category_id": b})
+    assert counts() == (0, 3)
+    client.patch(f"/products/{p1}", headers=headers, json={"is_available": False})
+    assert counts() == (0, 2)
+    client.patch(f"/products/{p1}", headers=headers, json={"is_available": True})
+    client.delete(f"/products/{p1}", headers=headers)
+    assert counts() == (0, 2)
+
+
+def test_product_search_like_fallback_for_dialects_without_fulltext(db):
+    names = ["Kopi Susu Aren", "Es Kopi", "Teh Tarik", "Kopi_Hitam", "KopiXHitam"]
+    db.add_all([
+        Product(name=names[0], description="gula aren", price=18),
+        Product(name=names[1], description="SUSU segar", price=20),
+        Product(name=names[2], description="susu kental", price=12),
+        Product(name=names[3], description=None, price=10),
+        Product(name=names[4], description=None, price=10),
+    ])
+    db.commit()
+
+    def search(q: str) -> list[tuple[str, int]]:
+        # any dialect other than mysql/sqlite (e.g. postgresql) gets LIKE matching
+        score, conditions = _search_score("postgresql", q)
+        rows = db.execute(select(Product.name, score).where(*conditions).order_by(score.desc(), Product.id)).all()
+        return [(name, int(s)) for name, s in rows if name in names]
+
+    assert search("kopi  SUSU") == [("Kopi Susu Aren", 2), ("Es Kopi", 2), ("Teh Tarik", 1), ("Kopi_Hitam", 1), ("KopiXHitam", 1)]
+    # LIKE wildcards in the query are matched literally
+    assert search("kopi_hitam") == [("Kopi_Hitam", 1)]
@@ -0,0 +1,38 @@
+import logging
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db import instrumentation
+
+
+def test_request_reports_db_time_in_server_timing(client):
+    r = client.get("/health")
+    assert r.status_code == 200
+    timing = r.headers["Server-Timing"]
+    assert timing.startswith("db;dur=")
+    assert '"1 queries"' in timing
+
+
+def test_counts_queries_and_flags_repeated_statements(db):
+    stats, token = instrumentation.begin_query_stats()
+    try:
+        for i in range(settings.SQL_N_PLUS_ONE_THRESHOLD):
+            db.execute(text("SELECT :i"), {"i": i})
+        db.execute(text("SELECT 42"))
+    finally:
+        instrumentation.end_query_stats(token)
+
+    assert stats.count == settings.SQL_N_PLUS_ONE_THRESHOLD + 1
+    summary = instrumentation.summarize(stats)
+    assert summary["n_plus_one"] == [{"statement": "SELECT ?", "count": settings.SQL_N_PLUS_ONE_THRESHOLD}]
+    # outside a scope nothing is recorded
+    db.execute(text("SELECT 1"))
+    assert stats.count == settings.SQL_N_PLUS_ONE_THRESHOLD + 1
+
+
+def test_slow_queries_are_logged_with_parameters(db, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "SQL_SLOW_QUERY_MS", 0.000001)
+    with caplog.at_level(logging.WARNING, logger="sql"):
+        db.execute(text("SELECT :marker"), {"marker": "needle"})
+    assert any("needle" in r.getMessage() for r in caplog.records)
@@ -1,5 +1,7 @@
 from fastapi.testclient import TestClient
 
+from app.models.wallet import Wallet
+
 
 def auth_headers(client: TestClient):
     client.post("/auth/signup", json={"email": "wallet@example.com", "password": "Secret123", "full_name": "Wallet"})
@@ -41,3 +43,17 @@ def test_wallet_topup_and_withdraw(client: TestClient):
     assert len(arr) >= 2
     types = [t["type"] for t in arr]
     assert "TOPUP" in types and "WITHDRAW" in types
+
+
+def test_transactions_without_wallet_is_empty_and_read_only(client: TestClient, db):
+    client.post("/auth/signup", json={"email": "nowallet@example.com", "password": "Secret123", "full_name": "No Wallet"})
+    r = client.post("/auth/login", json={"email": "nowallet@example.com", "password": "Secret123"})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    # served from the read session, so it must not INSERT a wallet (a replica
+    # that lags behind could miss an existing one and hit wallets.user_id)
+    r = client.get("/wallet/transactions", headers=headers)
+    assert r.status_code == 200
+    assert r.json() == []
+    me = client.get("/me", headers=headers).json()
+    assert db.query(Wallet).filter(Wallet.user_id == me["id"]).first() is None
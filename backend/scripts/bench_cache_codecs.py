@@ -0,0 +1,85 @@
+"""Benchmark cache value codecs on realistic product list payloads.
+
+Reports stored bytes plus encode/decode time for every serializer x
+compression combination available in app.core.cache_codecs.
+
+Usage (from repo root):
+	PYTHONPATH=backend python backend/scripts/bench_cache_codecs.py [--limit 100] [--repeat 200]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import timeit
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+os.environ.setdefault("SECRET_KEY", "bench-secret-very-long-string-0123456789abcdef")
+
+from app.core import cache_codecs as codecs  # noqa: E402
+
+WORDS = (
+	"nasi goreng ayam bakar sambal matah pedas manis gurih kopi susu gula aren es teh "
+	"tahu tempe sate kambing lontong sayur bumbu kacang soto betawi rendang sapi segar "
+	"porsi besar hemat favorit keluarga tanpa msg dibuat setiap hari dengan bahan pilihan"
+).split()
+
+
+def product_page(limit: int, seed: int = 7) -> list[dict]:
+	"""Shape matches ProductRead.model_dump(mode="json") as cached by GET /products/."""
+	rng = random.Random(seed)
+	now = datetime(2025, 11, 8, 12, 0, 0)
+	return [
+		{
+			"id": 10_000 + i,
+			"category_id": rng.randint(1, 25),
+			"name": " ".join(rng.choices(WORDS, k=3)).title(),
+			"description": " ".join(rng.choices(WORDS, k=rng.randint(15, 45))).capitalize() + ".",
+			"price": str(Decimal(rng.randint(5_000, 150_000)).quantize(Decimal("0.01"))),
+			"image_url": f"https://cdn.example.com/products/{10_000 + i}.jpg",
+			"is_available": rng.random() > 0.1,
+			"created_at": (now - timedelta(minutes=rng.randint(0, 500_000))).isoformat(),
+		}
+		for i in range(limit)
+	]
+
+
+def bench(value, serializer: str, compression: str, repeat: int) -> tuple[int, float, float]:
+	def enc() -> bytes:
+		return codecs.compress_frame(codecs.encode(value, serializer), compression, min_bytes=0)
+
+	frame = enc()
+
+	def dec():
+		return codecs.decode(codecs.decompress_frame(frame))
+
+	assert dec() == value
+	enc_us = min(timeit.repeat(enc, number=repeat, repeat=3)) / repeat * 1e6
+	dec_us = min(timeit.repeat(dec, number=repeat, repeat=3)) / repeat * 1e6
+	return len(frame), enc_us, dec_us
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--limit", type=int, default=100, help="products per page")
+	parser.add_argument("--repeat", type=int, default=200)
+	args = parser.parse_args()
+
+	page = product_page(args.limit)
+	available = codecs.available_codecs()
+	serializers = [s for s in ("json", "msgpack") if s in available["serializers"]]
+	compressions = ["none"] + available["compressors"]
+
+	print(f"payload: {args.limit} products")
+	print(f"{'codec':<16}{'bytes':>10}{'ratio':>8}{'encode us':>12}{'decode us':>12}")
+	baseline = None
+	for ser in serializers:
+		for comp in compressions:
+			size, enc_us, dec_us = bench(page, ser, comp, args.repeat)
+			baseline = baseline or size
+			print(f"{ser + '+' + comp:<16}{size:>10}{baseline / size:>8.2f}{enc_us:>12.1f}{dec_us:>12.1f}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,105 @@
+"""Benchmark building a GET /products/ body: ORM entities vs column projection.
+
+"orm" is the previous loader path: list_products (Product entities plus a
+selectinload(Product.category) query) validated into ProductRead. "projection"
+is list_product_rows: one select of ProductRead's columns. Both end in the
+same TypeAdapter.dump_json, and the bodies are checked to be identical.
+
+Usage (from repo root):
+	PYTHONPATH=backend python backend/scripts/bench_product_list.py [--rows 5000] [--limit 100] [--repeat 200]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("SECRET_KEY", "bench-secret-very-long-string-0123456789abcdef")
+
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import create_engine, func, select  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.db.session import Base  # noqa: E402
+from app.models import Category, Product  # noqa: E402
+from app.schemas.product import ProductRead  # noqa: E402
+from app.services.product_service import list_product_rows, list_products  # noqa: E402
+
+adapter = TypeAdapter(list[ProductRead])
+
+
+def seed(engine, rows: int) -> None:
+	Base.metadata.create_all(engine)
+	with engine.begin() as conn:
+		if conn.execute(select(func.count()).select_from(Product)).scalar_one() >= rows:
+			return
+		conn.execute(Category.__table__.insert(), [{"name": f"Bench {i}"} for i in range(25)])
+		category_ids = list(conn.execute(select(Category.id)).scalars())
+		rng = random.Random(5)
+		conn.execute(
+			Product.__table__.insert(),
+			[
+				{
+					"category_id": rng.choice(category_ids),
+					"name": f"Bench product {i}",
+					"description": "seeded for list benchmark " * rng.randint(1, 6),
+					"price": rng.randint(5_000, 150_000),
+					"image_url": f"https://cdn.example.com/products/{i}.jpg",
+					"is_available": rng.random() > 0.1,
+				}
+				for i in range(rows)
+			],
+		)
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--url", help="sync SQLAlchemy URL (default: temporary SQLite file)")
+	parser.add_argument("--rows", type=int, default=5000)
+	parser.add_argument("--limit", type=int, default=100)
+	parser.add_argument("--repeat", type=int, default=200)
+	args = parser.parse_args()
+
+	tmp = None
+	url = args.url
+	if url is None:
+		tmp = tempfile.TemporaryDirectory(prefix="bench-list-")
+		url = f"sqlite+pysqlite:///{os.path.join(tmp.name, 'bench.db')}"
+	engine = create_engine(url)
+	seed(engine, args.rows)
+	SessionLocal = sessionmaker(bind=engine, autoflush=False)
+
+	def orm() -> bytes:
+		with SessionLocal() as db:
+			return adapter.dump_json(adapter.validate_python(list_products(db, limit=args.limit)))
+
+	def projection() -> bytes:
+		with SessionLocal() as db:
+			return adapter.dump_json(adapter.validate_python(list_product_rows(db, limit=args.limit)))
+
+	assert orm() == projection(), "bodies differ"
+	print(f"limit={args.limit}, {args.repeat} runs each")
+	print(f"{'path':<12}{'median ms':>12}{'p95 ms':>10}")
+	results = {}
+	for name, fn in (("orm", orm), ("projection", projection)):
+		fn()  # warm up
+		samples = []
+		for _ in range(args.repeat):
+			t0 = time.perf_counter()
+			fn()
+			samples.append((time.perf_counter() - t0) * 1000)
+		samples.sort()
+		results[name] = statistics.median(samples)
+		print(f"{name:<12}{results[name]:>12.3f}{samples[int(len(samples) * 0.95) - 1]:>10.3f}")
+	print(f"speedup {results['orm'] / results['projection']:>13.1f}x")
+
+	engine.dispose()
+	if tmp is not None:
+		tmp.cleanup()
+
+
+if __name__ == "__main__":
+	main()